@@ -0,0 +1,830 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Computer players choosing fields to attack
+"""
+
+import heapq
+import time
+
+import config
+
+
+class RandomAI:
+    """
+    Computer player attacking random fields which were not attacked yet
+
+
+    Attributes
+    ----------
+    game : Game
+        Played game
+    name : str
+        Name of attacked game field
+
+    Methods
+    -------
+    choose()
+        Return coordinates of next attack
+    """
+
+    def __init__(self, game, name):
+        """
+        Constructor of RandomAI class
+
+        Parameters
+        ----------
+        game : Game
+            Played game
+        name : str
+            Name of attacked game field
+        """
+
+        self.game = game
+        self.name = name
+
+    def choose(self):
+        """
+        Return coordinates of next attack
+
+        Returns
+        -------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        return self.game.choose_target(self.name)
+
+
+class HuntTargetAI:
+    """
+    Computer player hunting ships by probability density and finishing hit ships
+
+    Density of a field is count of straight segments of `length` fields which contain the field
+    and could be part of a ship (there is no miss, sunk ship or water around sunk ship in them).
+    While any hit ship is not sunk, neighbours of its hits are attacked (target mode),
+    otherwise the field with the highest density is attacked (hunt mode).
+
+    The AI sees only results of attacks, it learns them as subscriber of the game.
+    Attack removes only segments crossing the attacked field, so density is updated in O(length^2),
+    fields are taken from the heap ordered by density.
+
+
+    Attributes
+    ----------
+    game : Game
+        Played game
+    name : str
+        Name of attacked game field
+    width : int
+        Count of columns
+    height : int
+        Count of rows
+    attacked : list
+        True for fields which were attacked, indexed as attacked[y][x]
+    blocked : list
+        True for fields which can't contain live ship, indexed as blocked[y][x]
+    density : list
+        Count of possible segments containing the field, indexed as density[y][x]
+    hits : set
+        Coordinates of hits of ships which are not sunk yet
+    ships : int
+        Count of ships which are not sunk yet
+    blocks : int
+        Count of ship parts of ships which are not sunk yet
+    length : int
+        Length of segments, average size of ships which are not sunk yet
+    heap : list
+        Heap of (-density, random, x, y), entries with out of date density are skipped
+
+    Methods
+    -------
+    choose()
+        Return coordinates of next attack
+    observe(event)
+        Learn result of the attack from the event of the game
+    learn(x, y, action)
+        Update the state after attack on x, y
+    sink(cells)
+        Update the state after the ship was sunk
+    block(x, y)
+        Mark field which can't contain live ship and remove segments containing it
+    segments(x, y)
+        Return possible segments containing the field
+    rebuild()
+        Compute density of all fields
+    target()
+        Return the best neighbour of hits or None
+    """
+
+    def __init__(self, game, name):
+        """
+        Constructor of HuntTargetAI class, learns results of attacks already performed
+
+        Parameters
+        ----------
+        game : Game
+            Played game
+        name : str
+            Name of attacked game field
+        """
+
+        self.game = game
+        self.name = name
+        self.width = game.game_settings[config.GAME_PLAN_X_KEY]
+        self.height = game.game_settings[config.GAME_PLAN_Y_KEY]
+        self.attacked = [[False] * self.width for y in range(self.height)]
+        self.blocked = [[False] * self.width for y in range(self.height)]
+        self.density = [[0] * self.width for y in range(self.height)]
+        self.hits = set()
+        self.ships = game.game_settings[config.GAME_SHIP_KEY]
+        self.blocks = game.game_settings[config.GAME_SHIP_BLOCK_KEY]
+        self.length = max(1, self.blocks // max(self.ships, 1))
+        self.heap = []
+
+        field = game.hero_field if name == config.HERO_KEY else game.enemy_field
+        for y in range(self.height):
+            for x in range(self.width):
+                if field.field[y][x] == config.IS_MISS:
+                    self.attacked[y][x] = True
+                    self.blocked[y][x] = True
+                elif field.field[y][x] == config.IS_HIT:
+                    self.attacked[y][x] = True
+                    self.hits.add((x, y))
+        for ship in range(len(field.ship_cells)):
+            if field.is_sunk(ship):
+                self.sink(field.ship_cells[ship])
+        self.rebuild()
+
+        game.subscribe(self.observe, [config.EVENT_ATTACK, config.EVENT_SUNK])
+
+    def choose(self):
+        """
+        Return coordinates of next attack
+
+        Returns
+        -------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        cell = self.target()
+        if cell is not None:
+            return cell
+
+        while self.heap:
+            density, order, x, y = self.heap[0]
+            if self.attacked[y][x] or self.blocked[y][x]:
+                heapq.heappop(self.heap)
+            elif -density != self.density[y][x]:
+                heapq.heapreplace(self.heap, (-self.density[y][x], order, x, y))
+            else:
+                return x, y
+
+        return self.game.choose_target(self.name)
+
+    def observe(self, event):
+        """
+        Learn result of the attack from the event of the game
+
+        Parameters
+        ----------
+        event : AttackEvent | ShipSunkEvent
+            Event published by the game
+        """
+
+        if event.name != self.name:
+            return
+        if event.kind == config.EVENT_ATTACK:
+            self.learn(event.x, event.y, event.action)
+        elif event.kind == config.EVENT_SUNK:
+            self.sink(event.cells)
+
+    def learn(self, x, y, action):
+        """
+        Update the state after attack on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the attack
+        y : int
+            Y coortinate of the attack
+        action : int
+            Result of the attack, config.IS_HIT or config.IS_MISS
+        """
+
+        self.attacked[y][x] = True
+        if action == config.IS_MISS:
+            self.block(x, y)
+        elif action == config.IS_HIT:
+            self.hits.add((x, y))
+
+    def sink(self, cells):
+        """
+        Update the state after the ship was sunk
+
+        Parameters
+        ----------
+        cells : list
+            Coordinates of parts of the sunk ship
+        """
+
+        for cell_x, cell_y in cells:
+            self.hits.discard((cell_x, cell_y))
+            self.block(cell_x, cell_y)
+            # Ship parts connected in four directions are the same ship, so the ship is surrounded by water
+            for next_x, next_y in ((cell_x - 1, cell_y), (cell_x + 1, cell_y),
+                                   (cell_x, cell_y - 1), (cell_x, cell_y + 1)):
+                if 0 <= next_x < self.width and 0 <= next_y < self.height:
+                    self.block(next_x, next_y)
+
+        self.ships -= 1
+        self.blocks -= len(cells)
+        length = max(1, self.blocks // max(self.ships, 1))
+        if length != self.length:
+            self.length = length
+            self.rebuild()
+
+    def block(self, x, y):
+        """
+        Mark field which can't contain live ship and remove segments containing it
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        if self.blocked[y][x]:
+            return
+
+        for segment in self.segments(x, y):
+            for cell_x, cell_y in segment:
+                self.density[cell_y][cell_x] -= 1
+        self.blocked[y][x] = True
+
+    def segments(self, x, y):
+        """
+        Return possible segments containing the field
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+
+        Returns
+        -------
+        list
+            List of segments, each as list of (x, y) coordinates
+        """
+
+        segments = []
+        for step_x, step_y in ((1, 0), (0, 1)):
+            if self.length == 1 and step_y:
+                break
+            for start in range(self.length):
+                first_x = x - start * step_x
+                first_y = y - start * step_y
+                last_x = first_x + (self.length - 1) * step_x
+                last_y = first_y + (self.length - 1) * step_y
+                if first_x < 0 or first_y < 0 or last_x >= self.width or last_y >= self.height:
+                    continue
+
+                segment = [(first_x + i * step_x, first_y + i * step_y) for i in range(self.length)]
+                if not any(self.blocked[cell_y][cell_x] for cell_x, cell_y in segment):
+                    segments.append(segment)
+        return segments
+
+    def rebuild(self):
+        """
+        Compute density of all fields and fill the heap
+        """
+
+        self.density = [[0] * self.width for y in range(self.height)]
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.blocked[y][x]:
+                    continue
+                # Count only segments starting in this field
+                if x + self.length <= self.width \
+                        and not any(self.blocked[y][x + i] for i in range(self.length)):
+                    for i in range(self.length):
+                        self.density[y][x + i] += 1
+                if self.length > 1 and y + self.length <= self.height \
+                        and not any(self.blocked[y + i][x] for i in range(self.length)):
+                    for i in range(self.length):
+                        self.density[y + i][x] += 1
+
+        self.heap = [(-self.density[y][x], self.game.rng.random(), x, y)
+                     for y in range(self.height) for x in range(self.width)
+                     if not self.attacked[y][x] and not self.blocked[y][x]]
+        heapq.heapify(self.heap)
+
+    def target(self):
+        """
+        Return the best neighbour of hits or None
+
+        Fields in line with two hits are preferred, then fields with higher density
+
+        Returns
+        -------
+        tuple | None
+            (x, y) coordinates of the field or None if there are no hits of live ships
+        """
+
+        best = None
+        for x, y in self.hits:
+            for step_x, step_y in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                next_x = x + step_x
+                next_y = y + step_y
+                if not 0 <= next_x < self.width or not 0 <= next_y < self.height \
+                        or self.attacked[next_y][next_x] or self.blocked[next_y][next_x]:
+                    continue
+
+                in_line = (x - step_x, y - step_y) in self.hits
+                score = (in_line, self.density[next_y][next_x], self.game.rng.random())
+                if best is None or score > best[0]:
+                    best = (score, next_x, next_y)
+
+        return None if best is None else (best[1], best[2])
+
+
+class MonteCarloAI(HuntTargetAI):
+    """
+    Computer player attacking the field most often occupied in random fleets matching results of attacks
+
+    Fleets are sampled by the same rules as game plans are generated (see FleetPlacer): remaining blocks are split
+    between remaining ships, each ship is grown from a random seed by adding fields touching exactly one of its
+    fields and ships don't touch each other. Sampled ships are refused (and the seed is drawn again) when they cover
+    a miss, sunk ship or water around it, touch a hit without covering it or cover only hits. For each group
+    of connected hits one ship covering it is sampled first, other ships are grown from fields which were not
+    attacked.
+
+    Sampled fleets are kept between moves while they match results of attacks, so only the refused ones
+    are sampled again. Fleets are sampled in batches until there are `samples` fleets or `budget` seconds passed,
+    batches are shortened by measured time of one sample, so the move never takes much longer than the budget.
+    The budget is used only in games without provided rng, seeded games are limited only by the count of samples,
+    so they play the same moves in each run.
+    If no matching fleet is found, the field is chosen as by HuntTargetAI.
+
+
+    Attributes
+    ----------
+    samples : int
+        Maximal count of sampled fleets for one move
+    batch : int
+        Count of fleets sampled between checks of time
+    budget : float | None
+        Time for one move in seconds, None for no limit
+    last_samples : int
+        Count of matching fleets used for the last move
+    fleets : list
+        Sampled fleets matching results of attacks, each as (index of ship for each its field, list of ships),
+        ship is list of indexes of its fields
+    around : list
+        Indexes of neighbours of each field
+    base : bytearray
+        Markers of fields which can't be part of any ship (attacked or blocked), indexed by y * width + x
+    seeds : list
+        Indexes of fields which are not in base, in any order
+    seed_position : list
+        Position of each field in self.seeds, -1 for fields in base
+    group_of : dict
+        Set of connected hits for index of each hit of ship which is not sunk yet
+
+    Methods
+    -------
+    choose()
+        Return coordinates of next attack
+    learn(x, y, action)
+        Update the state after attack on x, y
+    block(x, y)
+        Mark field which can't contain live ship
+    sink(cells)
+        Update the state after the ship was sunk
+    exclude(cell)
+        Add the field to base and remove it from seeds in constant time
+    add_hit(cell)
+        Join the hit with groups of neighbouring hits
+    sample(groups)
+        Sample one fleet of live ships matching results of attacks
+    place(ship, blocked)
+        Mark fields of the ship and its neighbours as blocked for other ships
+    grow(seed, size, blocked)
+        Grow the ship of required size from the seed
+    neighbours(cell)
+        Return indexes of fields surrounding the field
+    """
+
+    def __init__(self, game, name, samples=config.AI_SAMPLES, batch=config.AI_SAMPLE_BATCH,
+                 budget=config.AI_TIME_BUDGET):
+        """
+        Constructor of MonteCarloAI class
+
+        Parameters
+        ----------
+        game : Game
+            Played game
+        name : str
+            Name of attacked game field
+        samples : int
+            Optional, maximal count of sampled fleets for one move
+        batch : int
+            Optional, count of fleets sampled between checks of time
+        budget : float | None
+            Optional, time for one move in seconds, None for no limit, not used when the game is seeded
+        """
+
+        # State for sampling is built once the state of HuntTargetAI is learned
+        self.base = None
+        super().__init__(game, name)
+        self.samples = samples
+        self.batch = batch
+        self.budget = None if game.seeded else budget
+        self.last_samples = 0
+        self.fleets = []
+
+        size = self.width * self.height
+        self.around = [self.neighbours(cell) for cell in range(size)]
+        self.base = bytearray(size)
+        self.seeds = list(range(size))
+        self.seed_position = list(range(size))
+        for y in range(self.height):
+            if any(self.attacked[y]) or any(self.blocked[y]):
+                for x in range(self.width):
+                    if self.attacked[y][x] or self.blocked[y][x]:
+                        self.exclude(y * self.width + x)
+
+        self.group_of = {}
+        for x, y in sorted(self.hits):
+            self.add_hit(y * self.width + x)
+
+    def learn(self, x, y, action):
+        """
+        Update the state after attack on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the attack
+        y : int
+            Y coortinate of the attack
+        action : int
+            Result of the attack, config.IS_HIT or config.IS_MISS
+        """
+
+        super().learn(x, y, action)
+        if self.base is None:
+            return
+        cell = y * self.width + x
+        self.exclude(cell)
+        if action == config.IS_HIT:
+            self.add_hit(cell)
+            self.fleets = [fleet for fleet in self.fleets if cell in fleet[0]]
+        else:
+            self.fleets = [fleet for fleet in self.fleets if cell not in fleet[0]]
+
+    def block(self, x, y):
+        """
+        Mark field which can't contain live ship
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        super().block(x, y)
+        if self.base is not None:
+            self.exclude(y * self.width + x)
+
+    def sink(self, cells):
+        """
+        Update the state after the ship was sunk, the ship is not a group of hits anymore
+
+        Parameters
+        ----------
+        cells : list
+            Coordinates of parts of the sunk ship
+        """
+
+        super().sink(cells)
+        if self.base is None:
+            return
+        sunk = {y * self.width + x for x, y in cells}
+        for cell in sunk:
+            self.group_of.pop(cell, None)
+
+        fleets = []
+        for owner, ships in self.fleets:
+            index = owner.get(next(iter(sunk)))
+            if index is not None and set(ships[index]) == sunk:
+                ships = ships[:index] + ships[index + 1:]
+                fleets.append(({cell: index for index, ship in enumerate(ships) for cell in ship}, ships))
+        self.fleets = fleets
+
+    def exclude(self, cell):
+        """
+        Add the field to base and remove it from seeds in constant time
+
+        Parameters
+        ----------
+        cell : int
+            Index of the field (y * width + x)
+        """
+
+        if self.base[cell]:
+            return
+        self.base[cell] = 1
+
+        position = self.seed_position[cell]
+        last = self.seeds.pop()
+        if last != cell:
+            self.seeds[position] = last
+            self.seed_position[last] = position
+        self.seed_position[cell] = -1
+
+    def add_hit(self, cell):
+        """
+        Join the hit with groups of neighbouring hits, the largest group takes cells of the others
+
+        Parameters
+        ----------
+        cell : int
+            Index of the hit (y * width + x)
+        """
+
+        group = {cell}
+        for neighbour in self.neighbours(cell):
+            other = self.group_of.get(neighbour)
+            if other is None or other is group:
+                continue
+            if len(other) > len(group):
+                group, other = other, group
+            group |= other
+            for member in other:
+                self.group_of[member] = group
+        self.group_of[cell] = group
+
+    def choose(self):
+        """
+        Return coordinates of next attack
+
+        Returns
+        -------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        deadline = None if self.budget is None else time.perf_counter() + self.budget
+        base = self.base
+
+        # Fully hit ship would be sunk, the sunk ships are removed from fleets in sink()
+        self.fleets = [fleet for fleet in self.fleets
+                       if not any(all(base[cell] for cell in ship) for ship in fleet[1])]
+        # Groups of connected hits, each is part of one ship
+        groups = list({id(group): group for group in self.group_of.values()}.values())
+
+        missing = self.samples - len(self.fleets)
+        tried = 0
+        batch = 1 if deadline is not None else self.batch
+        start = time.perf_counter()
+        while tried < missing and batch > 0:
+            batch = min(batch, missing - tried)
+            for i in range(batch):
+                ships = self.sample(groups)
+                if ships is not None:
+                    self.fleets.append(({cell: index for index, ship in enumerate(ships) for cell in ship}, ships))
+            tried += batch
+            if deadline is not None:
+                now = time.perf_counter()
+                batch = min(self.batch, int((deadline - now) * tried / max(now - start, 1e-9)))
+
+        self.last_samples = len(self.fleets)
+        counts = {}
+        for owner, ships in self.fleets:
+            for cell in owner:
+                if not base[cell]:
+                    counts[cell] = counts.get(cell, 0) + 1
+        if not counts:
+            return super().choose()
+
+        best = None
+        for cell, count in counts.items():
+            score = (count, self.game.rng.random())
+            if best is None or score > best[0]:
+                best = (score, cell)
+        return best[1] % self.width, best[1] // self.width
+
+    def sample(self, groups):
+        """
+        Sample one fleet of live ships matching results of attacks
+
+        Parameters
+        ----------
+        groups : list
+            Sets of indexes of connected hits of live ships
+
+        Returns
+        -------
+        list | None
+            Ships as lists of indexes of their fields, None if the fleet wasn't found
+        """
+
+        rng = self.game.rng
+        random = rng.random
+        if not self.ships or len(groups) > self.ships or self.blocks < self.ships:
+            return None
+
+        cuts = sorted(rng.sample(range(1, self.blocks), self.ships - 1))
+        bounds = [0] + cuts + [self.blocks]
+        sizes = [bounds[i + 1] - bounds[i] for i in range(self.ships)]
+
+        width = self.width
+        size_all = width * self.height
+        blocked = bytearray(size_all)
+        fleet = []
+        covered = set()
+        order = list(groups)
+        rng.shuffle(order)
+        for group in order:
+            if id(group) in covered:
+                continue
+            ship = None
+            first = next(iter(group))
+            for attempt in range(config.AI_HIT_SHIP_ATTEMPTS * size_all):
+                index = int(random() * len(sizes))
+                size = sizes[index]
+                seed = int(random() * size_all)
+                if size <= len(group) or blocked[seed]:
+                    continue
+                # Ship grown from the seed can't reach any hit of the group
+                seed_x, seed_y = seed % width, seed // width
+                if all(abs(cell % width - seed_x) + abs(cell // width - seed_y) >= size for cell in group):
+                    continue
+                ship = self.grow(seed, size, blocked)
+                if ship is not None and first in ship:
+                    break
+                ship = None
+            if ship is None:
+                return None
+            sizes.pop(index)
+            # The ship can cover more groups of hits
+            for cell in ship:
+                if cell in self.group_of:
+                    covered.add(id(self.group_of[cell]))
+            self.place(ship, blocked)
+            fleet.append(ship)
+
+        sizes.sort(reverse=True)
+        seeds = self.seeds
+        if not seeds and sizes:
+            return None
+        for size in sizes:
+            ship = None
+            for attempt in range(config.AI_SHIP_ATTEMPTS):
+                seed = seeds[int(random() * len(seeds))]
+                if blocked[seed]:
+                    continue
+                ship = self.grow(seed, size, blocked)
+                if ship is not None:
+                    break
+            if ship is None:
+                return None
+            self.place(ship, blocked)
+            fleet.append(ship)
+
+        return fleet
+
+    def place(self, ship, blocked):
+        """
+        Mark fields of the ship and its neighbours as blocked for other ships
+
+        Parameters
+        ----------
+        ship : list
+            Indexes of fields of the ship
+        blocked : bytearray
+            Markers of blocked fields, indexed by y * width + x
+        """
+
+        around = self.around
+        for cell in ship:
+            blocked[cell] = 1
+            for neighbour in around[cell]:
+                blocked[neighbour] = 1
+
+    def grow(self, seed, size, blocked):
+        """
+        Grow the ship of required size from the seed, new field touches exactly one field of the ship
+
+        Parameters
+        ----------
+        seed : int
+            Index of the first field of the ship
+        size : int
+            Required count of fields of the ship
+        blocked : bytearray
+            Markers of fields which can't be used (other ships and their neighbours)
+
+        Returns
+        -------
+        list | None
+            Indexes of fields of the ship, None if the ship doesn't match results of attacks
+        """
+
+        random = self.game.rng.random
+        base = self.base
+        group_of = self.group_of
+        around = self.around
+        if base[seed] and seed not in group_of:
+            return None
+        ship = [seed]
+        taken = {seed}
+        frontier = [neighbour for neighbour in around[seed] if not blocked[neighbour]]
+
+        while len(ship) < size:
+            # Fields of the frontier are picked uniformly, as in FleetPlacer
+            cell = None
+            while frontier:
+                position = int(random() * len(frontier))
+                candidate = frontier[position]
+                frontier[position] = frontier[-1]
+                frontier.pop()
+                if candidate in taken:
+                    continue
+                touch = 0
+                for neighbour in around[candidate]:
+                    if neighbour in taken:
+                        touch += 1
+                if touch == 1:
+                    cell = candidate
+                    break
+            if cell is None:
+                return None
+            if base[cell] and cell not in group_of:
+                return None
+            ship.append(cell)
+            taken.add(cell)
+            frontier.extend(neighbour for neighbour in around[cell]
+                            if not blocked[neighbour] and neighbour not in taken)
+
+        # The ship covers all hits it touches and it isn't fully hit, otherwise it would be sunk
+        hits = 0
+        for cell in ship:
+            if cell in group_of:
+                hits += 1
+            for neighbour in around[cell]:
+                if neighbour in group_of and neighbour not in taken:
+                    return None
+        if hits >= size:
+            return None
+        return ship
+
+    def neighbours(self, cell):
+        """
+        Return indexes of fields surrounding the field
+
+        Parameters
+        ----------
+        cell : int
+            Index of the field (y * width + x)
+
+        Returns
+        -------
+        list
+        """
+
+        x = cell % self.width
+        result = []
+        if x > 0:
+            result.append(cell - 1)
+        if x + 1 < self.width:
+            result.append(cell + 1)
+        if cell >= self.width:
+            result.append(cell - self.width)
+        if cell + self.width < self.width * self.height:
+            result.append(cell + self.width)
+        return result
+
+
+# Computer players for each difficulty
+DIFFICULTIES = {
+    config.GAME_DIFFICULTY_EASY: RandomAI,
+    config.GAME_DIFFICULTY_NORMAL: HuntTargetAI,
+    config.GAME_DIFFICULTY_HARD: MonteCarloAI,
+}
@@ -0,0 +1,363 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Benchmarks of hot paths of the game for several sizes of game plan and fleet
+
+Every benchmark measures time of one operation (e.g. one attack), only the operation itself is timed,
+preparation of game plans is not. Saving doesn't wait for the disk (fsync), so its time doesn't depend
+on the storage device. Results can be stored as JSON baseline and later runs compared to it.
+
+Usage: python Benchmark.py --case 8x8:6:15 --case 100x100:60:200 --save-baseline baseline.json
+       python Benchmark.py --case 8x8:6:15 --case 100x100:60:200 --baseline baseline.json --threshold 0.2
+       python Benchmark.py --case 1000x1000:600:2000 --backend numpy
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import config
+from DataHandler import DataHandler
+from GameBuilder import GameBuilder
+from GameField import GameField
+from Simulator import play_game
+
+# Cases measured by default, PLAN_XxPLAN_Y:SHIPS:BLOCKS
+CASES = ['8x8:6:15', '32x32:20:60', '128x128:100:300']
+
+
+def parse_case(case):
+    """
+    Parse case of benchmark to settings
+
+    Parameters
+    ----------
+    case : str
+        Case in format PLAN_XxPLAN_Y:SHIPS:BLOCKS (e.g. 8x8:6:15)
+
+    Raises
+    ------
+    ValueError
+        If the case has invalid format
+
+    Returns
+    -------
+    dict
+        Values overriding default settings
+    """
+
+    size, ships, blocks = case.split(':')
+    plan_x, plan_y = size.split('x')
+    return {
+        config.GAME_PLAN_X_KEY: int(plan_x),
+        config.GAME_PLAN_Y_KEY: int(plan_y),
+        config.GAME_SHIP_KEY: int(ships),
+        config.GAME_SHIP_BLOCK_KEY: int(blocks),
+    }
+
+
+def create_template(settings, rng):
+    """
+    Create template of new game as MainMenu.start_game does
+
+    Parameters
+    ----------
+    settings : dict
+        Values overriding default settings
+    rng : random.Random
+        Source of randomness
+
+    Returns
+    -------
+    dict
+    """
+
+    builder = GameBuilder(rng)
+    builder.create_settings()
+    builder.create_initial_state()
+    builder.template[config.SETTINGS_KEY].update(settings)
+    builder.create_game_plan(config.HERO_KEY)
+    builder.create_game_plan(config.ENEMY_KEY)
+    return builder.template
+
+
+def bench_create_game_plan(settings, rng, count):
+    """
+    Create settings, state and both game plans of new game
+    """
+
+    start = time.perf_counter()
+    for i in range(count):
+        create_template(settings, rng)
+    return time.perf_counter() - start
+
+
+def bench_validate_field_state(settings, rng, count):
+    """
+    Validate whole game plan
+    """
+
+    field = GameField(config.HERO_KEY, DataHandler(None, create_template(settings, rng)))
+    start = time.perf_counter()
+    for i in range(count):
+        field.validate_field_state()
+    return time.perf_counter() - start
+
+
+def bench_count_ship(settings, rng, count):
+    """
+    Label and count ships of game plan
+    """
+
+    field = GameField(config.HERO_KEY, DataHandler(None, create_template(settings, rng)))
+    start = time.perf_counter()
+    for i in range(count):
+        field.count_ship()
+    return time.perf_counter() - start
+
+
+def bench_take_the_attack(settings, rng, count):
+    """
+    Attack one field, fields are attacked in random order, new game plan is prepared when all were attacked
+    """
+
+    template = create_template(settings, rng)
+    cells = [(x, y) for y in range(settings[config.GAME_PLAN_Y_KEY]) for x in range(settings[config.GAME_PLAN_X_KEY])]
+    duration = 0.0
+    while count > 0:
+        field = GameField(config.HERO_KEY, DataHandler(None, copy.deepcopy(template)))
+        rng.shuffle(cells)
+        attacks = cells[:count]
+        start = time.perf_counter()
+        for x, y in attacks:
+            field.take_the_attack(x, y)
+        duration += time.perf_counter() - start
+        count -= len(attacks)
+    return duration
+
+
+def bench_save(settings, rng, count):
+    """
+    Save game file without waiting for the disk
+    """
+
+    directory = tempfile.mkdtemp()
+    try:
+        dh = DataHandler(os.path.join(directory, config.GAME_FILE), create_template(settings, rng))
+        start = time.perf_counter()
+        for i in range(count):
+            dh.save(sync=False)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_load(settings, rng, count):
+    """
+    Load game file
+    """
+
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, config.GAME_FILE)
+        DataHandler(filename, create_template(settings, rng))
+        start = time.perf_counter()
+        for i in range(count):
+            DataHandler(filename)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_headless_game(settings, rng, count):
+    """
+    Play whole game of computer players without user interface, including creation of the game
+    """
+
+    players = {config.HERO_KEY: config.GAME_DIFFICULTY, config.ENEMY_KEY: config.GAME_DIFFICULTY}
+    seed = rng.random()
+    start = time.perf_counter()
+    for i in range(count):
+        play_game((i, seed, settings, players))
+    return time.perf_counter() - start
+
+
+# Benchmarks by name, each is called as benchmark(settings, rng, count) and returns seconds of `count` operations
+BENCHMARKS = {
+    'create_game_plan': bench_create_game_plan,
+    'validate_field_state': bench_validate_field_state,
+    'count_ship': bench_count_ship,
+    'take_the_attack': bench_take_the_attack,
+    'save': bench_save,
+    'load': bench_load,
+    'headless_game': bench_headless_game,
+}
+
+
+def measure(benchmark, settings, seed=0, repeat=5, min_time=0.2):
+    """
+    Measure time of one operation of the benchmark
+
+    Count of operations grows until one run takes at least `min_time`, then the run is repeated
+
+    Parameters
+    ----------
+    benchmark : callable
+        Function benchmark(settings, rng, count) returning seconds of `count` operations
+    settings : dict
+        Values overriding default settings
+    seed : int
+        Optional, seed of game plans
+    repeat : int
+        Optional, count of measured runs
+    min_time : float
+        Optional, minimal duration of one run in seconds
+
+    Returns
+    -------
+    dict
+        Median and minimum of seconds per operation and count of operations in one run
+    """
+
+    count = 1
+    while True:
+        duration = benchmark(settings, random.Random(seed), count)
+        if duration >= min_time:
+            break
+        count *= 2 if duration * 10 >= min_time else 10
+
+    times = [duration / count]
+    for i in range(repeat - 1):
+        times.append(benchmark(settings, random.Random(seed), count) / count)
+    return {'median': statistics.median(times), 'min': min(times), 'count': count}
+
+
+def run_benchmarks(cases, names=None, seed=0, repeat=5, min_time=0.2, output=sys.stdout, backend=config.GAME_BACKEND):
+    """
+    Measure benchmarks for all cases
+
+    Parameters
+    ----------
+    cases : list
+        Cases in format PLAN_XxPLAN_Y:SHIPS:BLOCKS
+    names : list
+        Optional, names of benchmarks (keys of BENCHMARKS), all by default
+    seed : int
+        Optional, seed of game plans
+    repeat : int
+        Optional, count of measured runs
+    min_time : float
+        Optional, minimal duration of one run in seconds
+    output : file
+        Optional, file for progress, nothing is printed if it is None
+    backend : str
+        Optional, backend of game plans, one of config.GAME_BACKEND_*
+
+    Returns
+    -------
+    dict
+        Result of measure() for each key 'benchmark@case@backend'
+    """
+
+    results = {}
+    for case in cases:
+        settings = parse_case(case)
+        settings[config.GAME_BACKEND_KEY] = backend
+        for name in names or BENCHMARKS:
+            key = '{}@{}@{}'.format(name, case, backend)
+            result = measure(BENCHMARKS[name], settings, seed, repeat, min_time)
+            results[key] = result
+            if output is not None:
+                print('{:<44} {:>12.3f} us {:>12.3f} us (min)'.format(
+                    key, result['median'] * 1e6, result['min'] * 1e6), file=output)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Find benchmarks slower than the baseline
+
+    Parameters
+    ----------
+    results : dict
+        Results returned by run_benchmarks()
+    baseline : dict
+        Results of earlier run
+    threshold : float
+        Allowed slowdown as fraction (0.2 is 20 %)
+
+    Returns
+    -------
+    list
+        List of (key, baseline, current) of slower benchmarks, times are medians in seconds
+    """
+
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key in baseline and result['median'] > baseline[key]['median'] * (1 + threshold):
+            regressions.append((key, baseline[key]['median'], result['median']))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run benchmarks from command line
+
+    Exit code is 1 if any benchmark is slower than the baseline
+
+    Parameters
+    ----------
+    argv : list
+        Optional, command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description='Benchmarks of hot paths of the game')
+    parser.add_argument('--case', action='append', default=None,
+                        help='size of game plan and fleet PLAN_XxPLAN_Y:SHIPS:BLOCKS, may be repeated '
+                             '(default: {})'.format(' '.join(CASES)))
+    parser.add_argument('--benchmark', action='append', default=None, choices=sorted(BENCHMARKS),
+                        help='benchmark to run, may be repeated (default: all)')
+    parser.add_argument('--backend', default=config.GAME_BACKEND, help='backend of game plans')
+    parser.add_argument('--seed', type=int, default=0, help='seed of game plans')
+    parser.add_argument('--repeat', type=int, default=5, help='count of measured runs')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimal duration of one run in seconds')
+    parser.add_argument('--save-baseline', default=None, help='file for results used as baseline')
+    parser.add_argument('--baseline', default=None, help='file with baseline results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    cases = args.case or CASES
+    for case in cases:
+        try:
+            parse_case(case)
+        except ValueError:
+            parser.error('invalid case {}'.format(case))
+
+    results = run_benchmarks(cases, args.benchmark, args.seed, args.repeat, args.min_time, backend=args.backend)
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({'python': platform.python_version(), 'results': results}, file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for key, before, after in regressions:
+            print('REGRESSION {}: {:.3f} us -> {:.3f} us ({:+.1%})'.format(
+                key, before * 1e6, after * 1e6, after / before - 1), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,571 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Compact binary format of game file
+
+File starts with fixed header with settings and state of the game, followed by game plans of hero and enemy.
+Each field of game plan takes 2 bits (field on x, y is at position y * plan_x + x, four fields in one byte).
+File is memory-mapped, so fields are read lazily and attacks patch single bytes in place.
+
+Usage as converter between JSON and binary game file:
+    python BinaryFormat.py input_file output_file
+"""
+
+import json
+import mmap
+import struct
+import sys
+
+import config
+from BitBoard import BitBoard, BitBoardRow, popcount
+
+# Identification of binary game file
+MAGIC = b'BSHP'
+VERSION = 1
+
+# magic, version, mode, backend, player, state, difficulty, plan_x, plan_y, ship, block, step
+# Difficulty takes former padding byte, so files without it are read with the first difficulty
+HEADER = struct.Struct('<4sBBBBBB2xIIIII')
+STATE_OFFSET = 7
+STATE = struct.Struct('<BB')
+STEP_OFFSET = 28
+STEP = struct.Struct('<I')
+
+# Values stored in header as indexes to these lists
+MODES = [config.GAME_MODE_SINGLE, config.GAME_MODE_MULTI]
+GAME_BACKENDS = [config.GAME_BACKEND_LIST, config.GAME_BACKEND_BITS, config.GAME_BACKEND_NUMPY]
+DIFFICULTIES = [config.GAME_DIFFICULTY_EASY, config.GAME_DIFFICULTY_NORMAL, config.GAME_DIFFICULTY_HARD]
+PLAYERS = [config.HERO_KEY, config.ENEMY_KEY]
+STATES = [config.GAME_STATE_ACTIVE, config.GAME_STATE_FINISH]
+FIELDS = [config.HERO_KEY, config.ENEMY_KEY]
+# Identifiers of 4 fields packed in each byte value
+QUADS = [bytes((byte & 3, byte >> 2 & 3, byte >> 4 & 3, byte >> 6 & 3)) for byte in range(256)]
+
+
+def is_binary(filename):
+    """
+    Check if the file is binary game file
+
+    Parameters
+    ----------
+    filename : str
+        Name of file
+
+    Returns
+    -------
+    bool
+        False also if the file can't be read or `filename` is None
+    """
+
+    if filename is None:
+        return False
+
+    try:
+        with open(filename, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def plane_size(plan_x, plan_y):
+    """
+    Return number of bytes of one game plan
+
+    Parameters
+    ----------
+    plan_x : int
+        Number of columns
+    plan_y : int
+        Number of rows
+
+    Returns
+    -------
+    int
+    """
+
+    return (plan_x * plan_y + 3) // 4
+
+
+def encode(data):
+    """
+    Encode game data to binary game file content
+
+    Parameters
+    ----------
+    data : dict
+        Data of game file as in JSON game file
+
+    Returns
+    -------
+    bytes
+    """
+
+    settings = data[config.SETTINGS_KEY]
+    state = data[config.STATE_KEY]
+    plan_x = settings[config.GAME_PLAN_X_KEY]
+    plan_y = settings[config.GAME_PLAN_Y_KEY]
+
+    content = bytearray(HEADER.size + 2 * plane_size(plan_x, plan_y))
+    HEADER.pack_into(content, 0, MAGIC, VERSION,
+                     MODES.index(settings[config.GAME_MODE_KEY]),
+                     GAME_BACKENDS.index(settings.get(config.GAME_BACKEND_KEY, config.GAME_BACKEND)),
+                     PLAYERS.index(state[config.ACTUAL_PLAYER_KEY]),
+                     STATES.index(state[config.GAME_STATE_KEY]),
+                     DIFFICULTIES.index(settings.get(config.GAME_DIFFICULTY_KEY, config.GAME_DIFFICULTY)),
+                     plan_x, plan_y, settings[config.GAME_SHIP_KEY], settings[config.GAME_SHIP_BLOCK_KEY],
+                     state[config.STEP_KEY])
+
+    for i, name in enumerate(FIELDS):
+        field = PackedField(plan_x, plan_y, content, HEADER.size + i * plane_size(plan_x, plan_y))
+        field.assign(data[name])
+    return bytes(content)
+
+
+def decode(buffer):
+    """
+    Decode binary game file content to game data, game plans are views of the buffer
+
+    Parameters
+    ----------
+    buffer : bytes | bytearray | mmap.mmap
+        Content of binary game file
+
+    Raises
+    ------
+    ValueError
+        If the content is not binary game file of supported version
+
+    Returns
+    -------
+    dict
+        Data of game file as in JSON game file
+    """
+
+    magic, version, mode, backend, player, state, difficulty, plan_x, plan_y, ship, block, step = \
+        HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Unsupported game file')
+
+    data = {
+        config.SETTINGS_KEY: {
+            config.GAME_PLAN_X_KEY: plan_x,
+            config.GAME_PLAN_Y_KEY: plan_y,
+            config.GAME_SHIP_KEY: ship,
+            config.GAME_SHIP_BLOCK_KEY: block,
+            config.GAME_MODE_KEY: MODES[mode],
+            config.GAME_BACKEND_KEY: GAME_BACKENDS[backend],
+            config.GAME_DIFFICULTY_KEY: DIFFICULTIES[difficulty],
+        },
+        config.STATE_KEY: {
+            config.ACTUAL_PLAYER_KEY: PLAYERS[player],
+            config.STEP_KEY: step,
+            config.GAME_STATE_KEY: STATES[state],
+        },
+    }
+    for i, name in enumerate(FIELDS):
+        data[name] = PackedField(plan_x, plan_y, buffer, HEADER.size + i * plane_size(plan_x, plan_y))
+    return data
+
+
+def json_to_binary(source, target):
+    """
+    Convert JSON game file to binary game file
+
+    Parameters
+    ----------
+    source : str
+        Name of JSON game file
+    target : str
+        Name of binary game file
+    """
+
+    # DataHandler reads binary game files, so it can't be imported before this module is loaded
+    from DataHandler import write_atomic
+
+    with open(source, 'r') as file:
+        data = json.loads(file.read())
+
+    write_atomic(target, encode(data))
+
+
+def binary_to_json(source, target):
+    """
+    Convert binary game file to JSON game file
+
+    Parameters
+    ----------
+    source : str
+        Name of binary game file
+    target : str
+        Name of JSON game file
+    """
+
+    from DataHandler import write_atomic
+
+    with open(source, 'rb') as file:
+        data = decode(file.read())
+
+    for name in FIELDS:
+        data[name] = data[name].to_list()
+
+    write_atomic(target, json.dumps(data))
+
+
+class PackedField:
+    """
+    Game plan stored in 2 bits per field in provided buffer
+
+    Implements same interface as BitBoard, so it can be used as game plan of GameField.
+
+
+    Attributes
+    ----------
+    width : int
+        Number of columns
+    height : int
+        Number of rows
+    buffer : bytearray | mmap.mmap
+        Buffer with game plan
+    offset : int
+        Position of game plan in the buffer
+    size : int
+        Number of bytes of game plan
+
+    Methods
+    -------
+    get(x, y)
+        Return identifier of field on x, y
+    row(y, start, stop)
+        Return identifiers of fields of the row
+    set(x, y, value)
+        Set identifier of field on x, y
+    assign(field)
+        Write whole game plan to the buffer
+    to_list()
+        Return game plan represented as list of lists
+    copy()
+        Return copy of the game plan in its own buffer
+    as_int()
+        Return game plan as one integer
+    count_changes(other)
+        Return number of fields which differ from the other game plan
+    label_ships()
+        Label all ships in the game plan
+    """
+
+    def __init__(self, width, height, buffer, offset=0):
+        """
+        Constructor of PackedField class
+
+        Parameters
+        ----------
+        width : int
+            Number of columns
+        height : int
+            Number of rows
+        buffer : bytearray | mmap.mmap
+            Buffer with game plan
+        offset : int
+            Optional, position of game plan in the buffer
+        """
+
+        self.width = width
+        self.height = height
+        self.buffer = buffer
+        self.offset = offset
+        self.size = plane_size(width, height)
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return BitBoardRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield BitBoardRow(self, y)
+
+    def get(self, x, y):
+        """
+        Return identifier of field on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+
+        Returns
+        -------
+        int
+        """
+
+        index = y * self.width + x
+        return (self.buffer[self.offset + index // 4] >> (index % 4 * 2)) & 3
+
+    def row(self, y, start=0, stop=None):
+        """
+        Return identifiers of fields of the row from `start` to `stop`, bytes of the row are unpacked at once
+
+        Parameters
+        ----------
+        y : int
+            Y coortinate of the row
+        start : int
+            Optional, X coortinate of the first field
+        stop : int
+            Optional, X coortinate after the last field, end of the row by default
+
+        Returns
+        -------
+        list
+        """
+
+        if stop is None:
+            stop = self.width
+        if stop <= start:
+            return []
+
+        first = y * self.width + start
+        last = y * self.width + stop
+        chunk = self.buffer[self.offset + first // 4:self.offset + (last + 3) // 4]
+        skip = first % 4
+        return list(b''.join(map(QUADS.__getitem__, chunk))[skip:skip + stop - start])
+
+    def set(self, x, y, value):
+        """
+        Set identifier of field on x, y, only one byte of the buffer is changed
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            One of config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS
+        """
+
+        if value not in (config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS):
+            raise ValueError(value)
+
+        index = y * self.width + x
+        position = self.offset + index // 4
+        shift = index % 4 * 2
+        self.buffer[position] = (self.buffer[position] & ~(3 << shift)) | (value << shift)
+
+    def assign(self, field):
+        """
+        Write whole game plan to the buffer
+
+        Parameters
+        ----------
+        field : list | BitBoard
+            Game plan indexed as field[y][x]
+        """
+
+        plane = bytearray(self.size)
+        index = 0
+        for row in field:
+            for value in row:
+                plane[index // 4] |= int(value) << (index % 4 * 2)
+                index += 1
+        self.buffer[self.offset:self.offset + self.size] = plane
+
+    def to_list(self):
+        """
+        Return game plan represented as list of lists
+
+        Returns
+        -------
+        list
+            Game plan indexed as field[y][x]
+        """
+
+        return [list(row) for row in self]
+
+    def copy(self):
+        """
+        Return copy of the game plan in its own buffer
+
+        Returns
+        -------
+        PackedField
+        """
+
+        return PackedField(self.width, self.height, bytearray(self.buffer[self.offset:self.offset + self.size]))
+
+    def as_int(self):
+        """
+        Return game plan as one integer (2 bits per field)
+
+        Returns
+        -------
+        int
+        """
+
+        return int.from_bytes(self.buffer[self.offset:self.offset + self.size], 'little')
+
+    def count_changes(self, other):
+        """
+        Return number of fields which differ from the other game plan
+
+        Parameters
+        ----------
+        other : PackedField
+            Game plan of same dimensions
+
+        Returns
+        -------
+        int
+        """
+
+        diff = self.as_int() ^ other.as_int()
+        low_bits = int.from_bytes(b'\x55' * self.size, 'little')
+        return popcount((diff | (diff >> 1)) & low_bits)
+
+    def label_ships(self):
+        """
+        Label all ships in the game plan
+
+        Result has the same format as label_ships() in GameField.
+
+        Returns
+        -------
+        ship_map : dict
+            Id of the ship for (x, y) coordinates of each ship part
+        ship_cells : list
+            List of (x, y) coordinates of parts of each ship
+        ship_hits : list
+            Count of hit parts of each ship
+        """
+
+        return BitBoard.from_list(self.to_list()).label_ships()
+
+
+class BinaryGame:
+    """
+    Memory-mapped binary game file
+
+
+    Attributes
+    ----------
+    filename : str
+        Name of the file
+    file : file
+        Opened file
+    map : mmap.mmap
+        Memory map of the file
+    source : dict
+        Data of the game, game plans are views of the memory map
+
+    Methods
+    -------
+    create(filename, data)
+        Create binary game file and open it
+    write_state(state)
+        Patch game state in the header
+    write_field(name, field)
+        Write whole game plan
+    flush()
+        Flush changes of the memory map to the file
+    close()
+        Close the file
+    """
+
+    def __init__(self, filename):
+        """
+        Constructor of BinaryGame class, maps existing binary game file
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file
+        """
+
+        self.filename = filename
+        self.file = open(filename, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.source = decode(self.map)
+
+    @staticmethod
+    def create(filename, data):
+        """
+        Create binary game file and open it, existing file is replaced at once
+
+        Parameters
+        ----------
+        filename : str
+            Name of the file
+        data : dict
+            Data of game file as in JSON game file
+
+        Returns
+        -------
+        BinaryGame
+        """
+
+        from DataHandler import write_atomic
+
+        write_atomic(filename, encode(data))
+        return BinaryGame(filename)
+
+    def write_state(self, state):
+        """
+        Patch game state in the header
+
+        Parameters
+        ----------
+        state : dict
+            Game state section
+        """
+
+        STATE.pack_into(self.map, STATE_OFFSET, PLAYERS.index(state[config.ACTUAL_PLAYER_KEY]),
+                        STATES.index(state[config.GAME_STATE_KEY]))
+        STEP.pack_into(self.map, STEP_OFFSET, state[config.STEP_KEY])
+
+    def write_field(self, name, field):
+        """
+        Write whole game plan
+
+        Parameters
+        ----------
+        name : str
+            Key of game plan
+        field : list | BitBoard
+            Game plan indexed as field[y][x]
+        """
+
+        if field is not self.source[name]:
+            self.source[name].assign(field)
+
+    def flush(self):
+        """
+        Flush changes of the memory map to the file
+        """
+
+        self.map.flush()
+
+    def close(self):
+        """
+        Close the file
+        """
+
+        self.map.close()
+        self.file.close()
+
+
+# Driver code for converter
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print('Usage: python BinaryFormat.py input_file output_file')
+        sys.exit(1)
+
+    if is_binary(sys.argv[1]):
+        binary_to_json(sys.argv[1], sys.argv[2])
+    else:
+        json_to_binary(sys.argv[1], sys.argv[2])
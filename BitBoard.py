@@ -0,0 +1,436 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Compact representation of game field in integer bitmasks
+"""
+
+import config
+
+
+def popcount(mask):
+    """
+    Return number of set bits in the mask
+
+    Parameters
+    ----------
+    mask : int
+        Non-negative bitmask
+
+    Returns
+    -------
+    int
+    """
+
+    return bin(mask).count('1')
+
+
+# Identifiers of fields for hexadecimal digits ship + 2 * hit + 4 * miss, see BitBoard.row
+ROW_DIGITS = bytes.maketrans(b'0134', bytes((config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS)))
+
+
+class BitBoardRow:
+    """
+    View of one row of the BitBoard, so the board can be used as field[y][x]
+
+
+    Attributes
+    ----------
+    board : BitBoard
+        Board of the row
+    y : int
+        Index of the row
+    """
+
+    def __init__(self, board, y):
+        """
+        Constructor of BitBoardRow class
+
+        Parameters
+        ----------
+        board : BitBoard
+            Board of the row
+        y : int
+            Index of the row
+        """
+
+        self.board = board
+        self.y = y
+
+    def __len__(self):
+        return self.board.width
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            start, stop, step = x.indices(self.board.width)
+            if step == 1:
+                return self.board.row(self.y, start, stop)
+            return [self.board.get(i, self.y) for i in range(start, stop, step)]
+        if not 0 <= x < self.board.width:
+            raise IndexError(x)
+        return self.board.get(x, self.y)
+
+    def __setitem__(self, x, value):
+        if not 0 <= x < self.board.width:
+            raise IndexError(x)
+        self.board.set(x, self.y, value)
+
+    def __iter__(self):
+        return iter(self.board.row(self.y))
+
+
+class BitBoard:
+    """
+    Game field stored as three layers of bitmasks
+
+    Field on x, y is represented by bit y * stride + x. Rows are separated by one padding bit,
+    so shifts to the neighbours never overflow to the next row.
+
+
+    Attributes
+    ----------
+    width : int
+        Number of columns
+    height : int
+        Number of rows
+    stride : int
+        Number of bits used by one row
+    mask : int
+        Bits of all fields in the board
+    ship : int
+        Fields with part of a ship, live or hit
+    hit : int
+        Fields with hit part of a ship
+    miss : int
+        Attacked fields without ship
+
+    Methods
+    -------
+    from_list(field)
+        Create board from game plan represented as list of lists
+    to_list()
+        Return game plan represented as list of lists
+    copy()
+        Return copy of the board
+    get(x, y)
+        Return identifier of field on x, y
+    row(y, start, stop)
+        Return identifiers of fields of the row
+    set(x, y, value)
+        Set identifier of field on x, y
+    bit(x, y)
+        Return bit of field on x, y
+    cells(mask)
+        Return (x, y) coordinates of all fields in the mask
+    neighbours(mask)
+        Return fields surrounding fields in the mask
+    changes(other)
+        Return mask of fields which differ from the other board
+    count_changes(other)
+        Return number of fields which differ from the other board
+    label_ships()
+        Label all ships in the board
+    """
+
+    def __init__(self, width, height):
+        """
+        Constructor of BitBoard class, creates board full of watter
+
+        Parameters
+        ----------
+        width : int
+            Number of columns
+        height : int
+            Number of rows
+        """
+
+        self.width = width
+        self.height = height
+        self.stride = width + 1
+        row = (1 << width) - 1
+        self.mask = 0
+        for y in range(height):
+            self.mask |= row << (y * self.stride)
+        self.ship = 0
+        self.hit = 0
+        self.miss = 0
+
+    @staticmethod
+    def from_list(field):
+        """
+        Create board from game plan represented as list of lists
+
+        Parameters
+        ----------
+        field : list
+            Game plan indexed as field[y][x]
+
+        Returns
+        -------
+        BitBoard
+        """
+
+        board = BitBoard(len(field[0]) if field else 0, len(field))
+        for y, row in enumerate(field):
+            for x, value in enumerate(row):
+                if value != config.IS_WATTER:
+                    board.set(x, y, value)
+        return board
+
+    def to_list(self):
+        """
+        Return game plan represented as list of lists
+
+        Returns
+        -------
+        list
+            Game plan indexed as field[y][x]
+        """
+
+        return [list(row) for row in self]
+
+    def copy(self):
+        """
+        Return copy of the board
+
+        Returns
+        -------
+        BitBoard
+        """
+
+        board = BitBoard.__new__(BitBoard)
+        board.__dict__.update(self.__dict__)
+        return board
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+        return BitBoardRow(self, y)
+
+    def __iter__(self):
+        for y in range(self.height):
+            yield BitBoardRow(self, y)
+
+    def bit(self, x, y):
+        """
+        Return bit of field on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+
+        Returns
+        -------
+        int
+        """
+
+        return 1 << (y * self.stride + x)
+
+    def get(self, x, y):
+        """
+        Return identifier of field on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+
+        Returns
+        -------
+        int
+            One of config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS
+        """
+
+        bit = self.bit(x, y)
+        if self.hit & bit:
+            return config.IS_HIT
+        if self.miss & bit:
+            return config.IS_MISS
+        if self.ship & bit:
+            return config.IS_SHIP
+        return config.IS_WATTER
+
+    def row(self, y, start=0, stop=None):
+        """
+        Return identifiers of fields of the row from `start` to `stop`
+
+        Bits of the row are read from each layer at once and spread to one hexadecimal digit per field,
+        so the row is built without reading fields one by one
+
+        Parameters
+        ----------
+        y : int
+            Y coortinate of the row
+        start : int
+            Optional, X coortinate of the first field
+        stop : int
+            Optional, X coortinate after the last field, end of the row by default
+
+        Returns
+        -------
+        list
+            Identifiers of fields, config.IS_WATTER, config.IS_SHIP, config.IS_HIT or config.IS_MISS
+        """
+
+        if stop is None:
+            stop = self.width
+        count = stop - start
+        if count <= 0:
+            return []
+
+        shift = y * self.stride + start
+        mask = (1 << count) - 1
+        digits = 0
+        for layer, weight in ((self.ship, 1), (self.hit, 2), (self.miss, 4)):
+            bits = (layer >> shift) & mask
+            if bits:
+                digits += weight * int(format(bits, '0{}b'.format(count))[::-1], 16)
+        return list(format(digits, '0{}x'.format(count)).encode().translate(ROW_DIGITS))
+
+    def set(self, x, y, value):
+        """
+        Set identifier of field on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            One of config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS
+        """
+
+        if value not in (config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS):
+            raise ValueError(value)
+
+        bit = self.bit(x, y)
+        self.ship &= ~bit
+        self.hit &= ~bit
+        self.miss &= ~bit
+
+        if value in (config.IS_SHIP, config.IS_HIT):
+            self.ship |= bit
+        if value == config.IS_HIT:
+            self.hit |= bit
+        elif value == config.IS_MISS:
+            self.miss |= bit
+
+    def cells(self, mask):
+        """
+        Return (x, y) coordinates of all fields in the mask
+
+        Parameters
+        ----------
+        mask : int
+            Mask of fields
+
+        Returns
+        -------
+        list
+        """
+
+        result = []
+        while mask:
+            low = mask & -mask
+            index = low.bit_length() - 1
+            result.append((index % self.stride, index // self.stride))
+            mask ^= low
+        return result
+
+    def neighbours(self, mask):
+        """
+        Return fields surrounding fields in the mask
+
+        Parameters
+        ----------
+        mask : int
+            Mask of fields
+
+        Returns
+        -------
+        int
+            Mask of fields next to any field in the mask, without fields of the mask
+        """
+
+        around = (mask << 1) | (mask >> 1) | (mask << self.stride) | (mask >> self.stride)
+        return around & self.mask & ~mask
+
+    def changes(self, other):
+        """
+        Return mask of fields which differ from the other board
+
+        Parameters
+        ----------
+        other : BitBoard
+            Board of same dimensions
+
+        Returns
+        -------
+        int
+        """
+
+        return (self.ship ^ other.ship) | (self.hit ^ other.hit) | (self.miss ^ other.miss)
+
+    def count_changes(self, other):
+        """
+        Return number of fields which differ from the other board
+
+        Parameters
+        ----------
+        other : BitBoard
+            Board of same dimensions
+
+        Returns
+        -------
+        int
+        """
+
+        return popcount(self.changes(other))
+
+    def label_ships(self):
+        """
+        Label all ships in the board
+
+        Every ship is grown from its first part by bit operations until it stops changing.
+        Result has the same format as label_ships() in GameField.
+
+        Returns
+        -------
+        ship_map : dict
+            Id of the ship for (x, y) coordinates of each ship part
+        ship_cells : list
+            List of (x, y) coordinates of parts of each ship
+        ship_hits : list
+            Count of hit parts of each ship
+        """
+
+        ship_map = {}
+        ship_cells = []
+        ship_hits = []
+
+        remaining = self.ship
+        while remaining:
+            ship = remaining & -remaining
+            while True:
+                grown = (ship | self.neighbours(ship)) & self.ship
+                if grown == ship:
+                    break
+                ship = grown
+            remaining &= ~ship
+
+            cells = self.cells(ship)
+            for cell in cells:
+                ship_map[cell] = len(ship_cells)
+            ship_cells.append(cells)
+            ship_hits.append(popcount(ship & self.hit))
+
+        return ship_map, ship_cells, ship_hits
@@ -0,0 +1,410 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Scrollable and zoomable view of one game plan in canvas
+"""
+
+import math
+import tkinter
+
+import config
+
+# Rank of each value of the field by config.UI_IMAGE_PRIORITY as translation table of bytes
+RANK_TABLE = bytes(config.UI_IMAGE_PRIORITY.index(value) if value in config.UI_IMAGE_PRIORITY else 0
+                   for value in range(256))
+
+
+def row_ranks(values, start, count):
+    """
+    Return ranks of `count` fields of the row from `start` by config.UI_IMAGE_PRIORITY
+
+    Parameters
+    ----------
+    values : list | numpy.ndarray | BitBoardRow
+        Row of game plan, rows of all backends can be sliced
+    start : int
+        X coortinate of the first field
+    count : int
+        Count of fields
+
+    Returns
+    -------
+    bytes
+        Rank of each field
+    """
+
+    return bytes(values[start:start + count]).translate(RANK_TABLE)
+
+
+class BoardView:
+    """
+    Scrollable and zoomable view of one game plan in rectangular part of canvas
+
+    Only visible fields are drawn, so size of game plan doesn't affect count of canvas items.
+    While fields are large enough, each visible field is one rectangle, rectangles are reused while scrolling.
+    When zoomed out, visible part of game plan is drawn to one image with one pixel per field
+    (or per block of several fields, the pixel shows the field with the highest config.UI_IMAGE_PRIORITY),
+    attacks change single pixels of the image.
+
+
+    Attributes
+    ----------
+    canvas : tkinter.Canvas
+        Canvas of the view
+    dh : DataHandler
+        Global data handler
+    name : str
+        Name of displayed game plan
+    position : str
+        Name of UI component, selects colors of fields
+    left : int
+        X position of left top corner in canvas
+    top : int
+        Y position of left top corner in canvas
+    width : int
+        Width of the view in pixels
+    height : int
+        Height of the view in pixels
+    plan_x : int
+        Number of columns of game plan
+    plan_y : int
+        Number of rows of game plan
+    tag : str
+        Tag of all canvas items of the view
+    zoom_level : int
+        Index to config.UI_ZOOM_LEVELS
+    offset_x : int
+        X coortinate of the first visible field
+    offset_y : int
+        Y coortinate of the first visible field
+    slots : dict
+        Id of rectangle for (column, row) position in the view
+    colors : dict
+        Displayed color for (column, row) position in the view
+    image : tkinter.PhotoImage | None
+        Image of visible part of game plan when zoomed out
+    image_item : int | None
+        Id of canvas item with the image
+
+    Methods
+    -------
+    pitch()
+        Return distance of neighbouring fields in pixels
+    visible()
+        Return count of visible columns and rows
+    paint()
+        Paint visible part of game plan
+    paint_cell(x, y, value)
+        Repaint one field if it is visible
+    paint_slots()
+        Paint visible fields as rectangles
+    paint_image()
+        Paint visible fields to the image
+    clear()
+        Delete all canvas items of the view
+    contains(x, y)
+        Check if the position in canvas is in the view
+    field_index(x, y)
+        Return coordinates of the field on x, y position in canvas
+    scroll(dx, dy)
+        Move the view by provided count of pixels
+    zoom(step, x, y)
+        Change zoom level, field under x, y position in canvas stays in place
+    """
+
+    def __init__(self, canvas, dh, name, position, left, top, tag):
+        """
+        Constructor of BoardView class
+
+        Parameters
+        ----------
+        canvas : tkinter.Canvas
+            Canvas of the view
+        dh : DataHandler
+            Global data handler
+        name : str
+            Name of displayed game plan
+        position : str
+            Name of UI component
+        left : int
+            X position of left top corner in canvas
+        top : int
+            Y position of left top corner in canvas
+        tag : str
+            Tag of all canvas items of the view
+        """
+
+        settings = dh.get_data(config.SETTINGS_KEY)
+        self.canvas = canvas
+        self.dh = dh
+        self.name = name
+        self.position = position
+        self.left = left
+        self.top = top
+        self.plan_x = settings[config.GAME_PLAN_X_KEY]
+        self.plan_y = settings[config.GAME_PLAN_Y_KEY]
+        self.width = min(config.UI_BOARD_VIEW_WIDTH, self.plan_x * config.UI_ZOOM_LEVELS[0])
+        self.height = min(config.UI_BOARD_VIEW_HEIGHT, self.plan_y * config.UI_ZOOM_LEVELS[0])
+        self.tag = tag
+        self.zoom_level = 0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.slots = {}
+        self.colors = {}
+        self.image = None
+        self.image_item = None
+
+    def pitch(self):
+        """
+        Return distance of neighbouring fields in pixels
+
+        Returns
+        -------
+        float
+        """
+
+        return config.UI_ZOOM_LEVELS[self.zoom_level]
+
+    def visible(self):
+        """
+        Return count of visible columns and rows
+
+        Returns
+        -------
+        columns : int
+        rows : int
+        """
+
+        pitch = self.pitch()
+        return min(self.plan_x, math.ceil(self.width / pitch)), min(self.plan_y, math.ceil(self.height / pitch))
+
+    def paint(self):
+        """
+        Paint visible part of game plan
+        """
+
+        if self.pitch() >= config.UI_IMAGE_PITCH:
+            self.paint_slots()
+        else:
+            self.paint_image()
+
+    def paint_cell(self, x, y, value):
+        """
+        Repaint one field if it is visible
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            Value of the field in game plan
+        """
+
+        color = config.UI_DISPLAY_MAP[self.position][value]
+        pitch = self.pitch()
+
+        if pitch >= config.UI_IMAGE_PITCH:
+            slot = (x - self.offset_x, y - self.offset_y)
+            if slot in self.slots and self.colors[slot] != color:
+                self.canvas.itemconfig(self.slots[slot], fill=color)
+                self.colors[slot] = color
+            return
+
+        step = max(1, round(1 / pitch))
+        size = max(1, int(pitch))
+        column, row = x - self.offset_x, y - self.offset_y
+        columns, rows = self.visible()
+        if self.image is None or not 0 <= column < columns or not 0 <= row < rows:
+            return
+
+        if step > 1:
+            # Pixel is repainted from the whole block of fields
+            column -= column % step
+            row -= row % step
+            field = self.dh.get_data(self.name)
+            rank = max(max(row_ranks(field[self.offset_y + block_row], self.offset_x + column,
+                                     min(step, columns - column)))
+                       for block_row in range(row, min(row + step, rows)))
+            color = config.UI_DISPLAY_MAP[self.position][config.UI_IMAGE_PRIORITY[rank]]
+
+        column //= step
+        row //= step
+        self.image.put(color, to=(column * size, row * size, (column + 1) * size, (row + 1) * size))
+
+    def paint_slots(self):
+        """
+        Paint visible fields as rectangles
+
+        Rectangles are created for the zoom level once, scrolling only recolors them
+        """
+
+        if self.image_item is not None:
+            self.clear()
+
+        pitch = self.pitch()
+        columns, rows = self.visible()
+        field = self.dh.get_data(self.name)
+        if not self.slots:
+            padding = config.BLOCK_PADDING * pitch // config.UI_ZOOM_LEVELS[0]
+            for row in range(rows):
+                y1 = self.top + pitch * row
+                for column in range(columns):
+                    x1 = self.left + pitch * column
+                    color = config.UI_DISPLAY_MAP[self.position][field[self.offset_y + row][self.offset_x + column]]
+                    self.slots[(column, row)] = self.canvas.create_rectangle(
+                        x1, y1, x1 + pitch - padding, y1 + pitch - padding, tags=self.tag, fill=color)
+                    self.colors[(column, row)] = color
+            return
+
+        for row in range(rows):
+            values = field[self.offset_y + row]
+            for column in range(columns):
+                color = config.UI_DISPLAY_MAP[self.position][values[self.offset_x + column]]
+                if self.colors[(column, row)] != color:
+                    self.canvas.itemconfig(self.slots[(column, row)], fill=color)
+                    self.colors[(column, row)] = color
+
+    def paint_image(self):
+        """
+        Paint visible fields to the image
+
+        Each pixel shows the field with the highest priority of `step` x `step` block,
+        each field takes `size` x `size` pixels
+        """
+
+        if self.slots:
+            self.clear()
+
+        pitch = self.pitch()
+        step = max(1, round(1 / pitch))
+        size = max(1, int(pitch))
+        columns, rows = self.visible()
+        field = self.dh.get_data(self.name)
+        colors = [config.UI_DISPLAY_MAP[self.position][value] for value in config.UI_IMAGE_PRIORITY]
+
+        data = []
+        for row in range(0, rows, step):
+            ranks = row_ranks(field[self.offset_y + row], self.offset_x, columns)
+            for block_row in range(row + 1, min(row + step, rows)):
+                ranks = bytes(map(max, ranks, row_ranks(field[self.offset_y + block_row], self.offset_x, columns)))
+            if step > 1:
+                ranks = bytes(max(ranks[column:column + step]) for column in range(0, columns, step))
+            data.append('{' + ' '.join(colors[rank] for rank in ranks) + '}')
+
+        image = tkinter.PhotoImage(master=self.canvas, width=math.ceil(columns / step),
+                                   height=math.ceil(rows / step))
+        image.put(' '.join(data), to=(0, 0))
+        if size > 1:
+            image = image.zoom(size)
+
+        self.image = image
+        if self.image_item is None:
+            self.image_item = self.canvas.create_image(self.left, self.top, image=image, anchor='nw', tags=self.tag)
+        else:
+            self.canvas.itemconfig(self.image_item, image=image)
+
+    def clear(self):
+        """
+        Delete all canvas items of the view
+        """
+
+        for item in self.slots.values():
+            self.canvas.delete(item)
+        self.slots = {}
+        self.colors = {}
+
+        if self.image_item is not None:
+            self.canvas.delete(self.image_item)
+        self.image = None
+        self.image_item = None
+
+    def contains(self, x, y):
+        """
+        Check if the position in canvas is in the view
+
+        Parameters
+        ----------
+        x : int
+            X position in canvas
+        y : int
+            Y position in canvas
+
+        Returns
+        -------
+        bool
+        """
+
+        return self.left <= x < self.left + self.width and self.top <= y < self.top + self.height
+
+    def field_index(self, x, y):
+        """
+        Return coordinates of the field on x, y position in canvas
+
+        Parameters
+        ----------
+        x : int
+            X position in canvas
+        y : int
+            Y position in canvas
+
+        Returns
+        -------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        pitch = self.pitch()
+        return self.offset_x + int((x - self.left) // pitch), self.offset_y + int((y - self.top) // pitch)
+
+    def scroll(self, dx, dy):
+        """
+        Move the view by provided count of pixels
+
+        Parameters
+        ----------
+        dx : int
+            Horizontal move in pixels
+        dy : int
+            Vertical move in pixels
+        """
+
+        pitch = self.pitch()
+        columns, rows = self.visible()
+        offset_x = min(max(0, self.offset_x + int(dx / pitch)), self.plan_x - columns)
+        offset_y = min(max(0, self.offset_y + int(dy / pitch)), self.plan_y - rows)
+        if (offset_x, offset_y) != (self.offset_x, self.offset_y):
+            self.offset_x = offset_x
+            self.offset_y = offset_y
+            self.paint()
+
+    def zoom(self, step, x, y):
+        """
+        Change zoom level, field under x, y position in canvas stays in place
+
+        Parameters
+        ----------
+        step : int
+            Positive value zooms out, negative zooms in
+        x : int
+            X position in canvas
+        y : int
+            Y position in canvas
+        """
+
+        zoom_level = min(max(0, self.zoom_level + step), len(config.UI_ZOOM_LEVELS) - 1)
+        if zoom_level == self.zoom_level:
+            return
+
+        field_x, field_y = self.field_index(x, y)
+        self.clear()
+        self.zoom_level = zoom_level
+        pitch = self.pitch()
+        columns, rows = self.visible()
+        self.offset_x = min(max(0, field_x - int((x - self.left) // pitch)), self.plan_x - columns)
+        self.offset_y = min(max(0, field_y - int((y - self.top) // pitch)), self.plan_y - rows)
+        self.paint()
@@ -0,0 +1,384 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Network client of the server, keeps game plans as seen by the player (see protocol in Server.py)
+
+Client offers the same interface as Game to computer players, so AI from AI.py can play over network.
+"""
+
+import asyncio
+import random
+
+import config
+from Events import AttackEvent, EventBus, ShipSunkEvent
+from GameStore import decode_field
+
+
+class FieldView:
+    """
+    Game plan as known to the player
+
+    Unknown fields of the opponent are config.IS_WATTER, only sunk ships are known.
+
+
+    Attributes
+    ----------
+    field : list
+        Game plan indexed as field[y][x]
+    plan_x : int
+        Number of columns
+    ship_cells : list
+        Cells of known sunk ships
+    untried : list
+        Indexes y * plan_x + x of fields which were not attacked yet
+    untried_position : list
+        Position of each field in self.untried, -1 for attacked fields
+
+    Methods
+    -------
+    is_sunk(ship)
+        Check if the ship is sunk
+    attack(x, y, action)
+        Write result of the attack
+    random_untried(rng)
+        Return random field which was not attacked yet
+    """
+
+    def __init__(self, field, plan_x):
+        """
+        Constructor of FieldView class
+
+        Parameters
+        ----------
+        field : list
+            Game plan indexed as field[y][x]
+        plan_x : int
+            Number of columns
+        """
+
+        self.field = field
+        self.plan_x = plan_x
+        self.ship_cells = []
+        self.untried = []
+        self.untried_position = [-1] * (plan_x * len(field))
+        for y in range(len(field)):
+            for x in range(plan_x):
+                if field[y][x] in [config.IS_WATTER, config.IS_SHIP]:
+                    self.untried_position[y * plan_x + x] = len(self.untried)
+                    self.untried.append(y * plan_x + x)
+
+    def is_sunk(self, ship):
+        """
+        Check if the ship is sunk, all known ships are sunk
+
+        Parameters
+        ----------
+        ship : int
+            Index to self.ship_cells
+
+        Returns
+        -------
+        bool
+        """
+
+        return True
+
+    def attack(self, x, y, action):
+        """
+        Write result of the attack and remove the field from untried fields
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        action : int
+            Result of the attack, config.IS_HIT or config.IS_MISS
+        """
+
+        self.field[y][x] = action
+        cell = y * self.plan_x + x
+        position = self.untried_position[cell]
+        if position < 0:
+            return
+
+        last = self.untried.pop()
+        if last != cell:
+            self.untried[position] = last
+            self.untried_position[last] = position
+        self.untried_position[cell] = -1
+
+    def random_untried(self, rng):
+        """
+        Return random field which was not attacked yet
+
+        Parameters
+        ----------
+        rng : random.Random
+            Source of randomness
+
+        Returns
+        -------
+        tuple | None
+            (x, y) coordinates of the field, None if all fields were attacked
+        """
+
+        if not self.untried:
+            return None
+        cell = self.untried[rng.randrange(len(self.untried))]
+        return cell % self.plan_x, cell // self.plan_x
+
+
+class Client:
+    """
+    Client connected to the server
+
+    Messages of the server update game plans known to the player, ships of the opponent are never known.
+    Own game plan is always config.HERO_KEY and game plan of the opponent config.ENEMY_KEY,
+    results of attacks are published as events of the game.
+
+
+    Attributes
+    ----------
+    reader : asyncio.StreamReader
+        Incoming stream from the server
+    writer : asyncio.StreamWriter
+        Outgoing stream to the server
+    rng : random.Random
+        Source of randomness of computer players
+    seeded : bool
+        The rng was provided, so computer players must play the same moves in each run
+    bus : EventBus
+        Delivers events of the match to subscribers
+    game_settings : dict | None
+        Settings of the match, None until the match starts
+    hero_field : FieldView | None
+        Own game plan
+    enemy_field : FieldView | None
+        Game plan of the opponent with results of own attacks
+    my_turn : bool
+        Client is on the move
+    won : bool | None
+        Result of the match, None while it is played
+    errors : list
+        Error messages received from the server
+
+    Methods
+    -------
+    connect(host, port, rng)
+        Connect to the server
+    subscribe(callback, kinds)
+        Register callback called with events of the match
+    choose_target(name)
+        Choose random field which was not attacked yet
+    send(words)
+        Send one command to the server
+    join()
+        Ask the server for a match
+    attack(x, y)
+        Attack field x, y of the opponent
+    receive()
+        Read one message and update the state
+    wait_turn()
+        Read messages until the client is on the move or the match is over
+    close()
+        Leave the server
+    """
+
+    def __init__(self, reader, writer, rng=None):
+        """
+        Constructor of Client class
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Incoming stream from the server
+        writer : asyncio.StreamWriter
+            Outgoing stream to the server
+        rng : random.Random
+            Optional, source of randomness of computer players
+        """
+
+        self.reader = reader
+        self.writer = writer
+        self.rng = rng if rng is not None else random.Random()
+        self.seeded = rng is not None
+        self.bus = EventBus()
+        self.game_settings = None
+        self.hero_field = None
+        self.enemy_field = None
+        self.my_turn = False
+        self.won = None
+        self.errors = []
+
+    @classmethod
+    async def connect(cls, host=config.SERVER_HOST, port=config.SERVER_PORT, rng=None):
+        """
+        Connect to the server
+
+        Parameters
+        ----------
+        host : str
+            Optional, address of the server
+        port : int
+            Optional, port of the server
+        rng : random.Random
+            Optional, source of randomness of computer players
+
+        Returns
+        -------
+        Client
+        """
+
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer, rng)
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Register callback called with events of the match
+
+        Parameters
+        ----------
+        callback : callable
+            Function called as callback(event)
+        kinds : list
+            Optional, kinds of events (config.EVENT_ATTACK or config.EVENT_SUNK), all events by default
+        """
+
+        self.bus.subscribe(callback, kinds)
+
+    def choose_target(self, name):
+        """
+        Choose random field of `name` game plan which was not attacked yet
+
+        Parameters
+        ----------
+        name : str
+            config.HERO_KEY or config.ENEMY_KEY
+
+        Returns
+        -------
+        tuple | None
+            (x, y) coordinates of the field, None if all fields were attacked
+        """
+
+        field = self.hero_field if name == config.HERO_KEY else self.enemy_field
+        return field.random_untried(self.rng)
+
+    async def send(self, *words):
+        """
+        Send one command to the server
+
+        Parameters
+        ----------
+        words : list
+            Words of the command
+        """
+
+        self.writer.write((' '.join(str(word) for word in words) + '\n').encode())
+        await self.writer.drain()
+
+    async def join(self):
+        """
+        Ask the server for a match and wait until it starts, subscribers of previous match are removed
+        """
+
+        self.game_settings = None
+        self.won = None
+        self.bus = EventBus()
+        await self.send('JOIN')
+        while self.game_settings is None:
+            if not await self.receive():
+                raise ConnectionError('Server closed the connection')
+
+    async def attack(self, x, y):
+        """
+        Attack field x, y of the opponent
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        """
+
+        self.my_turn = False
+        await self.send('A', x, y)
+
+    async def receive(self):
+        """
+        Read one message and update the state
+
+        Returns
+        -------
+        list
+            Words of the message, empty list when the connection is closed
+        """
+
+        line = await self.reader.readline()
+        words = line.decode().split()
+        if not words:
+            return []
+
+        kind = words[0]
+        if kind == 'M':
+            plan_x, plan_y, ship, block = (int(word) for word in words[1:5])
+            self.game_settings = {
+                config.GAME_PLAN_X_KEY: plan_x,
+                config.GAME_PLAN_Y_KEY: plan_y,
+                config.GAME_SHIP_KEY: ship,
+                config.GAME_SHIP_BLOCK_KEY: block,
+            }
+            self.hero_field = FieldView(decode_field(words[5], plan_x), plan_x)
+            self.enemy_field = FieldView([[config.IS_WATTER] * plan_x for _ in range(plan_y)], plan_x)
+            self.my_turn = False
+        elif kind == 'R':
+            mine, x, y, action = (int(word) for word in words[1:5])
+            name = config.ENEMY_KEY if mine else config.HERO_KEY
+            (self.enemy_field if mine else self.hero_field).attack(x, y, action)
+            self.bus.publish(AttackEvent(name, x, y, action))
+        elif kind == 'S':
+            mine, x, y = (int(word) for word in words[1:4])
+            name = config.ENEMY_KEY if mine else config.HERO_KEY
+            values = [int(word) for word in words[4:]]
+            cells = list(zip(values[0::2], values[1::2]))
+            (self.enemy_field if mine else self.hero_field).ship_cells.append(cells)
+            self.bus.publish(ShipSunkEvent(name, x, y, cells))
+        elif kind == 'T':
+            self.my_turn = words[1] == '1'
+        elif kind == 'G':
+            self.won = words[1] == '1'
+            self.my_turn = False
+        elif kind == 'E':
+            self.errors.append(' '.join(words[1:]))
+        return words
+
+    async def wait_turn(self):
+        """
+        Read messages until the client is on the move or the match is over
+
+        Returns
+        -------
+        bool
+            True if the client is on the move
+        """
+
+        while not self.my_turn and self.won is None:
+            if not await self.receive():
+                raise ConnectionError('Server closed the connection')
+        return self.my_turn
+
+    async def close(self):
+        """
+        Leave the server
+        """
+
+        try:
+            await self.send('QUIT')
+        except ConnectionError:
+            pass
+        self.writer.close()
+        await self.writer.wait_closed()
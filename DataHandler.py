@@ -5,9 +5,82 @@ MFF UK - 2019/20 Winter - Programing 1 - Credit Program
 Class used to handling game file
 """
 
+import atexit
 import json
+import os
+import tempfile
+import threading
+import time
 
 import config
+from BinaryFormat import BinaryGame, FIELDS, is_binary
+from Metrics import METRICS
+
+# Mask of permissions of new files, umask can be read only by setting it, so it is read once while importing
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def serialize(data):
+    """
+    Convert game field object to JSON serializable value
+
+    Used for game fields stored in other backend than list of lists (e.g. BitBoard)
+
+    Parameters
+    ----------
+    data : any
+        Object with to_list() method
+
+    Raises
+    ------
+    TypeError
+        If the object can't be serialized
+
+    Returns
+    -------
+    list
+    """
+
+    if hasattr(data, 'to_list'):
+        return data.to_list()
+    raise TypeError('Object of type {} is not JSON serializable'.format(type(data).__name__))
+
+
+def write_atomic(filename, text, sync=True):
+    """
+    Write text to the file through temporary file renamed over it, so the file is never left truncated
+
+    The file keeps permissions of the replaced file, new file gets default permissions of the process
+
+    Parameters
+    ----------
+    filename : str
+        Name of file
+    text : str | bytes
+        New content of the file
+    sync : bool
+        Optional, wait until the content is on the disk before the file is replaced
+    """
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    try:
+        mode = os.stat(filename).st_mode & 0o7777
+    except OSError:
+        mode = 0o666 & ~UMASK
+
+    handle, temp = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(filename), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb' if isinstance(text, bytes) else 'w') as file:
+            file.write(text)
+            file.flush()
+            os.chmod(temp, mode)
+            if sync:
+                os.fsync(file.fileno())
+        os.replace(temp, filename)
+    except BaseException:
+        os.remove(temp)
+        raise
 
 
 class DataHandler:
@@ -15,6 +88,16 @@ class DataHandler:
     A class used to handling game file
     Serves as interface between program and storing technology
 
+    In journal mode full state is written to the file only occasionally, every change is appended
+    as one compact record to the journal file next to it. Loading replays the journal on top of the file.
+
+    In deferred mode changes are only marked and written by background thread every config.FLUSH_INTERVAL seconds
+    or after config.FLUSH_STEPS changes. Pending changes are written by flush() and on close or exit of the program.
+    Otherwise every change is written at once, but without waiting until it is on the disk.
+
+    Binary game files (see BinaryFormat) are detected on load and memory-mapped. Game plans are read lazily
+    and every change patches only affected bytes of the file, journal is not used for them.
+
 
     Attributes
     ----------
@@ -22,6 +105,24 @@ class DataHandler:
         Name of source file
     source : dict
         Data represented as dictionary
+    journal : bool
+        If True, changes are appended to the journal instead of rewriting the file
+    journal_file : str
+        Name of journal file
+    journal_records : int
+        Count of records in the journal since the last compaction
+    deferred : bool
+        If True, changes are written by background thread
+    dirty : bool
+        True if there are changes not written to the disk
+    pending : list
+        Journal records not written to the disk
+    steps : int
+        Count of changes since the last write
+    binary : BinaryGame | None
+        Memory-mapped binary game file
+    memory : bool
+        If True, data are not stored to any file
 
 
     Methods
@@ -30,35 +131,88 @@ class DataHandler:
         Return data of provided key
     set_data(key, data)
         Set data to provided key
+    replace_data(key, data)
+        Replace data of provided key with equal data in other representation
+    set_cell(key, x, y, value)
+        Set value of one field of game plan with provided key
+    changed(record)
+        Mark change described by journal record and write it unless writes are deferred
+    flush(sync)
+        Write all pending changes to the disk
     save()
         Save data to the file
+    write_file(text, sync)
+        Atomically replace the file with serialized data and empty the journal
+    replay()
+        Apply records from the journal to the data
+    run_writer()
+        Loop of background thread writing pending changes
+    close()
+        Write pending changes, stop background thread and close the journal or binary game file
     """
 
-    def __init__(self, filename, data=None):
+    def __init__(self, filename, data=None, journal=False, deferred=False, binary=False):
         """
         Constructor of DataHandler class
 
         If the `data` attribute is provided, initial state is not read from the file
+        If `filename` is None, data are kept only in memory
 
         Parameters
         ----------
-        filename : int
+        filename : str | None
             Name of file
         data : dict
             Optional, initial state of the file
+        journal : bool
+            Optional, append changes to the journal instead of rewriting the file
+        deferred : bool
+            Optional, write changes by background thread
+        binary : bool
+            Optional, create binary game file from `data`, existing files are detected automatically
         """
 
         self.source_file = filename
+        self.memory = filename is None
+        self.binary = None
+        if binary and data:
+            self.binary = BinaryGame.create(filename, data)
+        elif not data and is_binary(filename):
+            self.binary = BinaryGame(filename)
 
-        if data:
+        self.journal = journal and self.binary is None and filename is not None
+        self.journal_file = None if filename is None else filename + config.JOURNAL_SUFFIX
+        self.journal_records = 0
+        self.journal_handle = None
+
+        self.deferred = deferred
+        self.dirty = False
+        self.pending = []
+        self.steps = 0
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = False
+        self.writer = None
+
+        if self.binary is not None:
+            self.source = self.binary.source
+        elif data:
             self.source = data
             self.save()
         else:
-            try:
-                file = open(self.source_file, 'r')
+            with open(self.source_file, 'r') as file:
                 self.source = json.loads(file.read())
-            finally:
-                file.close()
+
+            if os.path.exists(self.journal_file):
+                self.replay()
+            if self.journal:
+                self.save()
+
+        if self.deferred and not self.memory:
+            self.writer = threading.Thread(target=self.run_writer, daemon=True)
+            self.writer.start()
+            atexit.register(self.close)
 
     def get_data(self, key):
         """
@@ -95,17 +249,256 @@ class DataHandler:
             Required data
         """
 
-        self.source[key] = data
-        self.source[config.STATE_KEY]["step"] += 1
-        self.save()
+        start = time.perf_counter() if METRICS.enabled else None
+        with self.lock:
+            if self.binary is not None and key in FIELDS:
+                self.binary.write_field(key, data)
+            else:
+                self.source[key] = data
+            self.source[config.STATE_KEY][config.STEP_KEY] += 1
+            record = [self.source[config.STATE_KEY][config.STEP_KEY], key, data]
+        self.changed(record)
+        if start is not None:
+            METRICS.observe('set_data', start)
+
+    def replace_data(self, key, data):
+        """
+        Replace data of provided key with equal data in other representation (e.g. game plan converted to BitBoard)
+
+        Nothing is written and the step of the game is not changed
+
+        Parameters
+        ----------
+        key : str
+            Key of replaced data
+        data : any
+            Data equal to current data of the key
+        """
+
+        with self.lock:
+            if self.binary is None:
+                self.source[key] = data
+
+    def set_cell(self, key, x, y, value):
+        """
+        Set value of one field of game plan with provided key
+
+        In journal mode only the changed field is written to the disk
 
-    def save(self):
+        Parameters
+        ----------
+        key : str
+            Key of game plan
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            New value of the field
+        """
+
+        start = time.perf_counter() if METRICS.enabled else None
+        with self.lock:
+            self.source[key][y][x] = value
+            self.source[config.STATE_KEY][config.STEP_KEY] += 1
+            record = [self.source[config.STATE_KEY][config.STEP_KEY], key, x, y, value]
+        self.changed(record)
+        if start is not None:
+            METRICS.observe('set_cell', start)
+
+    def changed(self, record):
+        """
+        Mark change described by journal record and write it unless writes are deferred
+
+        Parameters
+        ----------
+        record : list
+            [step, key, data] for set_data() or [step, key, x, y, value] for set_cell()
+        """
+
+        if self.memory:
+            return
+
+        with self.lock:
+            self.dirty = True
+            self.steps += 1
+            if self.binary is not None:
+                self.binary.write_state(self.source[config.STATE_KEY])
+            if self.journal:
+                self.pending.append(json.dumps(record, separators=(',', ':'), default=serialize))
+
+        if not self.deferred:
+            self.flush(sync=False)
+        elif self.steps >= config.FLUSH_STEPS:
+            self.wake.set()
+
+    def flush(self, sync=True):
+        """
+        Write all pending changes to the disk
+
+        In journal mode pending records are appended to the journal at once,
+        the journal is merged to the file after config.JOURNAL_COMPACT_RECORDS records
+
+        Parameters
+        ----------
+        sync : bool
+            Optional, wait until the changes are on the disk, writes after every change don't wait
+        """
+
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return
+
+                if self.binary is not None:
+                    if sync:
+                        self.binary.flush()
+                    self.dirty = False
+                    self.steps = 0
+                    return
+
+                if self.journal and self.journal_handle is not None \
+                        and self.journal_records + len(self.pending) <= config.JOURNAL_COMPACT_RECORDS:
+                    text = None
+                    records = self.pending
+                else:
+                    start = time.perf_counter() if METRICS.enabled else None
+                    text = json.dumps(self.source, default=serialize)
+                    if start is not None:
+                        METRICS.observe('serialize', start)
+                    records = []
+
+                self.pending = []
+                self.dirty = False
+                self.steps = 0
+
+            start = time.perf_counter() if METRICS.enabled else None
+            try:
+                if text is not None:
+                    self.write_file(text, sync)
+                else:
+                    self.journal_handle.write(''.join(record + '\n' for record in records))
+                    self.journal_handle.flush()
+                    self.journal_records += len(records)
+                if start is not None:
+                    METRICS.observe('write', start)
+            except OSError:
+                with self.lock:
+                    self.pending = records + self.pending
+                    self.dirty = True
+                raise
+
+    def save(self, sync=True):
         """
         Save local source data to the file
+
+        In journal mode the journal is emptied, because all its records are part of the file
+
+        Parameters
+        ----------
+        sync : bool
+            Optional, wait until the data are on the disk
+        """
+
+        if self.memory:
+            return
+
+        if self.binary is not None:
+            with self.write_lock, self.lock:
+                self.binary.write_state(self.source[config.STATE_KEY])
+                if sync:
+                    self.binary.flush()
+                self.dirty = False
+                self.steps = 0
+            return
+
+        with self.write_lock:
+            with self.lock:
+                text = json.dumps(self.source, default=serialize)
+                self.pending = []
+                self.dirty = False
+                self.steps = 0
+
+            self.write_file(text, sync)
+
+    def write_file(self, text, sync=True):
+        """
+        Atomically replace the file with serialized data and empty the journal
+
+        Parameters
+        ----------
+        text : str
+            Serialized data
+        sync : bool
+            Optional, wait until the data are on the disk
+        """
+
+        write_atomic(self.source_file, text, sync)
+
+        if self.journal:
+            if self.journal_handle is not None:
+                self.journal_handle.close()
+            self.journal_handle = open(self.journal_file, 'w')
+            self.journal_records = 0
+
+    def replay(self):
+        """
+        Apply records from the journal to the data
+
+        Records of steps already saved in the file are skipped, incomplete last record is ignored
+        """
+
+        step = self.source[config.STATE_KEY][config.STEP_KEY]
+        with open(self.journal_file, 'r') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+
+                if record[0] <= step:
+                    continue
+
+                if len(record) == 3:
+                    self.source[record[1]] = record[2]
+                else:
+                    self.source[record[1]][record[3]][record[2]] = record[4]
+                step = record[0]
+                self.source[config.STATE_KEY][config.STEP_KEY] = step
+
+    def run_writer(self):
         """
+        Loop of background thread writing pending changes
+
+        Failed writes are retried in the next round
+        """
+
+        while not self.stopped:
+            self.wake.wait(config.FLUSH_INTERVAL)
+            self.wake.clear()
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def close(self):
+        """
+        Write pending changes, stop background thread and close the journal or binary game file
+        """
+
+        if self.writer is not None:
+            self.stopped = True
+            self.wake.set()
+            self.writer.join()
+            self.writer = None
+            atexit.unregister(self.close)
+
+        self.flush()
+
+        if self.journal_handle is not None:
+            self.journal_handle.close()
+            self.journal_handle = None
 
-        try:
-            file = open(self.source_file, 'w')
-            file.write(json.dumps(self.source))
-        finally:
-            file.close()
+        if self.binary is not None:
+            self.binary.close()
+            self.binary = None
@@ -0,0 +1,186 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Typed events published by the game and bus delivering them to subscribers
+"""
+
+import config
+
+
+class Event:
+    """
+    Base class of events published by the game
+
+    Each event carries only the change (delta) it describes, subscribers don't need to read whole game plans.
+
+
+    Attributes
+    ----------
+    kind : str
+        One of config.EVENT_*, same for all events of the class
+    fields : tuple
+        Names of attributes with data of the event
+
+    Methods
+    -------
+    to_dict()
+        Return data of the event as dictionary
+    """
+
+    kind = None
+    fields = ()
+
+    def __init__(self, *args, **kwargs):
+        """
+        Constructor of Event class, values are assigned to self.fields in order
+
+        Parameters
+        ----------
+        args : list
+            Values of fields
+        kwargs : dict
+            Values of fields by name
+        """
+
+        values = dict(zip(self.fields, args))
+        values.update(kwargs)
+        for name in self.fields:
+            setattr(self, name, values.get(name))
+
+    def to_dict(self):
+        """
+        Return data of the event as dictionary
+
+        Returns
+        -------
+        dict
+            Key 'event' with kind of the event and values of all fields
+        """
+
+        data = {'event': self.kind}
+        for name in self.fields:
+            data[name] = getattr(self, name)
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__,
+                               ', '.join('{}={!r}'.format(name, getattr(self, name)) for name in self.fields))
+
+
+class AttackEvent(Event):
+    """
+    Field `x`, `y` of game plan `name` was attacked with result `action` (config.IS_HIT or config.IS_MISS)
+    """
+
+    kind = config.EVENT_ATTACK
+    fields = ('name', 'x', 'y', 'action', 'step')
+
+
+class ShipSunkEvent(Event):
+    """
+    Attack to `x`, `y` sank the ship with parts on `cells` in game plan `name`
+    """
+
+    kind = config.EVENT_SUNK
+    fields = ('name', 'x', 'y', 'cells')
+
+
+class TurnEvent(Event):
+    """
+    Player `player` is on the move
+    """
+
+    kind = config.EVENT_TURN
+    fields = ('player',)
+
+
+class GameOverEvent(Event):
+    """
+    Player `winner` won the game
+    """
+
+    kind = config.EVENT_GAME_OVER
+    fields = ('winner',)
+
+
+class ErrorEvent(Event):
+    """
+    Attack of `player` was not performed because of `message`
+    """
+
+    kind = config.EVENT_ERROR
+    fields = ('player', 'message')
+
+
+class EventBus:
+    """
+    Delivers published events to subscribers
+
+    Subscribers are called in order of subscription, each only with events of kinds it subscribed to.
+
+
+    Attributes
+    ----------
+    subscribers : list
+        List of (callback, kinds) pairs, kinds is None for all events
+
+    Methods
+    -------
+    subscribe(callback, kinds)
+        Register callback called with events of provided kinds
+    unsubscribe(callback)
+        Remove registered callback
+    publish(event)
+        Call subscribers of the event
+    """
+
+    def __init__(self):
+        """
+        Constructor of EventBus class
+        """
+
+        self.subscribers = []
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Register callback called with events of provided kinds
+
+        Parameters
+        ----------
+        callback : callable
+            Function called as callback(event)
+        kinds : list
+            Optional, kinds of events (config.EVENT_*), all events by default
+        """
+
+        self.subscribers.append((callback, None if kinds is None else frozenset(kinds)))
+
+    def unsubscribe(self, callback):
+        """
+        Remove registered callback
+
+        Parameters
+        ----------
+        callback : callable
+            Registered function
+        """
+
+        self.subscribers = [(registered, kinds) for registered, kinds in self.subscribers if registered != callback]
+
+    def publish(self, event):
+        """
+        Call subscribers of the event
+
+        Parameters
+        ----------
+        event : Event
+            Published event
+        """
+
+        for callback, kinds in list(self.subscribers):
+            if kinds is None or event.kind in kinds:
+                callback(event)
@@ -0,0 +1,353 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Constructive placement of the fleet to the game plan
+"""
+
+import random
+
+import config
+from GameField import InvalidGameData
+
+
+class FleetPlacer:
+    """
+    A class used to place required number of ships with required number of blocks to the game plan
+
+    Ships are grown block by block from random seeds, so they never touch each other.
+    If random growth gets stuck, ships are laid along snake-like lane through the game plan.
+    Both ways take bounded amount of work, so placement never has to be retried.
+
+
+    Attributes
+    ----------
+    plan_x : int
+        Number of columns of the game plan
+    plan_y : int
+        Number of rows of the game plan
+    ship : int
+        Number of ships
+    block : int
+        Number of blocks of all ships together
+    rng : random.Random
+        Source of randomness
+
+    Methods
+    -------
+    fits()
+        Check if the fleet can be generated for the game plan
+    place()
+        Return new game plan with placed fleet
+    split_blocks()
+        Randomly split blocks between ships
+    grow_fleet(sizes)
+        Place ships of provided sizes by random growth
+    grow_ship(seed, size, blocked)
+        Grow one ship from the seed
+    lay_fleet(sizes)
+        Place ships of provided sizes along the lane
+    lane_length(transpose)
+        Return length of the lane through the game plan
+    lane(transpose)
+        Return cells of snake-like lane through the game plan
+    neighbours(cell)
+        Return indexes of cells surrounding the cell
+    """
+
+    def __init__(self, plan_x, plan_y, ship, block, rng=None):
+        """
+        Constructor of FleetPlacer class
+
+        Parameters
+        ----------
+        plan_x : int
+            Number of columns of the game plan
+        plan_y : int
+            Number of rows of the game plan
+        ship : int
+            Number of ships
+        block : int
+            Number of blocks of all ships together
+        rng : random.Random
+            Optional, source of randomness
+        """
+
+        self.plan_x = plan_x
+        self.plan_y = plan_y
+        self.ship = ship
+        self.block = block
+        self.rng = rng if rng is not None else random.Random()
+
+    def fits(self):
+        """
+        Check if the fleet can be generated for the game plan
+
+        Fleet can be generated if every ship has at least one block and all ships separated by one watter field
+        fit to the longest lane through the game plan (about half of the game plan).
+        It is a limit of the generator, not of the rules: some larger fleets could be placed by hand
+        (e.g. one ship filling the whole game plan), but they are refused, so the placement never fails.
+
+        Returns
+        -------
+        bool
+        """
+
+        if self.plan_x <= 0 or self.plan_y <= 0 or self.ship < 0:
+            return False
+        if self.ship == 0:
+            return self.block == 0
+        if self.block < self.ship:
+            return False
+
+        longest = max(self.lane_length(False), self.lane_length(True))
+        return self.block + self.ship - 1 <= longest
+
+    def place(self):
+        """
+        Return new game plan with placed fleet
+
+        Raises
+        ------
+        InvalidGameData
+            If the fleet can't be generated for the game plan
+
+        Returns
+        -------
+        list
+            Game plan with `self.ship` ships of `self.block` blocks together
+        """
+
+        if not self.fits():
+            raise InvalidGameData(config.INVALID_FLEET_SIZE)
+
+        sizes = self.split_blocks()
+        plan = self.grow_fleet(sizes)
+        if plan is None:
+            plan = self.lay_fleet(sizes)
+        return plan
+
+    def split_blocks(self):
+        """
+        Randomly split blocks between ships, every ship gets at least one block
+
+        Returns
+        -------
+        list
+            Sizes of ships from the largest one
+        """
+
+        if self.ship == 0:
+            return []
+
+        cuts = sorted(self.rng.sample(range(1, self.block), self.ship - 1))
+        bounds = [0] + cuts + [self.block]
+        sizes = [bounds[i + 1] - bounds[i] for i in range(self.ship)]
+        sizes.sort(reverse=True)
+        return sizes
+
+    def grow_fleet(self, sizes):
+        """
+        Place ships of provided sizes by random growth
+
+        Seeds are taken from one shuffled pass over the game plan,
+        each ship gets at most `config.FLEET_GROW_ATTEMPTS` seeds.
+
+        Parameters
+        ----------
+        sizes : list
+            Sizes of ships
+
+        Returns
+        -------
+        list | None
+            Game plan or None if growth got stuck
+        """
+
+        cells = list(range(self.plan_x * self.plan_y))
+        self.rng.shuffle(cells)
+        blocked = bytearray(len(cells))
+        plan = [[config.IS_WATTER] * self.plan_x for i in range(self.plan_y)]
+
+        next_seed = 0
+        for size in sizes:
+            ship = None
+            attempts = 0
+            while ship is None and attempts < config.FLEET_GROW_ATTEMPTS:
+                while next_seed < len(cells) and blocked[cells[next_seed]]:
+                    next_seed += 1
+                if next_seed == len(cells):
+                    return None
+
+                ship = self.grow_ship(cells[next_seed], size, blocked)
+                next_seed += 1
+                attempts += 1
+
+            if ship is None:
+                return None
+
+            for cell in ship:
+                plan[cell // self.plan_x][cell % self.plan_x] = config.IS_SHIP
+                blocked[cell] = 1
+                for neighbour in self.neighbours(cell):
+                    blocked[neighbour] = 1
+
+        return plan
+
+    def grow_ship(self, seed, size, blocked):
+        """
+        Grow one ship from the seed
+
+        New block is always connected to exactly one block of the ship, so ships have no cycles.
+
+        Parameters
+        ----------
+        seed : int
+            Index of first block of the ship
+        size : int
+            Required size of the ship
+        blocked : bytearray
+            Markers of fields occupied by other ships or surrounding them
+
+        Returns
+        -------
+        list | None
+            Indexes of blocks of the ship or None if the ship can't grow to required size
+        """
+
+        ship = [seed]
+        taken = {seed}
+        frontier = [cell for cell in self.neighbours(seed) if not blocked[cell]]
+
+        while len(ship) < size:
+            cell = None
+            while frontier:
+                i = self.rng.randrange(len(frontier))
+                candidate = frontier[i]
+                frontier[i] = frontier[-1]
+                frontier.pop()
+
+                if candidate not in taken and sum(n in taken for n in self.neighbours(candidate)) == 1:
+                    cell = candidate
+                    break
+
+            if cell is None:
+                return None
+
+            ship.append(cell)
+            taken.add(cell)
+            frontier.extend(n for n in self.neighbours(cell) if not blocked[n] and n not in taken)
+
+        return ship
+
+    def lay_fleet(self, sizes):
+        """
+        Place ships of provided sizes along the lane
+
+        Ships are separated by at least one field of the lane, free fields of the lane are randomly spread between them.
+
+        Parameters
+        ----------
+        sizes : list
+            Sizes of ships
+
+        Returns
+        -------
+        list
+            Game plan
+        """
+
+        need = sum(sizes) + len(sizes) - 1
+        lanes = [transpose for transpose in (False, True) if self.lane_length(transpose) >= need]
+        path = self.lane(self.rng.choice(lanes))
+
+        gaps = [0] * (len(sizes) + 1)
+        for i in range(len(path) - need):
+            gaps[self.rng.randrange(len(gaps))] += 1
+
+        sizes = list(sizes)
+        self.rng.shuffle(sizes)
+
+        plan = [[config.IS_WATTER] * self.plan_x for i in range(self.plan_y)]
+        position = gaps[0]
+        for i, size in enumerate(sizes):
+            for x, y in path[position:position + size]:
+                plan[y][x] = config.IS_SHIP
+            position += size + 1 + gaps[i + 1]
+
+        return plan
+
+    def lane_length(self, transpose):
+        """
+        Return length of the lane through the game plan
+
+        Parameters
+        ----------
+        transpose : bool
+            If True, lane goes through columns instead of rows
+
+        Returns
+        -------
+        int
+        """
+
+        length, width = (self.plan_x, self.plan_y) if transpose else (self.plan_y, self.plan_x)
+        rows = (length + 1) // 2
+        return rows * width + rows - 1
+
+    def lane(self, transpose):
+        """
+        Return cells of snake-like lane through the game plan
+
+        Lane goes through every second row (or column) and connects them at alternating ends.
+        Only consecutive cells of the lane are neighbours.
+
+        Parameters
+        ----------
+        transpose : bool
+            If True, lane goes through columns instead of rows
+
+        Returns
+        -------
+        list
+            List of (x, y) coordinates
+        """
+
+        length, width = (self.plan_x, self.plan_y) if transpose else (self.plan_y, self.plan_x)
+
+        path = []
+        for row in range(0, length, 2):
+            columns = range(width) if row % 4 == 0 else range(width - 1, -1, -1)
+            path.extend((column, row) for column in columns)
+            if row + 2 < length:
+                path.append((columns[-1], row + 1))
+
+        if transpose:
+            path = [(x, y) for y, x in path]
+        return path
+
+    def neighbours(self, cell):
+        """
+        Return indexes of cells surrounding the cell
+
+        Parameters
+        ----------
+        cell : int
+            Index of the cell (y * plan_x + x)
+
+        Returns
+        -------
+        list
+        """
+
+        x = cell % self.plan_x
+        result = []
+        if x > 0:
+            result.append(cell - 1)
+        if x + 1 < self.plan_x:
+            result.append(cell + 1)
+        if cell >= self.plan_x:
+            result.append(cell - self.plan_x)
+        if cell + self.plan_x < self.plan_x * self.plan_y:
+            result.append(cell + self.plan_x)
+        return result
@@ -6,22 +6,54 @@ Class representing current game
 """
 
 import random
+import time
 
 import config
+from AI import DIFFICULTIES
+from DataHandler import DataHandler
+from Events import AttackEvent, ErrorEvent, EventBus, GameOverEvent, ShipSunkEvent, TurnEvent
+from GameBuilder import GameBuilder
 from GameField import GameField, InvalidGameData
-from Presenter import Presenter
+from Metrics import METRICS
+
+
+def opponent(name):
+    """
+    Return key of the opponent of `name`
+
+    Parameters
+    ----------
+    name : str
+        config.HERO_KEY or config.ENEMY_KEY
+
+    Returns
+    -------
+    str
+    """
+
+    return config.ENEMY_KEY if name == config.HERO_KEY else config.HERO_KEY
 
 
 class Game:
     """
     Class representing current game
 
+    Game runs without user interface, changes are published as typed events (see Events) to subscribers.
+    Each subscriber is called as callback(event) only with events of kinds it subscribed to:
+        AttackEvent - name (attacked field), x, y, action, step
+        ShipSunkEvent - name, x, y, cells (parts of sunk ship)
+        ErrorEvent - player (who tried to attack), message
+        TurnEvent - player (who is on the move)
+        GameOverEvent - winner
+    Game state is persisted before the attack is published, so subscribers see saved state and step of the event
+    doesn't depend on order of subscription.
+
     Attributes
     ----------
     dh : DataHandler
         Global data handler
     root : tkinter.Tk
-        Root node of tkinter
+        Root node of tkinter, None for game without user interface
     game_state : dict
         Game state from game state file
     game_settings: dict
@@ -34,23 +66,47 @@ class Game:
         Instance of hero's window with game
     enemy_presenter : Presenter
         Instance of the enemy's window with game
+    bus : EventBus
+        Bus delivering events to subscribers
+    rng : random.Random
+        Source of randomness of AI
+    seeded : bool
+        The rng was provided, so computer players must play the same moves in each run
+    ai : dict
+        Computer players for names of attacked game fields
 
 
     Methods
     -------
+    new_game(mode, settings, filename, rng)
+        Create new game with generated game plans
+    subscribe(callback, kinds)
+        Register callback called with events of provided kinds
+    unsubscribe(callback)
+        Remove registered callback
+    publish(event)
+        Call subscribers of the event
     attack(name, x, y)
         Handle attack to `name` game field of coordinates x, y
     can_attack(name)
         Check if `name` can take the attack
+    whose_turn()
+        Return key of the player on the move
+    winner()
+        Return key of the winner
     evaluate_game()
-        Evaluate state of game and set corresponding state to presenters
+        Evaluate state of game and publish it to subscribers
     start_game()
         Start game in corresponding game mode
+    choose_target(name)
+        Choose random field of `name` game field which was not attacked yet (random legal move)
+    get_ai(name, difficulty)
+        Return computer player attacking `name` game field
     ai_step()
         One game step of AI
     """
 
-    def __init__(self, dh, root):
+    def __init__(self, dh, root=None, rng=None):
         """
         Constructor of Game class
 
@@ -59,7 +115,9 @@ class Game:
         dh : DataHandler()
             Global data handler
         root : tkinter.Tk()
-            Root node of tkinter
+            Optional, root node of tkinter
+        rng : random.Random
+            Optional, source of randomness of AI
 
         Raises
         ------
@@ -78,6 +136,84 @@ class Game:
             raise err
         self.hero_presenter = None
         self.enemy_presenter = None
+        self.bus = EventBus()
+        self.rng = rng if rng is not None else random.Random()
+        self.seeded = rng is not None
+        self.ai = {}
+
+    @staticmethod
+    def new_game(mode=config.GAME_MODE, settings=None, filename=None, rng=None):
+        """
+        Create new game with generated game plans
+
+        Parameters
+        ----------
+        mode : str
+            Optional, key of game mode
+        settings : dict
+            Optional, values overriding default settings
+        filename : str
+            Optional, name of game file, game is kept only in memory without it
+        rng : random.Random
+            Optional, source of randomness used for game plans and AI
+
+        Raises
+        ------
+        InvalidGameData
+            If required ships can't be generated for the game plan
+
+        Returns
+        -------
+        Game
+        """
+
+        builder = GameBuilder(rng)
+        builder.create_settings()
+        builder.create_initial_state()
+        builder.template[config.SETTINGS_KEY][config.GAME_MODE_KEY] = mode
+        if settings:
+            builder.template[config.SETTINGS_KEY].update(settings)
+        builder.create_game_plan(config.HERO_KEY)
+        builder.create_game_plan(config.ENEMY_KEY)
+        return Game(DataHandler(filename, builder.template), rng=rng)
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Register callback called with events of provided kinds
+
+        Parameters
+        ----------
+        callback : callable
+            Function called as callback(event)
+        kinds : list
+            Optional, kinds of events (config.EVENT_*), all events by default
+        """
+
+        self.bus.subscribe(callback, kinds)
+
+    def unsubscribe(self, callback):
+        """
+        Remove registered callback
+
+        Parameters
+        ----------
+        callback : callable
+            Registered function
+        """
+
+        self.bus.unsubscribe(callback)
+
+    def publish(self, event):
+        """
+        Call subscribers of the event
+
+        Parameters
+        ----------
+        event : Event
+            Published event
+        """
+
+        self.bus.publish(event)
 
     def attack(self, name, x, y):
         """
@@ -94,49 +230,50 @@ class Game:
 
         Returns
         -------
-        int
-            Code of performed action
-        """
-
-        multi = self.game_settings[config.GAME_MODE_KEY] == config.GAME_MODE_MULTI
-        if self.can_attack(name):
-            action = None
-
-            if name == config.HERO_KEY:
-                try:
-                    action = self.hero_field.take_the_attack(x, y)
-                    self.hero_presenter.paint_game()
-                except AssertionError:
-                    if multi:
-                        self.enemy_presenter.set_status(config.UI_ALLREADY_ATTACK_TEXT)
-                except InvalidGameData as err:
-                    if multi:
-                        self.enemy_presenter.set_err(err)
-
-            elif name == config.ENEMY_KEY:
-                try:
-                    action = self.enemy_field.take_the_attack(x, y)
-                    if multi:
-                        self.enemy_presenter.paint_game()
-                except AssertionError:
-                    self.hero_presenter.set_status(config.UI_ALLREADY_ATTACK_TEXT)
-                except InvalidGameData as err:
-                    self.hero_presenter.set_err(err)
-
-            if action != config.IS_HIT and action is not None:
-                self.game_state[config.ACTUAL_PLAYER_KEY] = name
-
-            self.dh.set_data(config.STATE_KEY, self.game_state)
-            self.evaluate_game()
-            return action
-
-        else:
-            if name == config.HERO_KEY and multi:
-                self.enemy_presenter.set_err(config.UI_CANT_PLAY_ERR_TEXT)
-            elif name == config.ENEMY_KEY:
-                self.hero_presenter.set_err(config.UI_CANT_PLAY_ERR_TEXT)
-
-        return 1
+        int | None
+            Code of performed action, None if the attack was not performed
+        """
+
+        if not self.can_attack(name):
+            if METRICS.enabled:
+                METRICS.count('errors')
+            self.publish(ErrorEvent(opponent(name), config.UI_CANT_PLAY_ERR_TEXT))
+            return None
+
+        start = time.perf_counter() if METRICS.enabled else None
+        field = self.hero_field if name == config.HERO_KEY else self.enemy_field
+        try:
+            action = field.take_the_attack(x, y)
+        except AssertionError:
+            if METRICS.enabled:
+                METRICS.count('errors')
+            self.publish(ErrorEvent(opponent(name), config.UI_ALLREADY_ATTACK_TEXT))
+            return None
+        except InvalidGameData as err:
+            if METRICS.enabled:
+                METRICS.count('errors')
+            self.publish(ErrorEvent(opponent(name), str(err)))
+            return None
+
+        if action != config.IS_HIT:
+            self.game_state[config.ACTUAL_PLAYER_KEY] = name
+        if self.winner() is not None:
+            self.game_state[config.GAME_STATE_KEY] = config.GAME_STATE_FINISH
+
+        # Attacked field is already saved by its game field
+        self.dh.set_data(config.STATE_KEY, self.game_state)
+        self.publish(AttackEvent(name, x, y, action, self.game_state[config.STEP_KEY]))
+        if field.last_sunk is not None:
+            if METRICS.enabled:
+                METRICS.count('sunk')
+            self.publish(ShipSunkEvent(name, x, y, field.ship_cells[field.last_sunk]))
+        self.evaluate_game()
+
+        if METRICS.enabled:
+            METRICS.count('hits' if action == config.IS_HIT else 'misses')
+        if start is not None:
+            METRICS.observe('attack', start)
+        return action
 
     def can_attack(self, name):
         """
@@ -154,61 +291,124 @@ class Game:
         return self.game_state[config.ACTUAL_PLAYER_KEY] != name and self.game_state[
             config.GAME_STATE_KEY] == config.GAME_STATE_ACTIVE
 
+    def whose_turn(self):
+        """
+        Return key of the player on the move
+
+        Returns
+        -------
+        str | None
+            config.HERO_KEY or config.ENEMY_KEY, None if the game is finished
+        """
+
+        if self.game_state[config.GAME_STATE_KEY] != config.GAME_STATE_ACTIVE:
+            return None
+        return self.game_state[config.ACTUAL_PLAYER_KEY]
+
+    def winner(self):
+        """
+        Return key of the winner
+
+        Returns
+        -------
+        str | None
+            config.HERO_KEY or config.ENEMY_KEY, None if nobody has won yet
+        """
+
+        if self.hero_field.live_ship == 0:
+            return config.ENEMY_KEY
+        if self.enemy_field.live_ship == 0:
+            return config.HERO_KEY
+        return None
+
     def evaluate_game(self):
         """
-        Evaluate state of game and set corresponding state to presenters
+        Evaluate state of game and publish it to subscribers
         If one field haven't any live ships determinates the winner and end the game
         """
-        multi = self.game_settings[config.GAME_MODE_KEY] == config.GAME_MODE_MULTI
 
-        finish = False
-        if self.hero_field.live_ship == 0:
-            self.hero_presenter.end_screen(config.UI_LOOSE)
-            if multi:
-                self.enemy_presenter.end_screen(config.UI_VICTORY)
-            finish = True
-        elif self.enemy_field.live_ship == 0:
-            self.hero_presenter.end_screen(config.UI_VICTORY)
-            if multi:
-                self.enemy_presenter.end_screen(config.UI_LOOSE)
-            finish = True
-
-        if finish:
-            self.game_state[config.STATE_KEY] = config.GAME_STATE_FINISH
-            self.dh.set_data(config.STATE_KEY, self.game_state)
-
-        if self.game_state[config.ACTUAL_PLAYER_KEY] == config.HERO_KEY:
-            self.hero_presenter.set_status(config.UI_CAN_PLAY_TEXT)
-            if multi:
-                self.enemy_presenter.set_status(config.UI_CANT_PLAY_TEXT)
-        else:
-            self.hero_presenter.set_status(config.UI_CANT_PLAY_TEXT)
-            if multi:
-                self.enemy_presenter.set_status(config.UI_CAN_PLAY_TEXT)
+        start = time.perf_counter() if METRICS.enabled else None
+        winner = self.winner()
+        if winner is not None:
+            if self.game_state[config.GAME_STATE_KEY] != config.GAME_STATE_FINISH:
+                self.game_state[config.GAME_STATE_KEY] = config.GAME_STATE_FINISH
+                self.dh.set_data(config.STATE_KEY, self.game_state)
+            self.publish(GameOverEvent(winner))
+
+        self.publish(TurnEvent(self.game_state[config.ACTUAL_PLAYER_KEY]))
+        if start is not None:
+            METRICS.observe('evaluate_game', start)
 
     def start_game(self):
         """
         Start game in corresponding game mode
         Corresponding game mode is available in self.game_settings
+        Windows of players are created as subscribers of the game
         """
+        from Presenter import Presenter
+
         self.hero_presenter = Presenter(config.HERO_KEY, self.dh, self, self.hero_field, self.root)
         if self.game_settings[config.GAME_MODE_KEY] == config.GAME_MODE_MULTI:
             self.enemy_presenter = Presenter(config.ENEMY_KEY, self.dh, self, self.enemy_field, self.root)
 
         self.evaluate_game()
+        self.hero_presenter.start_ai()
+
+    def choose_target(self, name):
+        """
+        Choose random field of `name` game field which was not attacked yet (random legal move)
+
+        Field is taken from the pool of untried fields kept by the game field, so it takes constant time
+
+        Parameters
+        ----------
+        name : str
+            Name of defender
+
+        Returns
+        -------
+        tuple | None
+            (x, y) coordinates of the field, None if all fields were attacked
+        """
+
+        field = self.hero_field if name == config.HERO_KEY else self.enemy_field
+        return field.random_untried(self.rng)
+
+    def get_ai(self, name, difficulty=None):
+        """
+        Return computer player attacking `name` game field
+
+        Computer player is created on first use and learns results of attacks already performed
+
+        Parameters
+        ----------
+        name : str
+            Name of defender
+        difficulty : str
+            Optional, one of config.GAME_DIFFICULTY_*, difficulty from settings is used by default
+
+        Returns
+        -------
+        RandomAI | HuntTargetAI | MonteCarloAI
+        """
+
+        if name not in self.ai:
+            if difficulty is None:
+                difficulty = self.game_settings.get(config.GAME_DIFFICULTY_KEY, config.GAME_DIFFICULTY)
+            self.ai[name] = DIFFICULTIES[difficulty](self, name)
+        return self.ai[name]
 
     def ai_step(self):
         """
         Perform game steps of AI until can play
         """
-        if self.game_settings[config.GAME_MODE_KEY] == config.GAME_MODE_SINGLE and self.can_attack(config.HERO_KEY):
-            tries = 0
-            while tries <= self.game_settings[config.GAME_PLAN_X_KEY] * self.game_settings[config.GAME_PLAN_Y_KEY] * 50:
-                x = random.randint(0, self.game_settings[config.GAME_PLAN_X_KEY] - 1)
-                y = random.randint(0, self.game_settings[config.GAME_PLAN_Y_KEY] - 1)
-
-                if self.hero_field.field[y][x] not in [config.IS_HIT, config.IS_MISS]:
-                    self.attack(config.HERO_KEY, x, y)
-                    if not self.can_attack(config.HERO_KEY):
-                        break
-                tries += 1
+        if self.game_settings[config.GAME_MODE_KEY] == config.GAME_MODE_SINGLE:
+            start = time.perf_counter() if METRICS.enabled else None
+            ai = self.get_ai(config.HERO_KEY)
+            while self.can_attack(config.HERO_KEY):
+                x, y = ai.choose()
+                # Refused attack doesn't change the game, the same choice would be refused forever
+                if self.attack(config.HERO_KEY, x, y) is None:
+                    break
+            if start is not None:
+                METRICS.observe('ai_step', start)
@@ -8,6 +8,8 @@ Generator of game file
 import random
 
 from config import *
+from FleetPlacer import FleetPlacer
+from GameField import BACKENDS
 
 
 class GameBuilder:
@@ -19,6 +21,8 @@ class GameBuilder:
     ----------
     template : dict
         Template of game file
+    rng : random.Random
+        Source of randomness used for game plans
 
     Methods
     -------
@@ -26,10 +30,21 @@ class GameBuilder:
             Add default settings section to the template
         create_initial_state()
             Add default state section to the template
+        create_game_plan(name)
+            Add game plan to the template
     """
 
-    def __init__(self):
+    def __init__(self, rng=None):
+        """
+        Constructor of GameBuilder class
+
+        Parameters
+        ----------
+        rng : random.Random
+            Optional, source of randomness used for game plans
+        """
         self.template = {}
+        self.rng = rng if rng is not None else random.Random()
 
     def create_settings(self):
         """
@@ -41,6 +56,8 @@ class GameBuilder:
             GAME_SHIP_KEY: GAME_SHIP,
             GAME_SHIP_BLOCK_KEY: GAME_SHIP_BLOCK,
             GAME_MODE_KEY: GAME_MODE,
+            GAME_BACKEND_KEY: GAME_BACKEND,
+            GAME_DIFFICULTY_KEY: GAME_DIFFICULTY,
         }
 
     def create_initial_state(self):
@@ -57,46 +74,27 @@ class GameBuilder:
         """
         Add game plan to the template. Generates required numbers of ships with correct sum of ship parts.
 
+        Dimensions, fleet and backend are taken from settings section of the template (default values are used without it).
+
         Parameters
         ----------
         name : str
             Key of game plan section added to the template
-        """
-        plan = [[0 for i in range(GAME_PLAN_Y)] for j in range(GAME_PLAN_Y)]
-
-        ship = 0
-        for i in range(GAME_SHIP_BLOCK):
-            while True:
-                x = random.randint(0, GAME_PLAN_X - 1)
-                y = random.randint(0, GAME_PLAN_Y - 1)
-
-                if plan[x][y] == 0:
-                    is_new_ship = True
-
-                    connect = 0
-                    if x - 1 > 0 and plan[x - 1][y] == 1:
-                        connect += 1
-                    if x + 1 < GAME_PLAN_X and plan[x + 1][y] == 1:
-                        connect += 1
-                    if y - 1 > 0 and plan[x][y - 1] == 1:
-                        connect += 1
-                    if y + 1 < GAME_PLAN_Y and plan[x][y + 1] == 1:
-                        connect += 1
-
-                    if connect > 1:
-                        continue
-                    elif connect == 1:
-                        is_new_ship = False
-
-                    if GAME_SHIP_BLOCK - i + 1 <= GAME_SHIP - ship and not is_new_ship:
-                        continue
-                    elif ship < GAME_SHIP:
-                        plan[x][y] = 1
-                        if is_new_ship:
-                            ship += 1
-                        break
-                    elif not is_new_ship:
-                        plan[x][y] = 1
-                        break
 
+        Raises
+        ------
+        InvalidGameData
+            If required ships can't be generated for the game plan
+        """
+        settings = self.template.get(SETTINGS_KEY, {})
+        placer = FleetPlacer(settings.get(GAME_PLAN_X_KEY, GAME_PLAN_X),
+                             settings.get(GAME_PLAN_Y_KEY, GAME_PLAN_Y),
+                             settings.get(GAME_SHIP_KEY, GAME_SHIP),
+                             settings.get(GAME_SHIP_BLOCK_KEY, GAME_SHIP_BLOCK),
+                             self.rng)
+
+        plan = placer.place()
+        backend = settings.get(GAME_BACKEND_KEY, GAME_BACKEND)
+        if backend in BACKENDS:
+            plan = BACKENDS[backend].from_list(plan)
         self.template[name] = plan
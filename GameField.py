@@ -6,14 +6,88 @@ Classes representing game field
 """
 
 import copy
+import time
 
 import config
+from BitBoard import BitBoard
+from Metrics import METRICS
+from NumpyBoard import NumpyBoard
+
+# Values of the field which are part of a ship
+SHIP_PARTS = (config.IS_SHIP, config.IS_HIT)
+
+# Classes of game plans for backends other than list of lists
+BACKENDS = {
+    config.GAME_BACKEND_BITS: BitBoard,
+    config.GAME_BACKEND_NUMPY: NumpyBoard,
+}
 
 
 class InvalidGameData(Exception):
     pass
 
 
+def label_ships(field):
+    """
+    Label all ships in game plan in one linear scan
+
+    Ship is a group of ship parts (live or hit) connected in one of four directions.
+    Ships are tracked iteratively, so size of the ship is not limited by recursion.
+    Size of the ship is length of its list of cells, ship is live while count of its hits is lower than its size.
+
+    Parameters
+    ----------
+    field : list | BitBoard | NumpyBoard
+        Game plan indexed as field[y][x], boards of other backends label ships by themselves
+
+    Returns
+    -------
+    ship_map : dict
+        Id of the ship for (x, y) coordinates of each ship part
+    ship_cells : list
+        List of (x, y) coordinates of parts of each ship
+    ship_hits : list
+        Count of hit parts of each ship
+    """
+
+    if not isinstance(field, list):
+        return field.label_ships()
+
+    ship_map = {}
+    ship_cells = []
+    ship_hits = []
+    height = len(field)
+
+    for y in range(height):
+        row = field[y]
+        for x in range(len(row)):
+            if row[x] not in SHIP_PARTS or (x, y) in ship_map:
+                continue
+
+            ship = len(ship_cells)
+            ship_map[(x, y)] = ship
+            cells = []
+            hits = 0
+            stack = [(x, y)]
+            while stack:
+                cell_x, cell_y = stack.pop()
+                cells.append((cell_x, cell_y))
+                if field[cell_y][cell_x] == config.IS_HIT:
+                    hits += 1
+
+                for next_x, next_y in ((cell_x - 1, cell_y), (cell_x + 1, cell_y),
+                                       (cell_x, cell_y - 1), (cell_x, cell_y + 1)):
+                    if 0 <= next_y < height and 0 <= next_x < len(field[next_y]) \
+                            and field[next_y][next_x] in SHIP_PARTS and (next_x, next_y) not in ship_map:
+                        ship_map[(next_x, next_y)] = ship
+                        stack.append((next_x, next_y))
+
+            ship_cells.append(cells)
+            ship_hits.append(hits)
+
+    return ship_map, ship_cells, ship_hits
+
+
 class GameField:
     """
     A class used to represent a game field
@@ -25,51 +99,122 @@ class GameField:
         Name of the field
     dh : DataHandler()
         Global data handler
+    field : list | BitBoard | NumpyBoard
+        Game plan indexed as field[y][x], board class is selected by backend in settings
     game_settings : dict
         Settings from game state file
-    valid_data : dict
-        Last validated state of game
+    valid_data : list | BitBoard | NumpyBoard | None
+        Last validated state of game, kept only if self.strict is set
+    strict : bool
+        If True, whole game plan is validated before every attack, otherwise only the attacked field
     live_ship : int
         Count of live ships in this game field
+    ship_map : dict
+        Id of the ship for (x, y) coordinates of each ship part
+    ship_cells : list
+        List of (x, y) coordinates of parts of each ship
+    ship_hits : list
+        Count of hit parts of each ship
+    last_sunk : int | None
+        Id of the ship sunk by the last attack
+    untried : list
+        Indexes (y * plan_x + x) of fields which were not attacked yet, in any order
+    untried_position : list
+        Position of each field in self.untried, -1 for attacked fields
 
     Methods
     -------
     take_the_attack(x, y)
         Save game state after attack on x, y and return performed action code
+    validate_attack(x, y)
+        Check if attack on x, y is valid transition of game field
+    get_ship(x, y)
+        Return id of the ship with part on x, y
+    is_sunk(ship)
+        Check if all parts of the ship are hit
     validate_fiedl_state()
         Check if state of game field is valid
+    snapshot()
+        Return copy of current game plan
+    index_ships()
+        Build index of ships in game plan
+    index_untried()
+        Build pool of fields which were not attacked yet
+    remove_untried(x, y)
+        Remove attacked field from the pool in constant time
+    random_untried(rng)
+        Return random field which was not attacked yet in constant time
     count_ship()
         Count ships in game plan
-    track_ship(game_plan, x, y, live):
-        In game_plan marks all fields of ship with part on x, y and return vitality of the ship
     """
 
-    def __init__(self, field_name, dh):
+    def __init__(self, field_name, dh, strict=False):
         """
         Constructor of GameField class
 
+        Whole game plan is always validated, because it may come from untrusted file
+
         Parameters
         ----------
         field_name : str
             Name of the field
         dh : DataHandler()
             Global data handler
+        strict : bool
+            Optional, validate whole game plan before every attack
         """
         self.name = field_name
         self.dh = dh
+        self.strict = strict
         self.field = self.dh.get_data(field_name)
         self.game_settings = self.dh.get_data(config.SETTINGS_KEY)
-        self.valid_data = copy.deepcopy(self.field)
+
+        # Game plans loaded from the file are converted to NumPy before validation, so it runs on whole arrays
+        backend = self.game_settings.get(config.GAME_BACKEND_KEY, config.GAME_BACKEND)
+        if backend == config.GAME_BACKEND_NUMPY and isinstance(self.field, list):
+            try:
+                self.field = NumpyBoard.from_list(self.field)
+            except ImportError:
+                raise InvalidGameData(config.INVALID_BACKEND_NUMPY)
+            except (ValueError, TypeError, OverflowError):
+                raise InvalidGameData(config.INVALID_FIELD_DIMENSION)
+            self.dh.replace_data(field_name, self.field)
+
+        # Copy of the game plan is needed only to check whole game plan before every attack
+        self.valid_data = self.snapshot() if strict else None
         self.live_ship = self.game_settings[config.GAME_SHIP_KEY]
+        self.ship_map = {}
+        self.ship_cells = []
+        self.ship_hits = []
+        self.last_sunk = None
+        self.untried = []
+        self.untried_position = []
         try:
             self.validate_field_state()
         except InvalidGameData as err:
             raise err
 
+        # Other backends can't represent invalid fields, so their game plans are validated in their original form,
+        # converted game plan replaces the original one in the data handler, so it is not kept twice
+        if backend in BACKENDS and isinstance(self.field, list):
+            try:
+                self.field = BACKENDS[backend].from_list(self.field)
+            except ImportError:
+                raise InvalidGameData(config.INVALID_BACKEND_NUMPY)
+            except (ValueError, TypeError, OverflowError):
+                raise InvalidGameData(config.INVALID_FIELD_DIMENSION)
+            if strict:
+                self.valid_data = self.snapshot()
+            self.dh.replace_data(field_name, self.field)
+
     def take_the_attack(self, x, y):
         """
         Save game state after attack on x, y and return performed action code
 
+        Only the attacked field is validated (unless self.strict is set),
+        index of ships and pool of untried fields are updated in place,
+        if the attack sinks a ship, its id is stored in self.last_sunk
+
         Parameters
         ----------
         x : int
@@ -82,36 +227,122 @@ class GameField:
         AssertionError
             If provided coorditates are invalid or reattack same position
         InvalidGameData
-            If state of game field is invalid
+            If state of game field is invalid or coordinates are out of game plan
 
         Returns
         -------
         int
             Code of performed action
         """
+        start = time.perf_counter() if METRICS.enabled else None
         try:
-            self.validate_field_state()
+            if self.strict:
+                self.validate_field_state()
+            self.validate_attack(x, y)
         except InvalidGameData as err:
             raise err
+        finally:
+            # Rejected attacks are measured too
+            if start is not None:
+                METRICS.observe('take_the_attack.validate', start)
 
         if self.field[y][x] == config.IS_WATTER:
-            self.field[y][x] = config.IS_MISS
             action = config.IS_MISS
         elif self.field[y][x] == config.IS_SHIP:
-            self.field[y][x] = config.IS_HIT
             action = config.IS_HIT
         else:
             assert False, 'Invalid operation'
 
-        self.dh.set_data(self.name, self.field)
-        count, self.live_ship = self.count_ship()
+        # Game plan is shared with the data handler, it is changed under the lock of the handler,
+        # so the deferred writer never dumps half changed field
+        self.dh.set_cell(self.name, x, y, action)
+
+        update = time.perf_counter() if METRICS.enabled else None
+        if self.valid_data is not None:
+            self.valid_data[y][x] = action
+        self.last_sunk = None
+        if action == config.IS_HIT:
+            ship = self.ship_map[(x, y)]
+            self.ship_hits[ship] += 1
+            if self.is_sunk(ship):
+                self.live_ship -= 1
+                self.last_sunk = ship
+        self.remove_untried(x, y)
+        if update is not None:
+            METRICS.observe('take_the_attack.update', update)
+
+        if start is not None:
+            METRICS.observe('take_the_attack', start)
         return action
 
+    def validate_attack(self, x, y):
+        """
+        Check if attack on x, y is valid transition of game field
+
+        Constant time replacement of validate_field_state() for attacks performed through take_the_attack()
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of incoming attack
+        y : int
+            Y coortinate of incoming attack
+
+        Raises
+        ------
+        AssertionError
+            If the field was already attacked
+        InvalidGameData
+            If coordinates are out of game plan
+        """
+
+        if not 0 <= x < self.game_settings[config.GAME_PLAN_X_KEY] \
+                or not 0 <= y < self.game_settings[config.GAME_PLAN_Y_KEY]:
+            raise InvalidGameData(config.INVALID_ATTACK_POSITION)
+
+        assert self.field[y][x] in [config.IS_WATTER, config.IS_SHIP], 'Invalid operation'
+
+    def get_ship(self, x, y):
+        """
+        Return id of the ship with part on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+
+        Returns
+        -------
+        int | None
+            Id of the ship or None if there is no ship
+        """
+
+        return self.ship_map.get((x, y))
+
+    def is_sunk(self, ship):
+        """
+        Check if all parts of the ship are hit
+
+        Parameters
+        ----------
+        ship : int
+            Id of the ship
+
+        Returns
+        -------
+        bool
+        """
+
+        return self.ship_hits[ship] == len(self.ship_cells[ship])
+
     def validate_field_state(self):
         """
         Check if state of game field is valid
 
-        If the game field is valid, save validated data to the self.valid_data
+        If the game field is valid, save validated data to the self.valid_data (in strict mode),
+        rebuild index of ships and pool of untried fields
 
         Raises
         ------
@@ -120,105 +351,146 @@ class GameField:
         """
 
         # Check game plan dimension
-        for x in self.field:
-            if len(x) != self.game_settings[config.GAME_PLAN_X_KEY]:
-                raise InvalidGameData(config.INVALID_FIELD_DIMENSION)
+        if isinstance(self.field, list):
+            for x in self.field:
+                if len(x) != self.game_settings[config.GAME_PLAN_X_KEY]:
+                    raise InvalidGameData(config.INVALID_FIELD_DIMENSION)
+        elif self.field.width != self.game_settings[config.GAME_PLAN_X_KEY]:
+            raise InvalidGameData(config.INVALID_FIELD_DIMENSION)
 
         if len(self.field) != self.game_settings[config.GAME_PLAN_Y_KEY]:
             raise InvalidGameData(config.INVALID_FIELD_DIMENSION)
 
-        # Check if only one fiel is changed from previous game step
-        change = False
-        for i in range(len(self.field)):
-            for j in range(len(self.field[i])):
-                if self.field[i][j] != self.valid_data[i][j]:
-                    if change:
-                        raise InvalidGameData(config.INVALID_GAME_STEP)
-                    else:
-                        change = True
+        # Check if only one fiel is changed from previous game step, previous step is kept only in strict mode
+        if self.valid_data is not None and not isinstance(self.field, list):
+            if self.field.count_changes(self.valid_data) > 1:
+                raise InvalidGameData(config.INVALID_GAME_STEP)
+        elif self.valid_data is not None:
+            change = False
+            for i in range(len(self.field)):
+                for j in range(len(self.field[i])):
+                    if self.field[i][j] != self.valid_data[i][j]:
+                        if change:
+                            raise InvalidGameData(config.INVALID_GAME_STEP)
+                        else:
+                            change = True
 
         # Check if match count of ships on plan
-        count, live = self.count_ship()
-        self.live_ship = live
+        count = self.index_ships()
         if count != self.game_settings[config.GAME_SHIP_KEY]:
             raise InvalidGameData(config.INVALID_SHIP_COUNT)
 
-        self.valid_data = copy.deepcopy(self.field)
+        self.index_untried()
+        if self.strict:
+            self.valid_data = self.snapshot()
 
-    def count_ship(self):
+    def snapshot(self):
         """
-         Count ships in game plan
+        Return copy of current game plan
 
         Returns
         -------
-        count : int
+        list | BitBoard | NumpyBoard
+        """
+
+        if isinstance(self.field, list):
+            return copy.deepcopy(self.field)
+        return self.field.copy()
+
+    def index_ships(self):
+        """
+        Build index of ships in game plan
+
+        Fill self.ship_map, self.ship_cells, self.ship_hits and self.live_ship from current game plan
+
+        Returns
+        -------
+        int
             Count of ships in game plan
-        live : int
-            Count of live ships in game plan
         """
 
-        game_plan = []
-        for i in self.field:
-            row = []
-            for j in i:
-                row.append([j, False])
-            game_plan.append(row)
+        self.ship_map, self.ship_cells, self.ship_hits = label_ships(self.field)
+        self.live_ship = sum(hits < len(cells) for cells, hits in zip(self.ship_cells, self.ship_hits))
+        return len(self.ship_cells)
 
-        count = 0
-        live = 0
-        for i, row in enumerate(game_plan):
-            for j, item in enumerate(row):
-                if item[1]:
-                    continue
+    def index_untried(self):
+        """
+        Build pool of fields which were not attacked yet
 
-                if item[0] in [config.IS_SHIP, config.IS_HIT]:
-                    count += 1
-                    state = item[0] == config.IS_SHIP
-                    if self.track_ship(game_plan, i, j, state):
-                        live += 1
-                else:
-                    game_plan[i][j][1] = True
-        return count, live
+        Fill self.untried and self.untried_position from current game plan
+        """
 
-    def track_ship(self, game_plan, x, y, live):
+        if isinstance(self.field, NumpyBoard):
+            self.untried, self.untried_position = self.field.untried()
+            return
+
+        plan_x = self.game_settings[config.GAME_PLAN_X_KEY]
+        self.untried = []
+        self.untried_position = [-1] * (plan_x * len(self.field))
+        for y in range(len(self.field)):
+            row = self.field[y]
+            for x in range(plan_x):
+                if row[x] in [config.IS_WATTER, config.IS_SHIP]:
+                    self.untried_position[y * plan_x + x] = len(self.untried)
+                    self.untried.append(y * plan_x + x)
+
+    def remove_untried(self, x, y):
         """
-        In game_plan marks all fields of ship with part on x, y and return vitality of the ship
+        Remove attacked field from the pool in constant time
 
-        Check all surrounding fields, their vitality and recursively call themselves if on the field is part of ship
+        The last field of the pool is moved to the position of removed field
 
         Parameters
         ----------
-        game_plan : list
-            List with game field and markers if the field was checked
         x : int
-            X coortinate of ship part
+            X coortinate of the field
         y : int
-            Y coortinate of ship part
-        live : bool
-            Vitality of currently tracked ship
+            Y coortinate of the field
+        """
+
+        cell = y * self.game_settings[config.GAME_PLAN_X_KEY] + x
+        position = self.untried_position[cell]
+        if position < 0:
+            return
+
+        last = self.untried.pop()
+        if last != cell:
+            self.untried[position] = last
+            self.untried_position[last] = position
+        self.untried_position[cell] = -1
+
+    def random_untried(self, rng):
+        """
+        Return random field which was not attacked yet in constant time
+
+        Parameters
+        ----------
+        rng : random.Random
+            Source of randomness
 
         Returns
         -------
-        bool
-            Vitality of the ship
+        tuple | None
+            (x, y) coordinates of the field, None if all fields were attacked
         """
 
-        if game_plan[x][y][0] in [config.IS_WATTER, config.IS_MISS] or game_plan[x][y][1]:
-            game_plan[x][y][1] = True
-            return live
-        else:
-            game_plan[x][y][1] = True
+        if not self.untried:
+            return None
+        cell = self.untried[rng.randrange(len(self.untried))]
+        return cell % self.game_settings[config.GAME_PLAN_X_KEY], cell // self.game_settings[config.GAME_PLAN_X_KEY]
 
-            if not live and game_plan[x][y][0] == config.IS_SHIP:
-                live = True
+    def count_ship(self):
+        """
+         Count ships in game plan
 
-            if x - 1 > 0:
-                live = self.track_ship(game_plan, x - 1, y, live)
-            if x + 1 < self.game_settings[config.GAME_PLAN_X_KEY]:
-                live = self.track_ship(game_plan, x + 1, y, live)
-            if y - 1 > 0:
-                live = self.track_ship(game_plan, x, y - 1, live)
-            if y + 1 < self.game_settings[config.GAME_PLAN_Y_KEY]:
-                live = self.track_ship(game_plan, x, y + 1, live)
+        Returns
+        -------
+        count : int
+            Count of ships in game plan
+        live : int
+            Count of live ships in game plan
+        """
 
-            return live
+        ship_map, ship_cells, ship_hits = label_ships(self.field)
+        live = sum(hits < len(cells) for cells, hits in zip(ship_cells, ship_hits))
+        return len(ship_cells), live
@@ -0,0 +1,459 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+SQLite database with many games, each game is accessible through the interface of DataHandler
+
+Game plans are stored as snapshots with one digit per field, every attack is appended as one row of the moves table
+and snapshots are rewritten only after config.JOURNAL_COMPACT_RECORDS moves of the game.
+"""
+
+import json
+import sqlite3
+
+import config
+
+# Keys of game plans stored in the database
+FIELDS = [config.HERO_KEY, config.ENEMY_KEY]
+
+
+def encode_field(field):
+    """
+    Encode game plan to string with one digit per field
+
+    Parameters
+    ----------
+    field : list | BitBoard
+        Game plan indexed as field[y][x]
+
+    Returns
+    -------
+    str
+    """
+
+    return ''.join(str(int(value)) for row in field for value in row)
+
+
+def decode_field(cells, plan_x):
+    """
+    Decode game plan from string with one digit per field
+
+    Parameters
+    ----------
+    cells : str
+        Encoded game plan
+    plan_x : int
+        Number of columns
+
+    Returns
+    -------
+    list
+        Game plan indexed as field[y][x]
+    """
+
+    return [[int(value) for value in cells[i:i + plan_x]] for i in range(0, len(cells), plan_x)]
+
+
+class GameStore:
+    """
+    SQLite database with many games
+
+    Database runs in WAL mode, so other connections can read games while they are played.
+    Databases created by older versions without the moves table are upgraded when they are opened.
+
+
+    Attributes
+    ----------
+    filename : str
+        Name of database file
+    connection : sqlite3.Connection
+        Connection to the database
+
+    Methods
+    -------
+    create_game(data)
+        Store new game and return its id
+    open_game(game_id)
+        Return data handler of stored game
+    list_games(state)
+        Return ids of stored games
+    describe_games(state)
+        Return id, state, step, mode and difficulty of stored games
+    delete_game(game_id)
+        Delete stored game
+    close()
+        Close the database
+    """
+
+    def __init__(self, filename=config.GAME_STORE_FILE):
+        """
+        Constructor of GameStore class, creates tables if they don't exist
+
+        Parameters
+        ----------
+        filename : str
+            Optional, name of database file
+        """
+
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS games ('
+                                    'id INTEGER PRIMARY KEY, settings TEXT NOT NULL, state TEXT NOT NULL, '
+                                    'status TEXT NOT NULL, step INTEGER NOT NULL)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS games_status ON games (status)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS fields ('
+                                    'game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE, '
+                                    'name TEXT NOT NULL, cells TEXT NOT NULL, step INTEGER NOT NULL DEFAULT 0, '
+                                    'PRIMARY KEY (game_id, name)) WITHOUT ROWID')
+            columns = [row[1] for row in self.connection.execute('PRAGMA table_info(fields)')]
+            if 'step' not in columns:
+                self.connection.execute('ALTER TABLE fields ADD COLUMN step INTEGER NOT NULL DEFAULT 0')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS moves ('
+                                    'game_id INTEGER NOT NULL REFERENCES games (id) ON DELETE CASCADE, '
+                                    'step INTEGER NOT NULL, name TEXT NOT NULL, x INTEGER NOT NULL, '
+                                    'y INTEGER NOT NULL, value INTEGER NOT NULL, '
+                                    'PRIMARY KEY (game_id, step)) WITHOUT ROWID')
+
+    def create_game(self, data):
+        """
+        Store new game and return its id
+
+        Parameters
+        ----------
+        data : dict
+            Data of game file as in JSON game file
+
+        Returns
+        -------
+        int
+            Id of the game
+        """
+
+        state = data[config.STATE_KEY]
+        with self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO games (settings, state, status, step) VALUES (?, ?, ?, ?)',
+                (json.dumps(data[config.SETTINGS_KEY]), json.dumps(state), state[config.GAME_STATE_KEY],
+                 state[config.STEP_KEY]))
+            game_id = cursor.lastrowid
+            self.connection.executemany('INSERT INTO fields (game_id, name, cells, step) VALUES (?, ?, ?, ?)',
+                                        [(game_id, name, encode_field(data[name]), state[config.STEP_KEY])
+                                         for name in FIELDS])
+        return game_id
+
+    def open_game(self, game_id):
+        """
+        Return data handler of stored game
+
+        Parameters
+        ----------
+        game_id : int
+            Id of the game
+
+        Raises
+        ------
+        KeyError
+            If there is no game with provided id
+
+        Returns
+        -------
+        GameStoreHandler
+        """
+
+        return GameStoreHandler(self, game_id)
+
+    def list_games(self, state=None):
+        """
+        Return ids of stored games
+
+        Parameters
+        ----------
+        state : str
+            Optional, return only games in this state (config.GAME_STATE_ACTIVE or config.GAME_STATE_FINISH)
+
+        Returns
+        -------
+        list
+        """
+
+        if state is None:
+            rows = self.connection.execute('SELECT id FROM games ORDER BY id')
+        else:
+            rows = self.connection.execute('SELECT id FROM games WHERE status = ? ORDER BY id', (state,))
+        return [row[0] for row in rows]
+
+    def describe_games(self, state=None):
+        """
+        Return id, state, step, mode and difficulty of stored games
+
+        Parameters
+        ----------
+        state : str
+            Optional, return only games in this state (config.GAME_STATE_ACTIVE or config.GAME_STATE_FINISH)
+
+        Returns
+        -------
+        list
+            Dictionaries with keys id, state, step, mode and difficulty ordered by id
+        """
+
+        query = 'SELECT id, status, step, settings FROM games'
+        if state is None:
+            rows = self.connection.execute(query + ' ORDER BY id')
+        else:
+            rows = self.connection.execute(query + ' WHERE status = ? ORDER BY id', (state,))
+
+        games = []
+        for game_id, status, step, settings in rows:
+            settings = json.loads(settings)
+            games.append({
+                'id': game_id,
+                'state': status,
+                'step': step,
+                'mode': settings[config.GAME_MODE_KEY],
+                'difficulty': settings.get(config.GAME_DIFFICULTY_KEY, config.GAME_DIFFICULTY),
+            })
+        return games
+
+    def delete_game(self, game_id):
+        """
+        Delete stored game
+
+        Parameters
+        ----------
+        game_id : int
+            Id of the game
+        """
+
+        with self.connection:
+            self.connection.execute('DELETE FROM moves WHERE game_id = ?', (game_id,))
+            self.connection.execute('DELETE FROM fields WHERE game_id = ?', (game_id,))
+            self.connection.execute('DELETE FROM games WHERE id = ?', (game_id,))
+
+    def close(self):
+        """
+        Close the database
+        """
+
+        self.connection.close()
+
+
+class GameStoreHandler:
+    """
+    Data handler of one game stored in GameStore
+    Has same interface as DataHandler, every change is written in its own transaction
+
+    Change of one field inserts one row to the moves table, snapshots of game plans are rewritten
+    after config.JOURNAL_COMPACT_RECORDS moves. Loading replays moves newer than the snapshot.
+
+
+    Attributes
+    ----------
+    store : GameStore
+        Database with the game
+    game_id : int
+        Id of the game
+    source : dict
+        Data represented as dictionary
+    moves : int
+        Count of moves stored since the last snapshot
+
+    Methods
+    -------
+    get_data(key)
+        Return data of provided key
+    set_data(key, data)
+        Set data to provided key
+    replace_data(key, data)
+        Replace data of provided key with equal data in other representation
+    set_cell(key, x, y, value)
+        Set value of one field of game plan with provided key
+    write_state()
+        Write game state section
+    write_fields()
+        Write snapshots of both game plans and remove stored moves
+    save()
+        Save all data to the database
+    flush()
+        Write pending changes, every change is already written
+    close()
+        Release the game, the database stays open
+    """
+
+    def __init__(self, store, game_id):
+        """
+        Constructor of GameStoreHandler class, loads the game from the database
+
+        Parameters
+        ----------
+        store : GameStore
+            Database with the game
+        game_id : int
+            Id of the game
+
+        Raises
+        ------
+        KeyError
+            If there is no game with provided id
+        """
+
+        self.store = store
+        self.game_id = game_id
+
+        row = store.connection.execute('SELECT settings, state FROM games WHERE id = ?', (game_id,)).fetchone()
+        if row is None:
+            raise KeyError(game_id)
+
+        settings = json.loads(row[0])
+        self.source = {
+            config.SETTINGS_KEY: settings,
+            config.STATE_KEY: json.loads(row[1]),
+        }
+        steps = {}
+        for name, cells, step in store.connection.execute('SELECT name, cells, step FROM fields WHERE game_id = ?',
+                                                          (game_id,)):
+            self.source[name] = decode_field(cells, settings[config.GAME_PLAN_X_KEY])
+            steps[name] = step
+
+        self.moves = 0
+        for step, name, x, y, value in store.connection.execute(
+                'SELECT step, name, x, y, value FROM moves WHERE game_id = ? ORDER BY step', (game_id,)):
+            if step > steps[name]:
+                self.source[name][y][x] = value
+            self.moves += 1
+
+    def get_data(self, key):
+        """
+        Return data of provided key
+
+        Parameters
+        ----------
+        key : str
+            Key of required data
+
+        Returns
+        -------
+        any
+            Required data
+        """
+
+        return self.source[key]
+
+    def set_data(self, key, data):
+        """
+        Set data to provided key
+
+        Parameters
+        ----------
+        key : str
+            Key of required data
+        data : any
+            Data to save
+        """
+
+        self.source[key] = data
+        self.source[config.STATE_KEY][config.STEP_KEY] += 1
+
+        with self.store.connection:
+            if key in FIELDS:
+                self.store.connection.execute('UPDATE fields SET cells = ?, step = ? WHERE game_id = ? AND name = ?',
+                                              (encode_field(data), self.source[config.STATE_KEY][config.STEP_KEY],
+                                               self.game_id, key))
+            elif key == config.SETTINGS_KEY:
+                self.store.connection.execute('UPDATE games SET settings = ? WHERE id = ?',
+                                              (json.dumps(data), self.game_id))
+            self.write_state()
+
+    def replace_data(self, key, data):
+        """
+        Replace data of provided key with equal data in other representation, nothing is written
+
+        Parameters
+        ----------
+        key : str
+            Key of replaced data
+        data : any
+            Data equal to current data of the key
+        """
+
+        self.source[key] = data
+
+    def set_cell(self, key, x, y, value):
+        """
+        Set value of one field of game plan with provided key
+
+        Only one row is inserted to the moves table, snapshots are rewritten after config.JOURNAL_COMPACT_RECORDS moves
+
+        Parameters
+        ----------
+        key : str
+            Key of game plan
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            New value of the field
+        """
+
+        self.source[key][y][x] = value
+        self.source[config.STATE_KEY][config.STEP_KEY] += 1
+
+        self.moves += 1
+        with self.store.connection:
+            self.store.connection.execute(
+                'INSERT INTO moves (game_id, step, name, x, y, value) VALUES (?, ?, ?, ?, ?, ?)',
+                (self.game_id, self.source[config.STATE_KEY][config.STEP_KEY], key, x, y, int(value)))
+            self.write_state()
+            if self.moves >= config.JOURNAL_COMPACT_RECORDS:
+                self.write_fields()
+
+    def write_state(self):
+        """
+        Write game state section, must be called inside of transaction
+        """
+
+        state = self.source[config.STATE_KEY]
+        self.store.connection.execute('UPDATE games SET state = ?, status = ?, step = ? WHERE id = ?',
+                                      (json.dumps(state), state[config.GAME_STATE_KEY], state[config.STEP_KEY],
+                                       self.game_id))
+
+    def write_fields(self):
+        """
+        Write snapshots of both game plans and remove stored moves, must be called inside of transaction
+        """
+
+        step = self.source[config.STATE_KEY][config.STEP_KEY]
+        for name in FIELDS:
+            self.store.connection.execute('UPDATE fields SET cells = ?, step = ? WHERE game_id = ? AND name = ?',
+                                          (encode_field(self.source[name]), step, self.game_id, name))
+        self.store.connection.execute('DELETE FROM moves WHERE game_id = ?', (self.game_id,))
+        self.moves = 0
+
+    def save(self):
+        """
+        Save all data to the database
+        """
+
+        with self.store.connection:
+            self.store.connection.execute('UPDATE games SET settings = ? WHERE id = ?',
+                                          (json.dumps(self.source[config.SETTINGS_KEY]), self.game_id))
+            self.write_fields()
+            self.write_state()
+
+    def flush(self):
+        """
+        Write pending changes, every change is already written
+        """
+
+        pass
+
+    def close(self):
+        """
+        Release the game, the database stays open
+        """
+
+        pass
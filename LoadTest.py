@@ -0,0 +1,371 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Load test of the network server with many simulated clients on localhost
+
+Every client plays whole matches with computer player from AI.py. Server runs in its own process
+unless address of running server is provided, so moves of computer players don't delay the server.
+Report contains round trip time of moves, matches per second, memory per match and lag of event loops
+of the server and of the clients.
+
+Usage: python LoadTest.py --clients 2000 --games 2 --difficulty normal
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import config
+from AI import DIFFICULTIES
+from Client import Client
+from Server import Server
+from Simulator import game_seed
+
+
+def percentiles(values, fractions=(0.5, 0.9, 0.99, 1.0)):
+    """
+    Return percentiles of values in milliseconds
+
+    Parameters
+    ----------
+    values : list
+        Durations in seconds
+    fractions : tuple
+        Optional, requested percentiles as fractions
+
+    Returns
+    -------
+    dict
+        Value for each percentile named p50, p90, ..., max, empty for no values
+    """
+
+    if not values:
+        return {}
+    values = sorted(values)
+    result = {}
+    for fraction in fractions:
+        name = 'max' if fraction == 1.0 else 'p{:g}'.format(fraction * 100)
+        result[name] = round(values[min(len(values) - 1, int(fraction * len(values)))] * 1000, 3)
+    return result
+
+
+def peak_memory():
+    """
+    Return peak memory of the process in KiB
+
+    Returns
+    -------
+    int | None
+        None if it can't be measured on this system
+    """
+
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def watch_loop(interval, lags, stop, server=None, peak=None):
+    """
+    Measure lag of the event loop until stop is set
+
+    Task sleeps for `interval`, delay of its wake up is the lag
+
+    Parameters
+    ----------
+    interval : float
+        Seconds between measurements
+    lags : list
+        Measured lags in seconds are appended to the list
+    stop : asyncio.Event
+        Measuring ends when the event is set
+    server : Server
+        Optional, server running in the loop
+    peak : dict
+        Optional, key 'matches' is updated with the highest count of running matches
+    """
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+        if server is not None:
+            peak['matches'] = max(peak['matches'], len(server.matches))
+
+
+async def play_client(index, host, port, seed, difficulty, games, rtts, stats):
+    """
+    Connect one client and play matches with computer player
+
+    Parameters
+    ----------
+    index : int
+        Index of the client
+    host : str
+        Address of the server
+    port : int
+        Port of the server
+    seed : int
+        Base seed of the test
+    difficulty : str
+        Key of config.GAME_DIFFICULTY_*
+    games : int
+        Count of matches played by the client
+    rtts : list
+        Round trip times of moves in seconds are appended to the list
+    stats : dict
+        Counters 'game_overs', 'moves' and 'errors' are updated
+    """
+
+    client = await Client.connect(host, port, random.Random(game_seed(seed, index)))
+    try:
+        for game in range(games):
+            await client.join()
+            ai = DIFFICULTIES[difficulty](client, config.ENEMY_KEY)
+            while await client.wait_turn():
+                x, y = ai.choose()
+                start = time.perf_counter()
+                await client.attack(x, y)
+                while True:
+                    words = await client.receive()
+                    if not words:
+                        raise ConnectionError('Server closed the connection')
+                    if words[0] == 'E' or words[0] == 'R' and words[1] == '1':
+                        break
+                rtts.append(time.perf_counter() - start)
+                stats['moves'] += 1
+            stats['game_overs'] += 1
+    finally:
+        stats['errors'] += len(client.errors)
+        await client.close()
+
+
+async def run_server(conn, settings, seed, lag_interval):
+    """
+    Run the server until anything is received from the connection, then send its report
+
+    Parameters
+    ----------
+    conn : multiprocessing.connection.Connection
+        Port of the server is sent when it listens, report when it is stopped
+    settings : dict
+        Values overriding default settings
+    seed : int
+        Base seed of game plans
+    lag_interval : float
+        Seconds between measurements of lag of the event loop
+    """
+
+    server = Server('127.0.0.1', 0, settings, random.Random(seed))
+    await server.start()
+    lags = []
+    peak = {'matches': 0}
+    stop = asyncio.Event()
+    memory = peak_memory()
+    watcher = asyncio.ensure_future(watch_loop(lag_interval, lags, stop, server, peak))
+
+    conn.send(server.port)
+    await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+
+    stop.set()
+    await watcher
+    await server.close()
+    conn.send({
+        'finished': server.finished,
+        'lags': lags,
+        'peak_matches': peak['matches'],
+        'memory': None if memory is None else peak_memory() - memory,
+    })
+
+
+def receive(conn, process):
+    """
+    Wait for message from the process of the server
+
+    Parameters
+    ----------
+    conn : multiprocessing.connection.Connection
+        Connection to the process
+    process : multiprocessing.Process
+        Process of the server
+
+    Raises
+    ------
+    RuntimeError
+        If the process ended without sending the message
+
+    Returns
+    -------
+    object
+        Received message
+    """
+
+    while not conn.poll(0.1):
+        if not process.is_alive():
+            raise RuntimeError('Server process ended with exit code {}'.format(process.exitcode))
+    return conn.recv()
+
+
+def serve_process(conn, settings, seed, lag_interval):
+    """
+    Entry point of the process of the server, see run_server
+
+    Parameters
+    ----------
+    conn : multiprocessing.connection.Connection
+        Connection to the load test
+    settings : dict
+        Values overriding default settings
+    seed : int
+        Base seed of game plans
+    lag_interval : float
+        Seconds between measurements of lag of the event loop
+    """
+
+    asyncio.run(run_server(conn, settings, seed, lag_interval))
+
+
+async def load_test(clients, games=1, seed=0, difficulty=config.GAME_DIFFICULTY, settings=None, host=None,
+                    port=None, lag_interval=0.01):
+    """
+    Run the load test and return its report
+
+    Parameters
+    ----------
+    clients : int
+        Count of simulated clients, two clients play one match
+    games : int
+        Optional, count of matches played by each client
+    seed : int
+        Optional, base seed of game plans and computer players
+    difficulty : str
+        Optional, difficulty of computer players
+    settings : dict
+        Optional, values overriding default settings, used only for server started by the test
+    host : str
+        Optional, address of running server, server is started in its own process without it
+    port : int
+        Optional, port of running server
+    lag_interval : float
+        Optional, seconds between measurements of lag of event loops
+
+    Returns
+    -------
+    dict
+        Report of the test
+    """
+
+    loop = asyncio.get_running_loop()
+    process = conn = None
+    if host is None:
+        # Spawned process doesn't inherit the running event loop
+        context = multiprocessing.get_context('spawn')
+        conn, child = context.Pipe()
+        process = context.Process(target=serve_process, args=(child, settings, seed, lag_interval), daemon=True)
+        process.start()
+        host, port = '127.0.0.1', await loop.run_in_executor(None, receive, conn, process)
+
+    rtts = []
+    lags = []
+    stats = {'game_overs': 0, 'moves': 0, 'errors': 0}
+    stop = asyncio.Event()
+    watcher = asyncio.ensure_future(watch_loop(lag_interval, lags, stop))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(play_client(index, host, port, seed, difficulty, games, rtts, stats)
+                                     for index in range(clients)), return_exceptions=True)
+    duration = time.perf_counter() - start
+
+    stop.set()
+    await watcher
+    server = None
+    if process is not None:
+        conn.send(None)
+        server = await loop.run_in_executor(None, receive, conn, process)
+        process.join()
+
+    failures = {}
+    for result in results:
+        if isinstance(result, Exception):
+            name = type(result).__name__
+            failures[name] = failures.get(name, 0) + 1
+
+    # Both players of the match get the game over message, server counts matches itself
+    matches = server['finished'] if server is not None else stats['game_overs'] // 2
+    report = {
+        'clients': clients,
+        'failed_clients': sum(failures.values()),
+        'failures': failures,
+        'difficulty': difficulty,
+        'matches': matches,
+        'moves': stats['moves'],
+        'errors': stats['errors'],
+        'duration': round(duration, 3),
+        'matches_per_second': round(matches / duration, 2),
+        'moves_per_second': round(stats['moves'] / duration, 1),
+        'rtt_ms': percentiles(rtts),
+        'loop_lag_ms': percentiles(server['lags']) if server is not None else None,
+        'client_loop_lag_ms': percentiles(lags),
+        'peak_matches': server['peak_matches'] if server is not None else None,
+        'memory_per_match_kib': None,
+    }
+    if server is not None and server['memory'] is not None and server['peak_matches']:
+        report['memory_per_match_kib'] = round(server['memory'] / server['peak_matches'], 1)
+    return report
+
+
+def main(argv=None):
+    """
+    Run the load test from command line
+
+    Parameters
+    ----------
+    argv : list
+        Optional, command line arguments, exits with status 1 if any client failed
+    """
+
+    parser = argparse.ArgumentParser(description='Load test of the network server')
+    parser.add_argument('--clients', type=int, default=1000, help='count of simulated clients')
+    parser.add_argument('--games', type=int, default=1, help='count of matches played by each client')
+    parser.add_argument('--seed', type=int, default=0, help='base seed of game plans and computer players')
+    parser.add_argument('--difficulty', default=config.GAME_DIFFICULTY_NORMAL, choices=sorted(DIFFICULTIES),
+                        help='difficulty of computer players')
+    parser.add_argument('--plan-x', type=int, default=config.GAME_PLAN_X, help='count of columns')
+    parser.add_argument('--plan-y', type=int, default=config.GAME_PLAN_Y, help='count of rows')
+    parser.add_argument('--ship', type=int, default=config.GAME_SHIP, help='count of ships')
+    parser.add_argument('--block', type=int, default=config.GAME_SHIP_BLOCK, help='count of ship blocks')
+    parser.add_argument('--backend', default=config.GAME_BACKEND, help='backend of game plans')
+    parser.add_argument('--host', default=None, help='address of running server (default: server in own process)')
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help='port of running server')
+    parser.add_argument('--lag-interval', type=float, default=0.01, help='seconds between measurements of loop lag')
+    args = parser.parse_args(argv)
+    if args.clients % 2:
+        parser.error('count of clients must be even, two clients play one match')
+
+    settings = {
+        config.GAME_PLAN_X_KEY: args.plan_x,
+        config.GAME_PLAN_Y_KEY: args.plan_y,
+        config.GAME_SHIP_KEY: args.ship,
+        config.GAME_SHIP_BLOCK_KEY: args.block,
+        config.GAME_BACKEND_KEY: args.backend,
+    }
+
+    report = asyncio.run(load_test(args.clients, args.games, args.seed, args.difficulty, settings, args.host,
+                                   args.port, args.lag_interval))
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if report['failed_clients']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
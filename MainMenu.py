@@ -12,24 +12,34 @@ import config
 from DataHandler import DataHandler
 from Game import Game
 from GameBuilder import GameBuilder
-from GameField import InvalidGameData
+from GameStore import GameStore
 
 
 class MainMenu:
     """
     Window with main menu
 
+    New games are stored in the database config.GAME_STORE_FILE, so earlier games are not overwritten
+
     Attributes
     ----------
     root : tkinter.Tk()
         Root node of tkinter
+    store : GameStore | None
+        Database with games, opened on first use
 
 
     Methods
     -------
+    open_store()
+        Return database with games
     load_game()
         Display file selecting dialog and start the game with selected file
-    start_game(mode)
+    select_game()
+        Display dialog with unfinished stored games and start the selected one
+    open_stored_game(game_id)
+        Start stored game with provided id
+    start_game(mode, difficulty)
         Start game in provided mode
 
     """
@@ -45,6 +55,7 @@ class MainMenu:
         """
 
         self.root = root
+        self.store = None
         self.root.title("Main Menu")
         self.root.geometry(config.UI_MAIN_MENU_WINDOW_GEOMETRY)
 
@@ -74,19 +85,82 @@ class MainMenu:
                       command=lambda: self.start_game(config.GAME_MODE_SINGLE))
         btn3.place(relx=0.28, rely=0.5, relwidth=0.45, relheight=0.1)
 
+        btn4 = Button(self.root, text=config.UI_MAIN_MENU_NORMAL_BUTTON_TEXT, bg='black', fg='white',
+                      command=lambda: self.start_game(config.GAME_MODE_SINGLE, config.GAME_DIFFICULTY_NORMAL))
+        btn4.place(relx=0.28, rely=0.6, relwidth=0.45, relheight=0.1)
+
+        btn5 = Button(self.root, text=config.UI_MAIN_MENU_HARD_BUTTON_TEXT, bg='black', fg='white',
+                      command=lambda: self.start_game(config.GAME_MODE_SINGLE, config.GAME_DIFFICULTY_HARD))
+        btn5.place(relx=0.28, rely=0.7, relwidth=0.45, relheight=0.1)
+
+        btn6 = Button(self.root, text=config.UI_MAIN_MENU_LOAD_STORE_BUTTON_TEXT, bg='black', fg='white',
+                      command=self.select_game)
+        btn6.place(relx=0.28, rely=0.8, relwidth=0.45, relheight=0.1)
+
+    def open_store(self):
+        """
+        Return database with games, it is opened on the first call
+
+        Returns
+        -------
+        GameStore
+        """
+
+        if self.store is None:
+            self.store = GameStore(config.GAME_STORE_FILE)
+        return self.store
+
     def load_game(self):
         """
         Display file selecting dialog and start the game with selected file
         """
 
         filename = filedialog.askopenfilename(title="Select A File",
-                                              filetypes=(("json files", "*.json"), ("all files", "*.*")))
+                                              filetypes=(("json files", "*.json"), ("binary files", "*.bin"),
+                                                         ("all files", "*.*")))
         if filename:
-            data = DataHandler(filename)
+            data = DataHandler(filename, deferred=True)
             game = Game(data, self.root)
             game.start_game()
 
-    def start_game(self, mode):
+    def select_game(self):
+        """
+        Display dialog with unfinished stored games and start the selected one
+        """
+
+        games = self.open_store().describe_games(config.GAME_STATE_ACTIVE)
+
+        dialog = Toplevel(self.root)
+        dialog.title(config.UI_STORED_GAMES_TITLE)
+        listbox = Listbox(dialog, width=config.UI_STORED_GAMES_WIDTH, height=config.UI_STORED_GAMES_HEIGHT)
+        for game in games:
+            listbox.insert(END, config.UI_STORED_GAME_TEXT.format(**game))
+        listbox.pack(expand=True, fill=BOTH)
+
+        def open_selected(e=None):
+            selection = listbox.curselection()
+            if selection:
+                dialog.destroy()
+                self.open_stored_game(games[selection[0]]['id'])
+
+        listbox.bind('<Double-Button-1>', open_selected)
+        button = Button(dialog, text=config.UI_STORED_GAME_OPEN_TEXT, command=open_selected)
+        button.pack(fill=X)
+
+    def open_stored_game(self, game_id):
+        """
+        Start stored game with provided id
+
+        Parameters
+        ----------
+        game_id : int
+            Id of the game in the database
+        """
+
+        game = Game(self.open_store().open_game(game_id), self.root)
+        game.start_game()
+
+    def start_game(self, mode, difficulty=config.GAME_DIFFICULTY):
         """
        Start game in provided mode
 
@@ -94,29 +168,23 @@ class MainMenu:
         ----------
         mode : str
             Key of game mode
+        difficulty : str
+            Optional, key of difficulty of computer player
 
 
         Raises
         ------
         InvalidGameData
-            If state of game field in automaticaly generaget game file is invalid
+            If required ships can't be generated for the game plan
         """
 
         builder = GameBuilder()
         builder.create_settings()
         builder.create_initial_state()
         builder.template[config.SETTINGS_KEY][config.GAME_MODE_KEY] = mode
+        builder.template[config.SETTINGS_KEY][config.GAME_DIFFICULTY_KEY] = difficulty
 
-        while True:
-            try:
-                builder.create_game_plan(config.HERO_KEY)
-                builder.create_game_plan(config.ENEMY_KEY)
-                data = DataHandler(config.GAME_FILE, builder.template)
-                game = Game(data, self.root)
-                game.start_game()
-                break
-            except InvalidGameData as err:
-                if err.args[0] == config.INVALID_SHIP_COUNT:
-                    continue
-                else:
-                    raise err
+        builder.create_game_plan(config.HERO_KEY)
+        builder.create_game_plan(config.ENEMY_KEY)
+        store = self.open_store()
+        self.open_stored_game(store.create_game(builder.template))
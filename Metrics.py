@@ -0,0 +1,405 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Optional instrumentation of stages of the move, counters and histograms of durations
+
+Instrumentation is disabled by default, then each measured stage costs only one check of the flag.
+Collected values can be written periodically as JSON or Prometheus text format,
+cProfile capture can be started and stopped on demand.
+"""
+
+import bisect
+import contextlib
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+
+import config
+
+# Since Python 3.12 cProfile captures all threads and only one capture can run at a time
+PROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+class Histogram:
+    """
+    Histogram of durations with fixed buckets
+
+
+    Attributes
+    ----------
+    bounds : tuple
+        Upper bounds of buckets in seconds
+    counts : list
+        Count of values in each bucket, the last bucket is for values over all bounds
+    total : float
+        Sum of all values
+    count : int
+        Count of all values
+
+    Methods
+    -------
+    observe(value)
+        Add value to the histogram
+    to_dict()
+        Return the histogram as dictionary
+    """
+
+    def __init__(self, bounds=config.METRICS_BUCKETS):
+        """
+        Constructor of Histogram class
+
+        Parameters
+        ----------
+        bounds : tuple
+            Optional, upper bounds of buckets in seconds
+        """
+
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Add value to the histogram
+
+        Parameters
+        ----------
+        value : float
+            Duration in seconds
+        """
+
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self):
+        """
+        Return the histogram as dictionary
+
+        Returns
+        -------
+        dict
+            Count, sum and cumulative counts of buckets by upper bound ('+Inf' for all values)
+        """
+
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            buckets[repr(bound)] = cumulative
+        buckets['+Inf'] = self.count
+        return {'count': self.count, 'sum': self.total, 'buckets': buckets}
+
+
+class Metrics:
+    """
+    Counters and histograms of durations of stages of the move
+
+    Measured code checks self.enabled itself, so disabled instrumentation costs no function call:
+        start = time.perf_counter() if METRICS.enabled else None
+        ...
+        if start is not None:
+            METRICS.observe(stage, start)
+
+
+    Attributes
+    ----------
+    enabled : bool
+        Values are collected
+    counters : dict
+        Value of each counter
+    histograms : dict
+        Histogram of durations of each stage
+    lock : threading.Lock
+        Guards values, stages are measured also in worker threads
+    profiler : cProfile.Profile | None
+        Running cProfile capture
+    thread_profiles : list
+        Finished captures of worker threads merged to statistics of the running capture
+    dumper : threading.Thread | None
+        Thread writing values periodically
+    stop_dumper : threading.Event
+        Stops the thread writing values
+
+    Methods
+    -------
+    enable()
+        Start collecting values
+    disable()
+        Stop collecting values
+    reset()
+        Remove all collected values
+    observe(stage, start)
+        Add duration of the stage started at `start`
+    count(name, value)
+        Increase the counter
+    to_dict()
+        Return collected values as dictionary
+    to_prometheus()
+        Return collected values in Prometheus text format
+    dump(filename, output_format)
+        Write collected values to the file
+    start_dump(filename, interval, output_format)
+        Write collected values to the file periodically in background thread
+    stop_dump()
+        Stop periodical writing
+    start_profile()
+        Start cProfile capture
+    profile_thread()
+        Context manager adding code running in worker thread to the running capture
+    stop_profile(filename)
+        Stop cProfile capture and write its statistics
+    toggle_profile(filename)
+        Start cProfile capture or stop running one
+    """
+
+    def __init__(self):
+        """
+        Constructor of Metrics class
+        """
+
+        self.enabled = False
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+        self.profiler = None
+        self.thread_profiles = []
+        self.dumper = None
+        self.stop_dumper = threading.Event()
+
+    def enable(self):
+        """
+        Start collecting values
+        """
+
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop collecting values, collected values are kept
+        """
+
+        self.enabled = False
+
+    def reset(self):
+        """
+        Remove all collected values
+        """
+
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def observe(self, stage, start):
+        """
+        Add duration of the stage started at `start`
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage
+        start : float
+            Value of time.perf_counter() at start of the stage
+        """
+
+        duration = time.perf_counter() - start
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(duration)
+
+    def count(self, name, value=1):
+        """
+        Increase the counter, nothing is counted while instrumentation is disabled
+
+        Parameters
+        ----------
+        name : str
+            Name of the counter
+        value : int
+            Optional, increment
+        """
+
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def to_dict(self):
+        """
+        Return collected values as dictionary
+
+        Returns
+        -------
+        dict
+            Counters and histograms by name
+        """
+
+        with self.lock:
+            return {
+                'time': time.time(),
+                'counters': dict(self.counters),
+                'histograms': {stage: histogram.to_dict() for stage, histogram in self.histograms.items()},
+            }
+
+    def to_prometheus(self):
+        """
+        Return collected values in Prometheus text format
+
+        Returns
+        -------
+        str
+        """
+
+        data = self.to_dict()
+        prefix = config.METRICS_PREFIX
+        lines = []
+        for name, value in sorted(data['counters'].items()):
+            lines.append('# TYPE {}_{}_total counter'.format(prefix, name))
+            lines.append('{}_{}_total {}'.format(prefix, name, value))
+
+        lines.append('# TYPE {}_stage_seconds histogram'.format(prefix))
+        for stage, histogram in sorted(data['histograms'].items()):
+            for bound, count in histogram['buckets'].items():
+                lines.append('{}_stage_seconds_bucket{{stage="{}",le="{}"}} {}'.format(prefix, stage, bound, count))
+            lines.append('{}_stage_seconds_sum{{stage="{}"}} {!r}'.format(prefix, stage, histogram['sum']))
+            lines.append('{}_stage_seconds_count{{stage="{}"}} {}'.format(prefix, stage, histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, filename, output_format=config.METRICS_FORMAT):
+        """
+        Write collected values to the file, the file is replaced at once
+
+        Parameters
+        ----------
+        filename : str
+            Name of file
+        output_format : str
+            Optional, config.METRICS_FORMAT_JSON or config.METRICS_FORMAT_PROMETHEUS
+        """
+
+        # DataHandler is instrumented, so it can't be imported before this module is loaded
+        from DataHandler import write_atomic
+
+        if output_format == config.METRICS_FORMAT_PROMETHEUS:
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.to_dict(), indent=2)
+        write_atomic(filename, text)
+
+    def start_dump(self, filename, interval=config.METRICS_INTERVAL, output_format=config.METRICS_FORMAT):
+        """
+        Write collected values to the file periodically in background thread
+
+        Parameters
+        ----------
+        filename : str
+            Name of file
+        interval : float
+            Optional, seconds between writes
+        output_format : str
+            Optional, config.METRICS_FORMAT_JSON or config.METRICS_FORMAT_PROMETHEUS
+        """
+
+        self.stop_dump()
+        self.stop_dumper.clear()
+
+        def run():
+            while not self.stop_dumper.wait(interval):
+                self.dump(filename, output_format)
+            self.dump(filename, output_format)
+
+        self.dumper = threading.Thread(target=run, daemon=True)
+        self.dumper.start()
+
+    def stop_dump(self):
+        """
+        Stop periodical writing, values are written for the last time
+        """
+
+        if self.dumper is not None:
+            self.stop_dumper.set()
+            self.dumper.join()
+            self.dumper = None
+
+    def start_profile(self):
+        """
+        Start cProfile capture of the calling thread
+        """
+
+        if self.profiler is None:
+            with self.lock:
+                self.thread_profiles = []
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    @contextlib.contextmanager
+    def profile_thread(self):
+        """
+        Context manager adding code running in worker thread to the running capture
+
+        Nothing is captured without running capture or when the capture already covers all threads.
+        Code is lost from statistics when the capture is stopped before the code ends.
+        """
+
+        capture = self.profiler
+        if capture is None or PROFILE_ALL_THREADS:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            with self.lock:
+                if self.profiler is capture:
+                    self.thread_profiles.append(profiler)
+
+    def stop_profile(self, filename=config.PROFILE_FILE):
+        """
+        Stop cProfile capture and write its statistics
+
+        Statistics can be read by pstats module (python -m pstats game.prof)
+
+        Parameters
+        ----------
+        filename : str
+            Optional, name of file for statistics
+        """
+
+        if self.profiler is not None:
+            self.profiler.disable()
+            with self.lock:
+                profilers, self.thread_profiles = self.thread_profiles, []
+                stats = pstats.Stats(self.profiler)
+                self.profiler = None
+            for profiler in profilers:
+                stats.add(profiler)
+            stats.dump_stats(filename)
+
+    def toggle_profile(self, filename=config.PROFILE_FILE):
+        """
+        Start cProfile capture or stop running one and write its statistics
+
+        Parameters
+        ----------
+        filename : str
+            Optional, name of file for statistics
+        """
+
+        if self.profiler is None:
+            self.start_profile()
+        else:
+            self.stop_profile(filename)
+
+
+# Instrumentation shared by all modules of the program
+METRICS = Metrics()
@@ -0,0 +1,264 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Representation of game field in NumPy array, intended for large game plans
+"""
+
+import config
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class NumpyBoard:
+    """
+    Game field stored as two dimensional NumPy array of small integers
+
+    All checks over the whole game plan are performed as whole-array operations.
+    Requires NumPy, which is optional dependency of the game.
+
+
+    Attributes
+    ----------
+    width : int
+        Number of columns
+    height : int
+        Number of rows
+    array : numpy.ndarray
+        Identifiers of fields indexed as array[y, x]
+
+    Methods
+    -------
+    from_list(field)
+        Create board from game plan represented as list of lists
+    to_list()
+        Return game plan represented as list of lists
+    copy()
+        Return copy of the board
+    get(x, y)
+        Return identifier of field on x, y
+    set(x, y, value)
+        Set identifier of field on x, y
+    ships()
+        Return mask of fields with part of a ship
+    count_changes(other)
+        Return number of fields which differ from the other board
+    untried()
+        Return pool of fields which were not attacked yet
+    label_ships()
+        Label all ships in the board
+    """
+
+    def __init__(self, array):
+        """
+        Constructor of NumpyBoard class
+
+        Parameters
+        ----------
+        array : numpy.ndarray
+            Identifiers of fields indexed as array[y, x]
+
+        Raises
+        ------
+        ImportError
+            If NumPy is not installed
+        """
+
+        if numpy is None:
+            raise ImportError(config.INVALID_BACKEND_NUMPY)
+
+        self.array = array
+        self.height, self.width = array.shape
+
+    @staticmethod
+    def from_list(field):
+        """
+        Create board from game plan represented as list of lists
+
+        Parameters
+        ----------
+        field : list
+            Game plan indexed as field[y][x]
+
+        Returns
+        -------
+        NumpyBoard
+        """
+
+        if numpy is None:
+            raise ImportError(config.INVALID_BACKEND_NUMPY)
+        return NumpyBoard(numpy.array(field, dtype=numpy.int8).reshape(len(field), -1))
+
+    def to_list(self):
+        """
+        Return game plan represented as list of lists
+
+        Returns
+        -------
+        list
+            Game plan indexed as field[y][x]
+        """
+
+        return self.array.tolist()
+
+    def copy(self):
+        """
+        Return copy of the board
+
+        Returns
+        -------
+        NumpyBoard
+        """
+
+        return NumpyBoard(self.array.copy())
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        return self.array[y]
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def get(self, x, y):
+        """
+        Return identifier of field on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+
+        Returns
+        -------
+        int
+        """
+
+        return int(self.array[y, x])
+
+    def set(self, x, y, value):
+        """
+        Set identifier of field on x, y
+
+        Parameters
+        ----------
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            One of config.IS_WATTER, config.IS_SHIP, config.IS_HIT, config.IS_MISS
+        """
+
+        self.array[y, x] = value
+
+    def ships(self):
+        """
+        Return mask of fields with part of a ship, live or hit
+
+        Returns
+        -------
+        numpy.ndarray
+            Boolean array of shape of the board
+        """
+
+        return (self.array == config.IS_SHIP) | (self.array == config.IS_HIT)
+
+    def count_changes(self, other):
+        """
+        Return number of fields which differ from the other board
+
+        Parameters
+        ----------
+        other : NumpyBoard
+            Board of same dimensions
+
+        Returns
+        -------
+        int
+        """
+
+        return int(numpy.count_nonzero(self.array != other.array))
+
+    def untried(self):
+        """
+        Return pool of fields which were not attacked yet
+
+        Result has the same format as GameField.untried and GameField.untried_position
+
+        Returns
+        -------
+        untried : list
+            Indexes (y * width + x) of fields which were not attacked yet
+        untried_position : list
+            Position of each field in untried, -1 for attacked fields
+        """
+
+        cells = numpy.flatnonzero((self.array == config.IS_WATTER) | (self.array == config.IS_SHIP))
+        position = numpy.full(self.array.size, -1, dtype=numpy.int64)
+        position[cells] = numpy.arange(len(cells))
+        return cells.tolist(), position.tolist()
+
+    def label_ships(self):
+        """
+        Label all ships in the board
+
+        Every part of a ship starts with its own label (index of the field + 1), labels are lowered to the minimum
+        of neighbouring parts and then to the label of the field they point to, until they stop changing.
+        Result has the same format as label_ships() in GameField.
+
+        Returns
+        -------
+        ship_map : dict
+            Id of the ship for (x, y) coordinates of each ship part
+        ship_cells : list
+            List of (x, y) coordinates of parts of each ship
+        ship_hits : list
+            Count of hit parts of each ship
+        """
+
+        ships = self.ships()
+        if not ships.any():
+            return {}, [], []
+
+        none = self.array.size + 1
+        labels = numpy.where(ships, numpy.arange(1, none, dtype=numpy.int64).reshape(self.array.shape), none)
+        flat_ships = ships.ravel()
+
+        while True:
+            lowered = labels.copy()
+            numpy.minimum(lowered[1:, :], labels[:-1, :], out=lowered[1:, :])
+            numpy.minimum(lowered[:-1, :], labels[1:, :], out=lowered[:-1, :])
+            numpy.minimum(lowered[:, 1:], labels[:, :-1], out=lowered[:, 1:])
+            numpy.minimum(lowered[:, :-1], labels[:, 1:], out=lowered[:, :-1])
+            lowered[~ships] = none
+
+            flat = lowered.ravel()
+            flat[flat_ships] = flat[flat[flat_ships] - 1]
+
+            if numpy.array_equal(lowered, labels):
+                break
+            labels = lowered
+
+        ys, xs = numpy.nonzero(ships)
+        ids, inverse = numpy.unique(labels[ys, xs], return_inverse=True)
+        hits = numpy.bincount(inverse, weights=self.array[ys, xs] == config.IS_HIT, minlength=len(ids))
+
+        order = numpy.argsort(inverse, kind='stable')
+        bounds = numpy.cumsum(numpy.bincount(inverse, minlength=len(ids)))[:-1]
+
+        ship_cells = []
+        ship_map = {}
+        for ship, group in enumerate(numpy.split(order, bounds)):
+            cells = list(zip(xs[group].tolist(), ys[group].tolist()))
+            for cell in cells:
+                ship_map[cell] = ship
+            ship_cells.append(cells)
+
+        return ship_map, ship_cells, [int(hit) for hit in hits]
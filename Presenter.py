@@ -5,8 +5,13 @@ MFF UK - 2019/20 Winter - Programing 1 - Credit Program
 User interface layer of the game
 """
 
+import queue
+import threading
+import time
 import tkinter
 import config
+from BoardView import BoardView
+from Metrics import METRICS
 
 
 class Presenter:
@@ -14,6 +19,11 @@ class Presenter:
     Main presenter of game. Handle dispalyed window and user interactivity.
 
     Meaning of hero and enemy is according to visual position in canvas
+    Presenter is subscriber of the game, displayed window is updated from published events
+    Computer player chooses its move in worker thread, the move is performed in the thread of tkinter,
+    clicks are ignored meanwhile
+    Game plans are shown in scrollable and zoomable views (mouse wheel, with Shift horizontally, with Control zoom),
+    only visible fields are drawn, after the attack only the attacked field is recolored
 
     Attributes
     ----------
@@ -33,6 +43,14 @@ class Presenter:
         Instance of provided game field
     game_settings : dict
         Settings from game state filed
+    thinking : bool
+        True while computer player chooses its move
+    ai_results : queue.Queue
+        Moves chosen by computer player in worker thread
+    poll_id : str | None
+        Id of scheduled poll_ai() callback, it is cancelled when the window is destroyed
+    views : dict
+        View of game plan for each UI component
 
     Methods
     -------
@@ -52,10 +70,24 @@ class Presenter:
         Dispay `msg` in error bar
     paint_plan(name, position, start_x, start_y)
         Paint game plan with data with `name` key
+    paint_cell(position, x, y, value)
+        Recolor one field of game plan if its color changed
+    handle_scroll(e, horizontal, zoom)
+        Callback function for mouse wheel event handler
+    handle_event(event)
+        Update window according to event published by the game
     bind_event_handlers()
         Register event handlers needed for interactivity
     handle_attack(e)
         Callback function for click event handler
+    start_ai()
+        Let computer player choose its move in worker thread if it is on the move
+    run_ai(ai)
+        Choose move of computer player, runs in worker thread
+    poll_ai()
+        Perform move chosen by computer player when it is ready
+    handle_destroy(e)
+        Cancel scheduled callbacks when the window is destroyed
     get_field_index(name, x, y)
         Calculate index of filed on `x`, `y` position in canvas
     end_screen(state)
@@ -99,11 +131,17 @@ class Presenter:
 
         self.game_field = game_field
         self.game_settings = self.dh.get_data(config.SETTINGS_KEY)
+        self.thinking = False
+        self.ai_results = queue.Queue()
+        self.poll_id = None
+        self.views = {}
 
         self.paint_game()
         self.status_bar = self.paint_status_bar()
         self.err_bar = self.paint_error_bar()
         self.bind_event_handlers()
+        self.game.subscribe(self.handle_event, [config.EVENT_ATTACK, config.EVENT_ERROR, config.EVENT_GAME_OVER,
+                                                config.EVENT_TURN])
 
     def get_starting_position(self, name):
         """
@@ -128,9 +166,9 @@ class Presenter:
         if name == config.UI_HERO:
             y += config.STATUS_BAR_HEIGHT
         elif name == config.UI_ENEMY:
-            x += config.FIELD_SPACE + config.UI_WINDOW_PADDING_LEFT + (
-                    config.BLOCK_PADDING + config.BLOCK_DIMENSION) * \
-                 self.game_settings['plan_y']
+            x += config.FIELD_SPACE + config.UI_WINDOW_PADDING_LEFT + min(
+                config.UI_BOARD_VIEW_WIDTH,
+                (config.BLOCK_PADDING + config.BLOCK_DIMENSION) * self.game_settings['plan_x'])
             y += config.STATUS_BAR_HEIGHT
         elif name == config.UI_STATUS_BAR:
             pass
@@ -200,6 +238,8 @@ class Presenter:
         """
         Paint game plan with data with `name` key
 
+        View of the game plan is created on the first call, later calls only repaint visible fields
+
         Parameters
         ----------
         name : str
@@ -212,17 +252,57 @@ class Presenter:
             Y position of top left corner in canvas
         """
 
-        field = self.dh.get_data(name)
-        tag = "item_" + position
+        if position not in self.views:
+            self.views[position] = BoardView(self.canvas, self.dh, name, position, start_x, start_y,
+                                             "item_" + position)
+        self.views[position].paint()
+
+    def paint_cell(self, position, x, y, value):
+        """
+        Recolor one field of game plan if its color changed
+
+        Parameters
+        ----------
+        position : str
+            Name of UI component
+        x : int
+            X coortinate of the field
+        y : int
+            Y coortinate of the field
+        value : int
+            Value of the field in game plan
+        """
+
+        self.views[position].paint_cell(x, y, value)
+
+    def handle_event(self, event):
+        """
+        Update window according to event published by the game
+
+        Only the attacked field is repainted
 
-        for x in range(self.game_settings['plan_x']):
-            y1 = start_y + (config.BLOCK_PADDING + config.BLOCK_DIMENSION) * x
-            y2 = y1 + config.BLOCK_DIMENSION
-            for y in range(self.game_settings['plan_y']):
-                x1 = start_x + (config.BLOCK_PADDING + config.BLOCK_DIMENSION) * y
-                x2 = x1 + config.BLOCK_DIMENSION
-                item = field[x][y]
-                self.canvas.create_rectangle(x1, y1, x2, y2, tags=tag, fill=config.UI_DISPLAY_MAP[position][item])
+        Parameters
+        ----------
+        event : Event
+            Event published by the game
+        """
+
+        if event.kind == config.EVENT_ATTACK:
+            start = time.perf_counter() if METRICS.enabled else None
+            position = config.UI_HERO if event.name == self.hero else config.UI_ENEMY
+            self.paint_cell(position, event.x, event.y, event.action)
+            if start is not None:
+                METRICS.observe('repaint', start)
+        elif event.kind == config.EVENT_ERROR:
+            if event.player == self.hero:
+                if event.message == config.UI_ALLREADY_ATTACK_TEXT:
+                    self.set_status(event.message)
+                else:
+                    self.set_err(event.message)
+        elif event.kind == config.EVENT_GAME_OVER:
+            self.end_screen(config.UI_VICTORY if event.winner == self.hero else config.UI_LOOSE)
+        elif event.kind == config.EVENT_TURN:
+            self.set_status(config.UI_CAN_PLAY_TEXT if event.player == self.hero else config.UI_CANT_PLAY_TEXT)
 
     def bind_event_handlers(self):
         """
@@ -230,6 +310,40 @@ class Presenter:
         """
 
         self.canvas.tag_bind('item_' + config.UI_ENEMY, '<Button-1>', self.handle_attack)
+        self.window.bind('<F12>', lambda e: METRICS.toggle_profile())
+        self.window.bind('<Destroy>', self.handle_destroy)
+
+        for modifier, horizontal, zoom in (('', False, False), ('Shift-', True, False), ('Control-', False, True)):
+            handler = lambda e, horizontal=horizontal, zoom=zoom: self.handle_scroll(e, horizontal, zoom)
+            self.canvas.bind('<' + modifier + 'MouseWheel>', handler)
+            self.canvas.bind('<' + modifier + 'Button-4>', handler)
+            self.canvas.bind('<' + modifier + 'Button-5>', handler)
+
+    def handle_scroll(self, e, horizontal=False, zoom=False):
+        """
+        Callback function for mouse wheel event handler
+
+        Scrolls or zooms the view of game plan under the mouse
+
+        Parameters
+        ----------
+        e : any
+            Event object provided by the event handler
+        horizontal : bool
+            Optional, scroll horizontally
+        zoom : bool
+            Optional, zoom instead of scrolling
+        """
+
+        direction = -1 if e.num == 4 or getattr(e, 'delta', 0) > 0 else 1
+        for view in self.views.values():
+            if view.contains(e.x, e.y):
+                if zoom:
+                    view.zoom(direction, e.x, e.y)
+                elif horizontal:
+                    view.scroll(direction * config.UI_SCROLL_STEP, 0)
+                else:
+                    view.scroll(0, direction * config.UI_SCROLL_STEP)
 
     def handle_attack(self, e):
         """
@@ -240,11 +354,89 @@ class Presenter:
         e : any
             Event object provided by the event handler
         """
+        if self.thinking:
+            return
+
         x, y = self.get_field_index(config.UI_ENEMY, e.x, e.y)
-        action = self.game.attack(self.enemy, x, y)
-        if action:
-            self.canvas.itemconfig('current', fill=config.UI_DISPLAY_MAP[config.UI_ENEMY][action])
-        self.game.ai_step()
+        self.game.attack(self.enemy, x, y)
+        self.start_ai()
+
+    def start_ai(self):
+        """
+        Let computer player choose its move in worker thread if it is on the move
+
+        Only in single player mode, computer player attacks game field of the hero
+        """
+
+        if self.game_settings[config.GAME_MODE_KEY] != config.GAME_MODE_SINGLE \
+                or not self.game.can_attack(config.HERO_KEY):
+            return
+
+        self.thinking = True
+        self.set_status(config.UI_AI_THINKING_TEXT)
+        worker = threading.Thread(target=self.run_ai, args=(self.game.get_ai(config.HERO_KEY),), daemon=True)
+        worker.start()
+        self.poll_id = self.window.after(config.UI_AI_POLL_INTERVAL, self.poll_ai)
+
+    def run_ai(self, ai):
+        """
+        Choose move of computer player, runs in worker thread
+
+        Game is not changed while computer player is thinking, result (or raised exception) is passed through the queue.
+        Running cProfile capture (F12) includes the choice of the move.
+
+        Parameters
+        ----------
+        ai : RandomAI | HuntTargetAI | MonteCarloAI
+            Computer player
+        """
+
+        try:
+            start = time.perf_counter() if METRICS.enabled else None
+            with METRICS.profile_thread():
+                move = ai.choose()
+            if start is not None:
+                METRICS.observe('ai_choose', start)
+            self.ai_results.put(move)
+        except Exception as err:
+            self.ai_results.put(err)
+
+    def poll_ai(self):
+        """
+        Perform move chosen by computer player when it is ready, otherwise check again later
+
+        Exception raised by computer player is displayed in the status bar and the hero can continue
+        """
+
+        self.poll_id = None
+        try:
+            result = self.ai_results.get_nowait()
+        except queue.Empty:
+            self.poll_id = self.window.after(config.UI_AI_POLL_INTERVAL, self.poll_ai)
+            return
+
+        self.thinking = False
+        if isinstance(result, Exception):
+            self.set_err(config.UI_AI_ERROR_TEXT.format(result))
+            return
+
+        x, y = result
+        self.game.attack(config.HERO_KEY, x, y)
+        self.start_ai()
+
+    def handle_destroy(self, e):
+        """
+        Callback function for destroy event handler, cancels scheduled poll of computer player
+
+        Parameters
+        ----------
+        e : any
+            Event object provided by the event handler, children of the window are destroyed with own events
+        """
+
+        if e.widget is self.window and self.poll_id is not None:
+            self.window.after_cancel(self.poll_id)
+            self.poll_id = None
 
     def get_field_index(self, name, x, y):
         """
@@ -266,10 +458,7 @@ class Presenter:
         y : int
             Y index of field in canvas
         """
-        start_x, start_y = self.get_starting_position(name)
-        field_x = (x - start_x) // (config.BLOCK_DIMENSION + config.BLOCK_PADDING)
-        field_y = (y - start_y) // (config.BLOCK_DIMENSION + config.BLOCK_PADDING)
-        return field_x, field_y
+        return self.views[name].field_index(x, y)
 
     def end_screen(self, state):
         """
@@ -0,0 +1,593 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Network server hosting many concurrent matches on one asyncio event loop
+
+Protocol is line based, every message is one line of words separated by spaces.
+
+Client to server:
+    JOIN                    wait for opponent, match starts when another client joins
+    A x y                   attack field x, y of the opponent
+    LIST                    ask for ids of running matches
+    WATCH id                watch the match as spectator
+    QUIT                    leave the server (the opponent wins the match)
+
+Server to client:
+    M plan_x plan_y ship block cells
+                            match started, cells are digits of own game plan row by row
+    T 1|0                   client is (1) or isn't (0) on the move
+    R 1|0 x y action        result of attack of the client (1) or of the opponent (0), action is config.IS_*
+    S 1|0 x y x1 y1 x2 y2 ...
+                            attack on x, y sank the ship with parts on x1, y1, x2, y2, ...
+    G 1|0                   game over, client won (1) or lost (0)
+    L id1 id2 ...           ids of running matches
+    E message               command was not performed, after attack followed by T with the current turn
+
+Server to spectator, players are 1 (hero) and 2 (enemy), turn is the player on the move (0 after the end):
+    V id plan_x plan_y ship block hero_cells enemy_cells turn
+                            snapshot of the match, game plans show only results of attacks
+    D player x y action turn
+                            game plan of the player was attacked
+    K player x y x1 y1 x2 y2 ...
+                            attack on x, y sank the ship of the player
+    W player                game over, the player won
+
+Clients see only their own game plan and results of attacks, never ships of the opponent.
+Every move is encoded once for all spectators, spectators which don't read fast enough are disconnected.
+
+Usage: python Server.py --port 8765
+"""
+
+import argparse
+import asyncio
+import random
+import signal
+
+import config
+from Game import Game, opponent
+from GameStore import encode_field
+from Metrics import METRICS
+
+# Numbers of players in messages to spectators
+PLAYER_NUMBERS = {config.HERO_KEY: 1, config.ENEMY_KEY: 2, None: 0}
+
+# Hides ships in game plans sent to spectators
+HIDE_SHIPS = str.maketrans(str(config.IS_SHIP), str(config.IS_WATTER))
+
+
+def encode(*words):
+    """
+    Encode message to one line of the protocol
+
+    Parameters
+    ----------
+    words : list
+        Words of the message
+
+    Returns
+    -------
+    bytes
+    """
+
+    return (' '.join(str(word) for word in words) + '\n').encode()
+
+
+class Player:
+    """
+    Client connected to the server
+
+
+    Attributes
+    ----------
+    reader : asyncio.StreamReader
+        Incoming stream of the client
+    writer : asyncio.StreamWriter
+        Outgoing stream of the client
+    name : str | None
+        Key of game plan of the client in the match
+    match : Match | None
+        Match played by the client
+    watching : Match | None
+        Match watched by the client
+
+    Methods
+    -------
+    send(message)
+        Write encoded message to the client
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Constructor of Player class
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Incoming stream of the client
+        writer : asyncio.StreamWriter
+            Outgoing stream of the client
+        """
+
+        self.reader = reader
+        self.writer = writer
+        self.name = None
+        self.match = None
+        self.watching = None
+
+    def send(self, message):
+        """
+        Write encoded message to the client, the message is buffered until the connection is ready
+
+        Parameters
+        ----------
+        message : bytes
+            Encoded message
+        """
+
+        if not self.writer.is_closing():
+            self.writer.write(message)
+
+
+class Match:
+    """
+    Match of two connected clients
+
+    Match is subscriber of its game, events are translated to messages for each client.
+    Message for spectators is encoded once per event and the same bytes are written to all of them.
+
+
+    Attributes
+    ----------
+    id : int
+        Id of the match
+    server : Server
+        Server hosting the match
+    players : dict
+        Player for each key of game plan
+    game : Game
+        Game of the match, kept only in memory
+    spectators : set
+        Clients watching the match
+    snapshot : bytes | None
+        Encoded snapshot for new spectators, None when it has to be encoded again
+
+    Methods
+    -------
+    start()
+        Send game plans and the turn to clients
+    attack(player, x, y)
+        Perform attack of the player
+    leave(player)
+        End the match because the player left
+    watch(player)
+        Send snapshot to the client and add it to spectators
+    unwatch(player)
+        Remove the client from spectators
+    broadcast(message)
+        Write the message to all spectators, slow spectators are disconnected
+    get_snapshot()
+        Return encoded snapshot of the match
+    handle_event(event)
+        Send the event to clients
+    """
+
+    def __init__(self, match_id, server, hero, enemy, settings=None, rng=None):
+        """
+        Constructor of Match class
+
+        Parameters
+        ----------
+        match_id : int
+            Id of the match
+        server : Server
+            Server hosting the match
+        hero : Player
+            Client playing with hero's game plan
+        enemy : Player
+            Client playing with enemy's game plan
+        settings : dict
+            Optional, values overriding default settings
+        rng : random.Random
+            Optional, source of randomness used for game plans
+        """
+
+        self.id = match_id
+        self.server = server
+        self.players = {config.HERO_KEY: hero, config.ENEMY_KEY: enemy}
+        self.game = Game.new_game(config.GAME_MODE_MULTI, settings, rng=rng)
+        self.spectators = set()
+        self.snapshot = None
+        self.game.subscribe(self.handle_event, [config.EVENT_ATTACK, config.EVENT_SUNK, config.EVENT_TURN,
+                                                config.EVENT_GAME_OVER, config.EVENT_ERROR])
+        for name, player in self.players.items():
+            player.name = name
+            player.match = self
+
+    def start(self):
+        """
+        Send game plans and the turn to clients
+        """
+
+        settings = self.game.game_settings
+        for name, player in self.players.items():
+            player.send(encode('M', settings[config.GAME_PLAN_X_KEY], settings[config.GAME_PLAN_Y_KEY],
+                               settings[config.GAME_SHIP_KEY], settings[config.GAME_SHIP_BLOCK_KEY],
+                               encode_field(self.game.dh.get_data(name))))
+        self.game.evaluate_game()
+
+    def attack(self, player, x, y):
+        """
+        Perform attack of the player
+
+        Parameters
+        ----------
+        player : Player
+            Attacking client
+        x : int
+            X coortinate of the field of the opponent
+        y : int
+            Y coortinate of the field of the opponent
+        """
+
+        self.game.attack(opponent(player.name), x, y)
+
+    def leave(self, player):
+        """
+        End the match because the player left, the opponent wins
+
+        Parameters
+        ----------
+        player : Player
+            Client which left
+        """
+
+        other = self.players[opponent(player.name)]
+        other.send(encode('G', 1))
+        self.broadcast(encode('W', PLAYER_NUMBERS[other.name]))
+        self.server.finish(self)
+
+    def watch(self, player):
+        """
+        Send snapshot to the client and add it to spectators
+
+        Parameters
+        ----------
+        player : Player
+            Client watching the match
+        """
+
+        player.send(self.get_snapshot())
+        player.watching = self
+        self.spectators.add(player)
+
+    def unwatch(self, player):
+        """
+        Remove the client from spectators
+
+        Parameters
+        ----------
+        player : Player
+            Client watching the match
+        """
+
+        self.spectators.discard(player)
+        player.watching = None
+
+    def broadcast(self, message):
+        """
+        Write the message to all spectators
+
+        Spectators with more than config.SERVER_SPECTATOR_BUFFER bytes waiting for sending are disconnected,
+        so slow spectators don't hold memory of the server
+
+        Parameters
+        ----------
+        message : bytes
+            Encoded message
+        """
+
+        for player in list(self.spectators):
+            if player.writer.transport.get_write_buffer_size() > config.SERVER_SPECTATOR_BUFFER:
+                self.unwatch(player)
+                player.writer.close()
+            else:
+                player.send(message)
+
+    def get_snapshot(self):
+        """
+        Return encoded snapshot of the match, it is encoded once for all spectators joining between two moves
+
+        Returns
+        -------
+        bytes
+        """
+
+        if self.snapshot is None:
+            settings = self.game.game_settings
+            self.snapshot = encode('V', self.id, settings[config.GAME_PLAN_X_KEY], settings[config.GAME_PLAN_Y_KEY],
+                                   settings[config.GAME_SHIP_KEY], settings[config.GAME_SHIP_BLOCK_KEY],
+                                   encode_field(self.game.dh.get_data(config.HERO_KEY)).translate(HIDE_SHIPS),
+                                   encode_field(self.game.dh.get_data(config.ENEMY_KEY)).translate(HIDE_SHIPS),
+                                   PLAYER_NUMBERS[self.game.whose_turn()])
+        return self.snapshot
+
+    def handle_event(self, event):
+        """
+        Send the event to clients
+
+        Message for spectators is encoded once and the same bytes are written to all of them
+
+        Parameters
+        ----------
+        event : Event
+            Event published by the game
+        """
+
+        if event.kind == config.EVENT_ATTACK:
+            attacker = opponent(event.name)
+            for name, player in self.players.items():
+                player.send(encode('R', int(name == attacker), event.x, event.y, event.action))
+            self.snapshot = None
+            if self.spectators:
+                self.broadcast(encode('D', PLAYER_NUMBERS[event.name], event.x, event.y, event.action,
+                                      PLAYER_NUMBERS[self.game.whose_turn()]))
+        elif event.kind == config.EVENT_SUNK:
+            attacker = opponent(event.name)
+            cells = ' '.join('{} {}'.format(x, y) for x, y in event.cells)
+            for name, player in self.players.items():
+                player.send(encode('S', int(name == attacker), event.x, event.y, cells))
+            if self.spectators:
+                self.broadcast(encode('K', PLAYER_NUMBERS[event.name], event.x, event.y, cells))
+        elif event.kind == config.EVENT_TURN:
+            if self.game.whose_turn() is not None:
+                for name, player in self.players.items():
+                    player.send(encode('T', int(name == event.player)))
+        elif event.kind == config.EVENT_GAME_OVER:
+            for name, player in self.players.items():
+                player.send(encode('G', int(name == event.winner)))
+            self.broadcast(encode('W', PLAYER_NUMBERS[event.winner]))
+            self.server.finish(self)
+        elif event.kind == config.EVENT_ERROR:
+            player = self.players[event.player]
+            player.send(encode('E', event.message))
+            player.send(encode('T', int(self.game.whose_turn() == event.player)))
+
+
+class Server:
+    """
+    Server hosting many concurrent matches
+
+    Clients are paired to matches in order of joining.
+
+
+    Attributes
+    ----------
+    host : str
+        Address of the server
+    port : int
+        Port of the server, 0 selects free port
+    settings : dict
+        Values overriding default settings of all matches
+    rng : random.Random
+        Source of randomness used for game plans
+    waiting : Player | None
+        Client waiting for an opponent
+    matches : dict
+        Running matches by id
+    next_id : int
+        Id of the next match
+    finished : int
+        Count of finished matches
+    server : asyncio.AbstractServer | None
+        Listening server
+
+    Methods
+    -------
+    start()
+        Start listening
+    close()
+        Stop listening and wait until it is closed
+    handle_client(reader, writer)
+        Serve one connected client
+    handle_command(player, words)
+        Perform one command of the client
+    join(player)
+        Pair the client with waiting client or let it wait
+    finish(match)
+        Remove finished match
+    """
+
+    def __init__(self, host=config.SERVER_HOST, port=config.SERVER_PORT, settings=None, rng=None):
+        """
+        Constructor of Server class
+
+        Parameters
+        ----------
+        host : str
+            Optional, address of the server
+        port : int
+            Optional, port of the server, 0 selects free port
+        settings : dict
+            Optional, values overriding default settings of all matches
+        rng : random.Random
+            Optional, source of randomness used for game plans
+        """
+
+        self.host = host
+        self.port = port
+        self.settings = settings
+        self.rng = rng if rng is not None else random.Random()
+        self.waiting = None
+        self.matches = {}
+        self.next_id = 1
+        self.finished = 0
+        self.server = None
+
+    async def start(self):
+        """
+        Start listening, self.port is set to the real port
+        """
+
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                                 backlog=config.SERVER_BACKLOG)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """
+        Stop listening and wait until it is closed
+        """
+
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        """
+        Serve one connected client
+
+        Commands are performed one by one, next command is read when all replies were sent (backpressure)
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            Incoming stream of the client
+        writer : asyncio.StreamWriter
+            Outgoing stream of the client
+        """
+
+        player = Player(reader, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors='replace').split()
+                if words and words[0] == 'QUIT':
+                    break
+                self.handle_command(player, words)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if self.waiting is player:
+                self.waiting = None
+            if player.match is not None:
+                player.match.leave(player)
+            if player.watching is not None:
+                player.watching.unwatch(player)
+            writer.close()
+
+    def handle_command(self, player, words):
+        """
+        Perform one command of the client
+
+        Parameters
+        ----------
+        player : Player
+            Client sending the command
+        words : list
+            Words of the command
+        """
+
+        free = player.match is None and player.watching is None and self.waiting is not player
+        if words == ['JOIN'] and free:
+            self.join(player)
+        elif len(words) == 3 and words[0] == 'A' and player.match is not None:
+            try:
+                x, y = int(words[1]), int(words[2])
+            except ValueError:
+                player.send(encode('E', config.SERVER_INVALID_COMMAND))
+                return
+            player.match.attack(player, x, y)
+        elif words == ['LIST']:
+            player.send(encode('L', *self.matches))
+        elif len(words) == 2 and words[0] == 'WATCH' and free:
+            match = self.matches.get(int(words[1])) if words[1].isdigit() else None
+            if match is None:
+                player.send(encode('E', config.SERVER_UNKNOWN_MATCH))
+            else:
+                match.watch(player)
+        else:
+            player.send(encode('E', config.SERVER_INVALID_COMMAND))
+
+    def join(self, player):
+        """
+        Pair the client with waiting client or let it wait
+
+        Parameters
+        ----------
+        player : Player
+            Joining client
+        """
+
+        if self.waiting is None:
+            self.waiting = player
+            return
+
+        match = Match(self.next_id, self, self.waiting, player, self.settings, random.Random(self.rng.random()))
+        self.next_id += 1
+        self.waiting = None
+        self.matches[match.id] = match
+        match.start()
+
+    def finish(self, match):
+        """
+        Remove finished match, clients and spectators may join again
+
+        Parameters
+        ----------
+        match : Match
+            Finished match
+        """
+
+        if self.matches.get(match.id) is match:
+            del self.matches[match.id]
+            self.finished += 1
+            for player in match.players.values():
+                player.match = None
+            for player in list(match.spectators):
+                match.unwatch(player)
+
+
+async def serve(host, port):
+    """
+    Run the server until it is interrupted, signal SIGUSR1 starts or stops cProfile capture
+
+    Parameters
+    ----------
+    host : str
+        Address of the server
+    port : int
+        Port of the server
+    """
+
+    server = Server(host, port)
+    await server.start()
+    if hasattr(signal, 'SIGUSR1'):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, METRICS.toggle_profile)
+    print('Listening on {}:{}'.format(server.host, server.port))
+    async with server.server:
+        await server.server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Host matches of network players')
+    parser.add_argument('--host', default=config.SERVER_HOST, help='address of the server')
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT, help='port of the server')
+    parser.add_argument('--metrics', default=None, help='file for periodical dump of instrumentation of moves')
+    parser.add_argument('--metrics-format', default=config.METRICS_FORMAT,
+                        choices=[config.METRICS_FORMAT_JSON, config.METRICS_FORMAT_PROMETHEUS],
+                        help='format of the dump')
+    parser.add_argument('--metrics-interval', type=float, default=config.METRICS_INTERVAL,
+                        help='seconds between dumps')
+    args = parser.parse_args()
+    if args.metrics is not None:
+        METRICS.enable()
+        METRICS.start_dump(args.metrics, args.metrics_interval, args.metrics_format)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        METRICS.stop_dump()
+        METRICS.stop_profile()
@@ -0,0 +1,203 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Batch simulator of games played by AI against AI
+
+Games run without user interface and files, spread across a pool of processes.
+Result of every game is written as one JSON line as soon as the game is finished.
+
+Usage: python Simulator.py --games 1000 --seed 42 --output results.jsonl
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import config
+from AI import DIFFICULTIES
+from Game import Game, opponent
+
+
+def game_seed(seed, index):
+    """
+    Return seed of one game
+
+    Seed depends only on base seed and index of the game, so results don't depend on count of processes
+
+    Parameters
+    ----------
+    seed : int
+        Base seed of the simulation
+    index : int
+        Index of the game
+
+    Returns
+    -------
+    str
+    """
+
+    return '{}:{}'.format(seed, index)
+
+
+def play_game(task):
+    """
+    Play one game AI against AI
+
+    Parameters
+    ----------
+    task : tuple
+        (index, seed, settings, players) - index of the game, base seed, values overriding default settings
+        and difficulty of computer player for each player key
+
+    Returns
+    -------
+    dict
+        Result of the game
+    """
+
+    index, seed, settings, players = task
+    rng = random.Random(game_seed(seed, index))
+
+    start = time.perf_counter()
+    game = Game.new_game(config.GAME_MODE_MULTI, settings, rng=rng)
+    ai = {player: game.get_ai(opponent(player), players[player]) for player in players}
+    setup = time.perf_counter() - start
+
+    shots = {config.HERO_KEY: 0, config.ENEMY_KEY: 0}
+    hits = {config.HERO_KEY: 0, config.ENEMY_KEY: 0}
+    move_time = 0.0
+    player = game.whose_turn()
+    while player is not None:
+        move_start = time.perf_counter()
+        x, y = ai[player].choose()
+        action = game.attack(opponent(player), x, y)
+        move_time += time.perf_counter() - move_start
+
+        shots[player] += 1
+        if action == config.IS_HIT:
+            hits[player] += 1
+        player = game.whose_turn()
+
+    moves = shots[config.HERO_KEY] + shots[config.ENEMY_KEY]
+    winner = game.winner()
+    return {
+        'game': index,
+        'seed': game_seed(seed, index),
+        'players': players,
+        'winner': winner,
+        'moves_to_win': shots[winner],
+        'moves': moves,
+        'shots': shots,
+        'hits': hits,
+        'setup_time': setup,
+        'move_time': move_time / moves if moves else 0.0,
+        'time': time.perf_counter() - start,
+    }
+
+
+def simulate(games, seed=0, settings=None, players=None, processes=None, chunksize=16):
+    """
+    Play games in pool of processes and yield their results in order of finishing
+
+    Parameters
+    ----------
+    games : int
+        Count of games
+    seed : int
+        Optional, base seed of the simulation
+    settings : dict
+        Optional, values overriding default settings
+    players : dict
+        Optional, difficulty of computer player for each player key, config.GAME_DIFFICULTY by default
+    processes : int
+        Optional, count of processes, count of CPUs by default
+    chunksize : int
+        Optional, count of games sent to process at once
+
+    Returns
+    -------
+    generator
+        Results of games as returned by play_game()
+    """
+
+    if players is None:
+        players = {config.HERO_KEY: config.GAME_DIFFICULTY, config.ENEMY_KEY: config.GAME_DIFFICULTY}
+    tasks = ((index, seed, settings, players) for index in range(games))
+    if processes == 1:
+        for task in tasks:
+            yield play_game(task)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap_unordered(play_game, tasks, chunksize):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def main(argv=None):
+    """
+    Run the simulator from command line
+
+    Parameters
+    ----------
+    argv : list
+        Optional, command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description='Play games AI against AI')
+    parser.add_argument('--games', type=int, default=100, help='count of games')
+    parser.add_argument('--seed', type=int, default=0, help='base seed, same seed plays same games')
+    parser.add_argument('--processes', type=int, default=None, help='count of processes (default: count of CPUs)')
+    parser.add_argument('--chunksize', type=int, default=16, help='count of games sent to process at once')
+    parser.add_argument('--plan-x', type=int, default=config.GAME_PLAN_X, help='count of columns')
+    parser.add_argument('--plan-y', type=int, default=config.GAME_PLAN_Y, help='count of rows')
+    parser.add_argument('--ship', type=int, default=config.GAME_SHIP, help='count of ships')
+    parser.add_argument('--block', type=int, default=config.GAME_SHIP_BLOCK, help='count of ship blocks')
+    parser.add_argument('--backend', default=config.GAME_BACKEND, help='backend of game plans')
+    parser.add_argument('--hero', default=config.GAME_DIFFICULTY, choices=sorted(DIFFICULTIES),
+                        help='difficulty of computer player of hero')
+    parser.add_argument('--enemy', default=config.GAME_DIFFICULTY, choices=sorted(DIFFICULTIES),
+                        help='difficulty of computer player of enemy')
+    parser.add_argument('--output', default=None, help='file for results (default: standard output)')
+    args = parser.parse_args(argv)
+    if args.ship < 1 or args.block < args.ship:
+        parser.error('fleet needs at least one ship and at least one block for each ship')
+
+    settings = {
+        config.GAME_PLAN_X_KEY: args.plan_x,
+        config.GAME_PLAN_Y_KEY: args.plan_y,
+        config.GAME_SHIP_KEY: args.ship,
+        config.GAME_SHIP_BLOCK_KEY: args.block,
+        config.GAME_BACKEND_KEY: args.backend,
+    }
+
+    players = {config.HERO_KEY: args.hero, config.ENEMY_KEY: args.enemy}
+
+    output = sys.stdout if args.output is None else open(args.output, 'w')
+    wins = {config.HERO_KEY: 0, config.ENEMY_KEY: 0}
+    moves = 0
+    start = time.perf_counter()
+    try:
+        for result in simulate(args.games, args.seed, settings, players, args.processes, args.chunksize):
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+            wins[result['winner']] += 1
+            moves += result['moves']
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    duration = time.perf_counter() - start
+    print('games: {}, wins: {}, moves per game: {:.2f}, games per second: {:.1f}'.format(
+        args.games, wins, moves / max(args.games, 1), args.games / duration), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,539 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tournament of computer players in round robin or Swiss format
+
+Boards of all rounds are generated once and shared by all games of the round, every pair of players
+plays each board twice with swapped sides. Games run in pool of processes, result of every game is appended
+to the results file as soon as it is finished, so interrupted tournament continues where it stopped.
+The first line of the results file describes the tournament, it continues only with the same seed, format,
+players and settings (count of rounds can be changed).
+Table with Elo rating and win rate is printed after every round.
+
+Usage: python Tournament.py --format swiss --rounds 20 --seed 42 --results tournament.jsonl
+"""
+
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import random
+import sys
+
+import config
+from AI import DIFFICULTIES
+from DataHandler import DataHandler, write_atomic
+from Game import Game, opponent
+from GameBuilder import GameBuilder
+from Simulator import game_seed
+
+# Boards of the tournament in worker process
+BOARDS = None
+
+
+def create_boards(count, seed=0, settings=None):
+    """
+    Generate boards for all rounds of the tournament
+
+    Parameters
+    ----------
+    count : int
+        Count of boards
+    seed : int
+        Optional, base seed of the tournament
+    settings : dict
+        Optional, values overriding default settings
+
+    Returns
+    -------
+    list
+        Templates of games with both game plans
+    """
+
+    boards = []
+    for index in range(count):
+        builder = GameBuilder(random.Random('board:' + game_seed(seed, index)))
+        builder.create_settings()
+        builder.create_initial_state()
+        builder.template[config.SETTINGS_KEY][config.GAME_MODE_KEY] = config.GAME_MODE_MULTI
+        if settings:
+            builder.template[config.SETTINGS_KEY].update(settings)
+        builder.create_game_plan(config.HERO_KEY)
+        builder.create_game_plan(config.ENEMY_KEY)
+        boards.append(builder.template)
+    return boards
+
+
+def init_worker(boards):
+    """
+    Store boards of the tournament in worker process
+
+    Parameters
+    ----------
+    boards : list
+        Templates of games returned by create_boards()
+    """
+
+    global BOARDS
+    BOARDS = boards
+
+
+def play_game(task):
+    """
+    Play one game of the tournament on the shared board
+
+    Parameters
+    ----------
+    task : tuple
+        (game, round, hero, enemy, seed) - id of the game, index of the round (and of its board),
+        players of hero's and enemy's game plan and base seed
+
+    Returns
+    -------
+    dict
+        Result of the game
+    """
+
+    game_id, round_index, hero, enemy, seed = task
+    game = Game(DataHandler(None, copy.deepcopy(BOARDS[round_index])), rng=random.Random(game_seed(seed, game_id)))
+    players = {config.HERO_KEY: hero, config.ENEMY_KEY: enemy}
+    ai = {player: game.get_ai(opponent(player), players[player]) for player in players}
+
+    moves = 0
+    player = game.whose_turn()
+    while player is not None:
+        x, y = ai[player].choose()
+        game.attack(opponent(player), x, y)
+        moves += 1
+        player = game.whose_turn()
+
+    return {
+        'game': game_id,
+        'round': round_index,
+        'hero': hero,
+        'enemy': enemy,
+        'winner': players[game.winner()],
+        'moves': moves,
+    }
+
+
+def expected_score(rating, other):
+    """
+    Return expected score of player with `rating` against player with `other` rating
+
+    Parameters
+    ----------
+    rating : float
+        Elo rating of the player
+    other : float
+        Elo rating of the opponent
+
+    Returns
+    -------
+    float
+    """
+
+    return 1 / (1 + 10 ** ((other - rating) / 400))
+
+
+class Standings:
+    """
+    Elo ratings and win rates of players updated game by game
+
+
+    Attributes
+    ----------
+    players : list
+        Names of players
+    ratings : dict
+        Elo rating of each player
+    games : dict
+        Count of played games of each player
+    wins : dict
+        Count of won games of each player
+    played : set
+        Pairs of players which already played together
+
+    Methods
+    -------
+    add(result)
+        Update standings with result of one game
+    table()
+        Return rows of the table ordered by rating
+    format_table()
+        Return the table as text
+    """
+
+    def __init__(self, players):
+        """
+        Constructor of Standings class
+
+        Parameters
+        ----------
+        players : list
+            Names of players
+        """
+
+        self.players = list(players)
+        self.ratings = {player: float(config.TOURNAMENT_ELO) for player in players}
+        self.games = {player: 0 for player in players}
+        self.wins = {player: 0 for player in players}
+        self.played = set()
+
+    def add(self, result):
+        """
+        Update standings with result of one game
+
+        Parameters
+        ----------
+        result : dict
+            Result of the game returned by play_game()
+        """
+
+        winner = result['winner']
+        loser = result['enemy'] if winner == result['hero'] else result['hero']
+        change = config.TOURNAMENT_ELO_K * (1 - expected_score(self.ratings[winner], self.ratings[loser]))
+        self.ratings[winner] += change
+        self.ratings[loser] -= change
+        self.games[winner] += 1
+        self.games[loser] += 1
+        self.wins[winner] += 1
+        self.played.add(frozenset((winner, loser)))
+
+    def table(self):
+        """
+        Return rows of the table ordered by rating
+
+        Returns
+        -------
+        list
+            Dictionaries with player, rating, games, wins and win rate
+        """
+
+        rows = [{
+            'player': player,
+            'elo': round(self.ratings[player], 1),
+            'games': self.games[player],
+            'wins': self.wins[player],
+            'win_rate': round(self.wins[player] / max(self.games[player], 1), 4),
+        } for player in self.players]
+        return sorted(rows, key=lambda row: (-row['elo'], row['player']))
+
+    def format_table(self):
+        """
+        Return the table as text
+
+        Returns
+        -------
+        str
+        """
+
+        lines = ['{:>4} {:<12} {:>8} {:>7} {:>7} {:>8}'.format('#', 'player', 'elo', 'games', 'wins', 'win rate')]
+        for rank, row in enumerate(self.table(), 1):
+            lines.append('{:>4} {:<12} {:>8.1f} {:>7} {:>7} {:>8.1%}'.format(
+                rank, row['player'], row['elo'], row['games'], row['wins'], row['win_rate']))
+        return '\n'.join(lines)
+
+
+def round_robin_pairings(players, standings):
+    """
+    Return pairs of players of one round of round robin, every player plays with all others
+
+    Parameters
+    ----------
+    players : list
+        Names of players
+    standings : Standings
+        Current standings, not used
+
+    Returns
+    -------
+    list
+        List of (player, player) pairs
+    """
+
+    return [(players[i], players[j]) for i in range(len(players)) for j in range(i + 1, len(players))]
+
+
+def swiss_pairings(players, standings):
+    """
+    Return pairs of players of one round of Swiss system
+
+    Players are ordered by wins and rating, each is paired with the nearest following player
+    it didn't play with yet (or the nearest one if it already played with all). With odd count of players
+    the last one has no opponent.
+
+    Parameters
+    ----------
+    players : list
+        Names of players
+    standings : Standings
+        Current standings
+
+    Returns
+    -------
+    list
+        List of (player, player) pairs
+    """
+
+    order = sorted(players, key=lambda player: (-standings.wins[player], -standings.ratings[player], player))
+    pairs = []
+    while len(order) > 1:
+        player = order.pop(0)
+        candidates = [other for other in order if frozenset((player, other)) not in standings.played]
+        other = candidates[0] if candidates else order[0]
+        order.remove(other)
+        pairs.append((player, other))
+    return pairs
+
+
+PAIRINGS = {
+    config.TOURNAMENT_ROUND_ROBIN: round_robin_pairings,
+    config.TOURNAMENT_SWISS: swiss_pairings,
+}
+
+
+def round_tasks(round_index, pairs, seed):
+    """
+    Return games of one round, each pair plays the board of the round twice with swapped sides
+
+    Parameters
+    ----------
+    round_index : int
+        Index of the round
+    pairs : list
+        List of (player, player) pairs
+    seed : int
+        Base seed of the tournament
+
+    Returns
+    -------
+    list
+        Tasks for play_game()
+    """
+
+    tasks = []
+    for first, second in pairs:
+        for hero, enemy in [(first, second), (second, first)]:
+            tasks.append(('{}:{}:{}'.format(round_index, hero, enemy), round_index, hero, enemy, seed))
+    return tasks
+
+
+def tournament_header(players, tournament_format, seed, settings):
+    """
+    Return header record of the results file describing the tournament
+
+    Parameters
+    ----------
+    players : list
+        Keys of computer players
+    tournament_format : str
+        config.TOURNAMENT_ROUND_ROBIN or config.TOURNAMENT_SWISS
+    seed : int
+        Base seed of boards and computer players
+    settings : dict
+        Values overriding default settings
+
+    Returns
+    -------
+    dict
+        Record as it is read back from JSON
+    """
+
+    return json.loads(json.dumps({'tournament': {
+        'seed': seed,
+        'format': tournament_format,
+        'players': list(players),
+        'settings': settings or {},
+    }}))
+
+
+def load_results(filename):
+    """
+    Load header and results of finished games, unfinished last line of interrupted tournament is ignored
+
+    Parameters
+    ----------
+    filename : str
+        Name of results file
+
+    Returns
+    -------
+    tuple
+        (header, results) - header record (None if the file has none) and result for each id of game
+    """
+
+    header = None
+    results = {}
+    if filename is None or not os.path.exists(filename):
+        return header, results
+
+    with open(filename) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'tournament' in record:
+                if header is None:
+                    header = record
+            else:
+                results[record['game']] = record
+    return header, results
+
+
+def ends_with_newline(filename):
+    """
+    Check if the last line of the file is complete
+
+    Parameters
+    ----------
+    filename : str
+        Name of file
+
+    Returns
+    -------
+    bool
+    """
+
+    with open(filename, 'rb') as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b'\n'
+
+
+def run_tournament(players, tournament_format=config.TOURNAMENT_ROUND_ROBIN, rounds=10, seed=0, settings=None,
+                   processes=None, results_file=None, table_file=None, output=sys.stderr):
+    """
+    Run the tournament, results already stored in the results file are not played again
+
+    Parameters
+    ----------
+    players : list
+        Keys of computer players (see AI.DIFFICULTIES)
+    tournament_format : str
+        Optional, config.TOURNAMENT_ROUND_ROBIN or config.TOURNAMENT_SWISS
+    rounds : int
+        Optional, count of rounds
+    seed : int
+        Optional, base seed of boards and computer players
+    settings : dict
+        Optional, values overriding default settings
+    processes : int
+        Optional, count of processes, count of CPUs by default
+    results_file : str
+        Optional, file for results of games, results are kept only in memory without it
+    table_file : str
+        Optional, file rewritten with JSON table after every round
+    output : file
+        Optional, file for table printed after every round
+
+    Raises
+    ------
+    ValueError
+        If the results file belongs to other tournament
+
+    Returns
+    -------
+    Standings
+        Final standings
+    """
+
+    header = tournament_header(players, tournament_format, seed, settings)
+    stored, results = load_results(results_file)
+    if stored is None and results:
+        raise ValueError('Results file {} has no header of the tournament'.format(results_file))
+    if stored is not None and stored != header:
+        raise ValueError('Results file {} belongs to other tournament: {}'.format(
+            results_file, json.dumps(stored['tournament'])))
+
+    standings = Standings(players)
+    boards = create_boards(rounds, seed, settings)
+
+    pool = None
+    if processes != 1:
+        pool = multiprocessing.Pool(processes, init_worker, (boards,))
+    else:
+        init_worker(boards)
+
+    file = None
+    if results_file is not None:
+        file = open(results_file, 'a')
+        if file.tell() > 0 and not ends_with_newline(results_file):
+            file.write('\n')
+        if stored is None:
+            file.write(json.dumps(header) + '\n')
+            file.flush()
+    try:
+        for round_index in range(rounds):
+            tasks = round_tasks(round_index, PAIRINGS[tournament_format](players, standings), seed)
+            pending = [task for task in tasks if task[0] not in results]
+            finished = pool.imap_unordered(play_game, pending) if pool is not None else map(play_game, pending)
+            for result in finished:
+                results[result['game']] = result
+                if file is not None:
+                    file.write(json.dumps(result) + '\n')
+                    file.flush()
+
+            for task in sorted(tasks):
+                standings.add(results[task[0]])
+
+            print('round {}/{}'.format(round_index + 1, rounds), file=output)
+            print(standings.format_table(), file=output)
+            if table_file is not None:
+                write_atomic(table_file, json.dumps({'round': round_index + 1, 'table': standings.table()}, indent=2))
+    finally:
+        if file is not None:
+            file.close()
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    return standings
+
+
+def main(argv=None):
+    """
+    Run the tournament from command line
+
+    Parameters
+    ----------
+    argv : list
+        Optional, command line arguments
+    """
+
+    parser = argparse.ArgumentParser(description='Tournament of computer players')
+    parser.add_argument('--players', nargs='+', default=sorted(DIFFICULTIES), choices=sorted(DIFFICULTIES),
+                        help='computer players in the tournament')
+    parser.add_argument('--format', default=config.TOURNAMENT_ROUND_ROBIN, choices=sorted(PAIRINGS),
+                        help='pairing of players in rounds')
+    parser.add_argument('--rounds', type=int, default=10, help='count of rounds, each round has own board')
+    parser.add_argument('--seed', type=int, default=0, help='base seed, same seed plays same games')
+    parser.add_argument('--processes', type=int, default=None, help='count of processes (default: count of CPUs)')
+    parser.add_argument('--plan-x', type=int, default=config.GAME_PLAN_X, help='count of columns')
+    parser.add_argument('--plan-y', type=int, default=config.GAME_PLAN_Y, help='count of rows')
+    parser.add_argument('--ship', type=int, default=config.GAME_SHIP, help='count of ships')
+    parser.add_argument('--block', type=int, default=config.GAME_SHIP_BLOCK, help='count of ship blocks')
+    parser.add_argument('--results', default=None, help='file for results of games, tournament continues from it')
+    parser.add_argument('--table', default=None, help='file for JSON table rewritten after every round')
+    args = parser.parse_args(argv)
+    if len(set(args.players)) != len(args.players):
+        parser.error('players must be unique')
+
+    settings = {
+        config.GAME_PLAN_X_KEY: args.plan_x,
+        config.GAME_PLAN_Y_KEY: args.plan_y,
+        config.GAME_SHIP_KEY: args.ship,
+        config.GAME_SHIP_BLOCK_KEY: args.block,
+    }
+
+    try:
+        run_tournament(args.players, args.format, args.rounds, args.seed, settings, args.processes, args.results,
+                       args.table)
+    except ValueError as err:
+        parser.error(str(err))
+
+
+if __name__ == '__main__':
+    main()
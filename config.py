@@ -8,6 +8,17 @@ In this file is all constants used in program
 # Default name of game state file
 GAME_FILE = 'game.json'
 
+# Default name of database with many games
+GAME_STORE_FILE = 'games.sqlite'
+
+# Suffix of journal file next to game state file and number of its records before it is merged to the file
+JOURNAL_SUFFIX = '.journal'
+JOURNAL_COMPACT_RECORDS = 1000
+
+# Deferred writes of game state file, maximal seconds and count of changes between writes
+FLUSH_INTERVAL = 1.0
+FLUSH_STEPS = 50
+
 # Keys of main sections in game state file
 SETTINGS_KEY = 'settings'
 STATE_KEY = 'game_state'
@@ -20,6 +31,8 @@ GAME_PLAN_Y_KEY = 'plan_y'
 GAME_SHIP_KEY = 'ship'
 GAME_SHIP_BLOCK_KEY = 'block'
 GAME_MODE_KEY = 'mode'
+GAME_BACKEND_KEY = 'backend'
+GAME_DIFFICULTY_KEY = 'difficulty'
 
 # Default values used in settings section
 GAME_PLAN_X = 8
@@ -29,6 +42,14 @@ GAME_SHIP_BLOCK = 15
 GAME_MODE_SINGLE = 'single'
 GAME_MODE_MULTI = 'multi'
 GAME_MODE = GAME_MODE_MULTI
+GAME_BACKEND_LIST = 'list'
+GAME_BACKEND_BITS = 'bits'
+GAME_BACKEND_NUMPY = 'numpy'
+GAME_BACKEND = GAME_BACKEND_LIST
+GAME_DIFFICULTY_EASY = 'easy'
+GAME_DIFFICULTY_NORMAL = 'normal'
+GAME_DIFFICULTY_HARD = 'hard'
+GAME_DIFFICULTY = GAME_DIFFICULTY_EASY
 
 # Keys usend in game state section
 ACTUAL_PLAYER_KEY = 'play'
@@ -40,10 +61,58 @@ ACTUAL_PLAYER = HERO_KEY
 GAME_STATE_ACTIVE = 'active'
 GAME_STATE_FINISH = 'finish'
 
+# Events published by the game to its subscribers
+EVENT_ATTACK = 'attack'
+EVENT_ERROR = 'error'
+EVENT_TURN = 'turn'
+EVENT_GAME_OVER = 'game_over'
+EVENT_SUNK = 'sunk'
+
 # Exception error messages
 INVALID_GAME_STEP = 'Invalid game step'
 INVALID_FIELD_DIMENSION = 'Invalid field dimension'
 INVALID_SHIP_COUNT = 'Invalid ship count'
+INVALID_FLEET_SIZE = "Fleet can't be generated for the game plan"
+INVALID_ATTACK_POSITION = 'Attack out of game plan'
+INVALID_BACKEND_NUMPY = 'NumPy is required for {} backend'.format(GAME_BACKEND_NUMPY)
+
+# Network server, address, port, count of pending connections and error messages
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_BACKLOG = 1024
+SERVER_INVALID_COMMAND = 'Invalid command'
+SERVER_UNKNOWN_MATCH = 'Unknown match'
+
+# Bytes waiting for sending to spectator before it is disconnected
+SERVER_SPECTATOR_BUFFER = 65536
+
+# Instrumentation of moves, periodical dump of collected values and file for cProfile statistics
+METRICS_ENABLED = False
+METRICS_FILE = None
+METRICS_FORMAT_JSON = 'json'
+METRICS_FORMAT_PROMETHEUS = 'prometheus'
+METRICS_FORMAT = METRICS_FORMAT_JSON
+METRICS_INTERVAL = 10
+METRICS_PREFIX = 'battleships'
+METRICS_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+PROFILE_FILE = 'game.prof'
+
+# Number of seeds tried for one ship before the fleet is laid along the lane
+FLEET_GROW_ATTEMPTS = 20
+
+# Monte Carlo computer player, maximal count of sampled fleets and time for one move (None for no limit)
+AI_SAMPLES = 400
+AI_SAMPLE_BATCH = 20
+AI_TIME_BUDGET = 0.05
+# Seeds tried for a ship containing hits (for each field of the game plan) and for any other ship of sampled fleet
+AI_HIT_SHIP_ATTEMPTS = 4
+AI_SHIP_ATTEMPTS = 100
+
+# Tournament of computer players, formats, initial rating and K-factor of Elo rating
+TOURNAMENT_ROUND_ROBIN = 'round-robin'
+TOURNAMENT_SWISS = 'swiss'
+TOURNAMENT_ELO = 1500
+TOURNAMENT_ELO_K = 16
 
 # Identifires of game field
 IS_WATTER = 0
@@ -61,6 +130,16 @@ UI_WINDOW_PADDING_LEFT = 40
 FIELD_SPACE = 100
 STATUS_BAR_HEIGHT = 50
 
+# Views of large game plans, distances of fields in pixels for zoom levels,
+# fields closer than UI_IMAGE_PITCH are drawn to image instead of rectangles
+UI_BOARD_VIEW_WIDTH = 300
+UI_BOARD_VIEW_HEIGHT = 300
+UI_ZOOM_LEVELS = (BLOCK_DIMENSION + BLOCK_PADDING, 15, 8, 4, 2, 1, 0.5, 0.25, 0.125, 0.0625)
+UI_IMAGE_PITCH = 8
+# When more fields are drawn to one pixel, the pixel shows the field which is the latest in this order
+UI_IMAGE_PRIORITY = (IS_WATTER, IS_SHIP, IS_MISS, IS_HIT)
+UI_SCROLL_STEP = 90
+
 # Name of UI components
 UI_HERO = 'hero'
 UI_HERO_WINDOW_TITLE = 'Player 1'
@@ -89,6 +168,9 @@ UI_CAN_PLAY_TEXT = "It's your turn"
 UI_CANT_PLAY_TEXT = "Wait for enemy turn"
 UI_CANT_PLAY_ERR_TEXT = "YOU CAN'T PLAY NOW"
 UI_ALLREADY_ATTACK_TEXT = "You have already attacked this field"
+UI_AI_THINKING_TEXT = "Enemy is thinking\u2026"
+UI_AI_ERROR_TEXT = "Enemy failed to choose its move: {}"
+UI_AI_POLL_INTERVAL = 20
 
 # Settings of final screen
 UI_END_SCREEN_WIDTH = 400
@@ -110,5 +192,15 @@ UI_MAIN_MENU_FRAME_WIDTH = 200
 UI_MAIN_MENU_FRAME_HEIGHT = 250
 UI_MAIN_MENU_HEADING_TEXT = "Battle Ships The Game"
 UI_MAIN_MENU_LOAD_FILE_BUTTON_TEXT = "Load Game"
+UI_MAIN_MENU_LOAD_STORE_BUTTON_TEXT = "Continue Saved Game"
 UI_MAIN_MENU_MULTIPLAYER_BUTTON_TEXT = "Start game 1 vs 1"
 UI_MAIN_MENU_SINGLEPLAYER_BUTTON_TEXT = "Start game 1 vs PC"
+UI_MAIN_MENU_NORMAL_BUTTON_TEXT = "Start game 1 vs PC (normal)"
+UI_MAIN_MENU_HARD_BUTTON_TEXT = "Start game 1 vs PC (hard)"
+
+# Dialog with games stored in config.GAME_STORE_FILE
+UI_STORED_GAMES_TITLE = "Saved Games"
+UI_STORED_GAMES_WIDTH = 40
+UI_STORED_GAMES_HEIGHT = 15
+UI_STORED_GAME_TEXT = "Game {id} - {mode} {difficulty}, step {step}"
+UI_STORED_GAME_OPEN_TEXT = "Open"
@@ -7,10 +7,20 @@ Index file, program starts here
 
 import tkinter
 
+import config
 from MainMenu import MainMenu
+from Metrics import METRICS
 
 # Driver code for programm
 if __name__ == '__main__':
+    if config.METRICS_ENABLED:
+        METRICS.enable()
+        if config.METRICS_FILE is not None:
+            METRICS.start_dump(config.METRICS_FILE)
+
     root = tkinter.Tk()
     main_menu = MainMenu(root)
     root.mainloop()
+
+    METRICS.stop_dump()
+    METRICS.stop_profile()
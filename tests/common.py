@@ -0,0 +1,89 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Helpers shared by tests of storing of games
+"""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import config
+from GameBuilder import GameBuilder
+
+# Small game used by all tests
+SETTINGS = {
+    config.GAME_PLAN_X_KEY: 6,
+    config.GAME_PLAN_Y_KEY: 5,
+    config.GAME_SHIP_KEY: 3,
+    config.GAME_SHIP_BLOCK_KEY: 7,
+}
+
+
+def create_template(seed=0, settings=None):
+    """
+    Create template of new game
+
+    Parameters
+    ----------
+    seed : int
+        Optional, seed of game plans
+    settings : dict
+        Optional, values overriding SETTINGS
+
+    Returns
+    -------
+    dict
+    """
+
+    builder = GameBuilder(random.Random(seed))
+    builder.create_settings()
+    builder.create_initial_state()
+    builder.template[config.SETTINGS_KEY].update(SETTINGS)
+    if settings:
+        builder.template[config.SETTINGS_KEY].update(settings)
+    builder.create_game_plan(config.HERO_KEY)
+    builder.create_game_plan(config.ENEMY_KEY)
+    return builder.template
+
+
+def fields(data):
+    """
+    Return both game plans as lists of lists
+
+    Parameters
+    ----------
+    data : dict
+        Data of game file
+
+    Returns
+    -------
+    list
+    """
+
+    return [[list(row) for row in data[name]] for name in [config.HERO_KEY, config.ENEMY_KEY]]
+
+
+class StorageTestCase(unittest.TestCase):
+    """
+    Test case with temporary directory for game files
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, config.GAME_FILE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_file(self):
+        with open(self.filename) as file:
+            return json.load(file)
+
+    def read_journal(self):
+        with open(self.filename + config.JOURNAL_SUFFIX) as file:
+            return file.read().splitlines()
@@ -0,0 +1,150 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of computer players
+"""
+
+import random
+import unittest
+
+import config
+from Game import Game
+
+# Small game, so whole games are played quickly
+SETTINGS = {
+    config.GAME_PLAN_X_KEY: 7,
+    config.GAME_PLAN_Y_KEY: 6,
+    config.GAME_SHIP_KEY: 4,
+    config.GAME_SHIP_BLOCK_KEY: 10,
+}
+
+DIFFICULTIES = [config.GAME_DIFFICULTY_EASY, config.GAME_DIFFICULTY_NORMAL, config.GAME_DIFFICULTY_HARD]
+
+
+def play(difficulty, seed, settings=SETTINGS):
+    """
+    Let computer player sink all ships of the hero, hero never plays
+
+    Parameters
+    ----------
+    difficulty : str
+        One of config.GAME_DIFFICULTY_*
+    seed : int
+        Seed of the game
+    settings : dict
+        Optional, values overriding default settings
+
+    Returns
+    -------
+    tuple
+        (game, list of attacked (x, y) coordinates)
+    """
+
+    game = Game.new_game(config.GAME_MODE_MULTI, settings, rng=random.Random(seed))
+    ai = game.get_ai(config.HERO_KEY, difficulty)
+    field = game.hero_field
+    moves = []
+    while field.live_ship and len(moves) < len(field.field) * len(field.field[0]):
+        game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+        x, y = ai.choose()
+        assert 0 <= x < len(field.field[0]) and 0 <= y < len(field.field), (x, y)
+        assert field.field[y][x] in [config.IS_WATTER, config.IS_SHIP], (x, y)
+        assert game.attack(config.HERO_KEY, x, y) is not None, (x, y)
+        moves.append((x, y))
+    return game, moves
+
+
+class StubAI:
+    """
+    Computer player attacking still the same field
+    """
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def choose(self):
+        return self.x, self.y
+
+
+class AITest(unittest.TestCase):
+
+    def test_choice_is_untried_field(self):
+        for difficulty in DIFFICULTIES:
+            for seed in range(5):
+                with self.subTest(difficulty=difficulty, seed=seed):
+                    game, moves = play(difficulty, seed)
+                    self.assertEqual(game.hero_field.live_ship, 0)
+                    self.assertEqual(len(set(moves)), len(moves))
+
+    def test_choice_is_untried_field_of_crowded_plan(self):
+        settings = {config.GAME_PLAN_X_KEY: 5, config.GAME_PLAN_Y_KEY: 1, config.GAME_SHIP_KEY: 2,
+                    config.GAME_SHIP_BLOCK_KEY: 3}
+        for difficulty in DIFFICULTIES:
+            with self.subTest(difficulty=difficulty):
+                game, moves = play(difficulty, 0, settings)
+                self.assertEqual(game.hero_field.live_ship, 0)
+
+    def test_ai_learns_attacks_performed_before(self):
+        for difficulty in DIFFICULTIES:
+            with self.subTest(difficulty=difficulty):
+                game = Game.new_game(config.GAME_MODE_MULTI, SETTINGS, rng=random.Random(9))
+                attacked = set()
+                for i in range(15):
+                    game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+                    x, y = game.choose_target(config.HERO_KEY)
+                    game.attack(config.HERO_KEY, x, y)
+                    attacked.add((x, y))
+
+                ai = game.get_ai(config.HERO_KEY, difficulty)
+                while game.hero_field.live_ship:
+                    game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+                    x, y = ai.choose()
+                    self.assertNotIn((x, y), attacked)
+                    game.attack(config.HERO_KEY, x, y)
+                    attacked.add((x, y))
+
+    def test_seeded_game_is_played_same_without_time_budget(self):
+        for difficulty in DIFFICULTIES:
+            with self.subTest(difficulty=difficulty):
+                game, moves = play(difficulty, 3)
+                self.assertEqual(play(difficulty, 3)[1], moves)
+                self.assertNotEqual(play(difficulty, 4)[1], moves)
+
+        game = Game.new_game(config.GAME_MODE_MULTI, SETTINGS, rng=random.Random(3))
+        self.assertIsNone(game.get_ai(config.HERO_KEY, config.GAME_DIFFICULTY_HARD).budget)
+        game = Game.new_game(config.GAME_MODE_MULTI, SETTINGS)
+        self.assertEqual(game.get_ai(config.HERO_KEY, config.GAME_DIFFICULTY_HARD).budget, config.AI_TIME_BUDGET)
+
+    def test_sampled_fleets_match_attacks(self):
+        game = Game.new_game(config.GAME_MODE_MULTI, SETTINGS, rng=random.Random(6))
+        ai = game.get_ai(config.HERO_KEY, config.GAME_DIFFICULTY_HARD)
+        field = game.hero_field
+        while field.live_ship:
+            game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+            x, y = ai.choose()
+            self.assertTrue(ai.fleets)
+            for owner, ships in ai.fleets:
+                self.assertEqual(len(ships), ai.ships)
+                for ship in ships:
+                    values = [field.field[cell // ai.width][cell % ai.width] for cell in ship]
+                    self.assertNotIn(config.IS_MISS, values)
+                    # Fully hit ship would be sunk
+                    self.assertFalse(all(value == config.IS_HIT for value in values))
+                # Each hit of live ship is covered by each fleet
+                self.assertTrue(all(hit_y * ai.width + hit_x in owner for hit_x, hit_y in ai.hits))
+            game.attack(config.HERO_KEY, x, y)
+
+    def test_refused_attack_ends_ai_step(self):
+        game = Game.new_game(config.GAME_MODE_SINGLE, SETTINGS, rng=random.Random(2))
+        x, y = next(iter(game.hero_field.ship_map))
+        game.ai[config.HERO_KEY] = StubAI(x, y)
+        game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+        # The first attack hits, so the AI plays again the same field and the attack is refused
+        game.ai_step()
+        self.assertEqual(game.hero_field.field[y][x], config.IS_HIT)
+
+
+if __name__ == '__main__':
+    unittest.main()
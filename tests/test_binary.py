@@ -0,0 +1,59 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of binary format of game files
+"""
+
+import json
+import os
+import unittest
+
+import config
+from BinaryFormat import binary_to_json, decode, encode, is_binary, json_to_binary
+from DataHandler import DataHandler
+from tests.common import StorageTestCase, create_template, fields
+
+
+class BinaryTest(StorageTestCase):
+
+    def test_encode_decode_round_trip(self):
+        data = create_template(1)
+        decoded = decode(encode(data))
+        self.assertEqual(decoded[config.STATE_KEY], data[config.STATE_KEY])
+        for key, value in decoded[config.SETTINGS_KEY].items():
+            self.assertEqual(value, data[config.SETTINGS_KEY].get(key, value))
+        self.assertEqual(fields(decoded), fields(data))
+
+    def test_changes_are_stored_in_binary_file(self):
+        data = create_template(2)
+        dh = DataHandler(self.filename, data, binary=True)
+        dh.set_cell(config.ENEMY_KEY, 5, 4, config.IS_MISS)
+        expected = fields(dh.source)
+        dh.close()
+
+        self.assertTrue(is_binary(self.filename))
+        loaded = DataHandler(self.filename)
+        self.assertIsNotNone(loaded.binary)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 1)
+        self.assertEqual(fields(loaded.source), expected)
+        loaded.close()
+
+    def test_conversion_between_formats(self):
+        data = create_template(3)
+        DataHandler(self.filename, data)
+        binary = os.path.join(self.directory, 'game.bin')
+        json_file = os.path.join(self.directory, 'game.json')
+        json_to_binary(self.filename, binary)
+        binary_to_json(binary, json_file)
+
+        self.assertTrue(is_binary(binary))
+        self.assertFalse(is_binary(json_file))
+        with open(json_file) as file:
+            converted = json.load(file)
+        self.assertEqual(converted[config.STATE_KEY], data[config.STATE_KEY])
+        self.assertEqual(fields(converted), fields(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of backends of game plans and their loading by game field
+"""
+
+import unittest
+from unittest import mock
+
+import config
+import NumpyBoard
+from BitBoard import BitBoard
+from DataHandler import DataHandler
+from GameField import GameField, InvalidGameData, label_ships
+from tests.common import create_template, fields
+
+# Backends of game plans available in this environment
+BACKENDS = [config.GAME_BACKEND_LIST, config.GAME_BACKEND_BITS]
+if NumpyBoard.numpy is not None:
+    BACKENDS.append(config.GAME_BACKEND_NUMPY)
+
+
+class BoardTest(unittest.TestCase):
+
+    def load(self, backend, strict=False, seed=0):
+        data = create_template(seed, {config.GAME_BACKEND_KEY: backend})
+        data[config.HERO_KEY] = fields(data)[0]
+        return GameField(config.HERO_KEY, DataHandler(None, data), strict), data
+
+    def test_board_matches_list(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                field, data = self.load(backend)
+                plan = fields(data)[0]
+                self.assertEqual([list(row) for row in field.field], plan)
+                self.assertEqual(label_ships(field.field), label_ships(plan))
+
+                copy = field.snapshot()
+                field.take_the_attack(0, 0)
+                self.assertEqual(list(copy[0]), plan[0])
+                self.assertNotEqual(list(field.field[0]), plan[0])
+
+    def test_value_out_of_bit_board_is_refused(self):
+        data = create_template(1, {config.GAME_BACKEND_KEY: config.GAME_BACKEND_BITS})
+        data[config.HERO_KEY] = fields(data)[0]
+        data[config.HERO_KEY][0][0] = 7
+        with self.assertRaises(InvalidGameData):
+            GameField(config.HERO_KEY, DataHandler(None, data))
+
+    def test_missing_numpy_is_refused(self):
+        data = create_template(2)
+        data[config.SETTINGS_KEY][config.GAME_BACKEND_KEY] = config.GAME_BACKEND_NUMPY
+        with mock.patch.object(NumpyBoard, 'numpy', None):
+            with self.assertRaises(InvalidGameData) as context:
+                GameField(config.HERO_KEY, DataHandler(None, data))
+        self.assertEqual(str(context.exception), config.INVALID_BACKEND_NUMPY)
+
+    def test_copy_is_kept_only_in_strict_mode(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                field, data = self.load(backend)
+                self.assertIsNone(field.valid_data)
+
+                field, data = self.load(backend, strict=True)
+                field.take_the_attack(1, 1)
+                field.validate_field_state()
+                # Change of two fields without attack is not valid game step
+                for x, y in [(2, 2), (3, 3)]:
+                    value = field.field[y][x]
+                    field.field[y][x] = config.IS_MISS if value == config.IS_WATTER else config.IS_HIT
+                with self.assertRaises(InvalidGameData):
+                    field.take_the_attack(4, 4)
+
+    def test_bit_board_row_slices(self):
+        plan = fields(create_template(3))[0]
+        board = BitBoard.from_list(plan)
+        for y in range(len(plan)):
+            with self.subTest(y=y):
+                self.assertEqual(list(board[y]), plan[y])
+                self.assertEqual(board[y][1:4], plan[y][1:4])
+                self.assertEqual(board[y][::-2], plan[y][::-2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of deferred writes of game files
+"""
+
+import time
+import unittest
+from unittest import mock
+
+import config
+from DataHandler import DataHandler
+from tests.common import StorageTestCase, create_template
+
+
+class DeferredTest(StorageTestCase):
+
+    def test_changes_are_written_on_close(self):
+        with mock.patch.object(config, 'FLUSH_INTERVAL', 60), mock.patch.object(config, 'FLUSH_STEPS', 100):
+            dh = DataHandler(self.filename, create_template(), deferred=True)
+            dh.set_cell(config.HERO_KEY, 2, 3, config.IS_MISS)
+            self.assertTrue(dh.dirty)
+            self.assertEqual(self.read_file()[config.STATE_KEY][config.STEP_KEY], 0)
+            dh.close()
+
+        self.assertFalse(dh.dirty)
+        self.assertIsNone(dh.writer)
+        self.assertEqual(self.read_file()[config.STATE_KEY][config.STEP_KEY], 1)
+        self.assertEqual(self.read_file()[config.HERO_KEY][3][2], config.IS_MISS)
+
+    def test_changes_are_written_after_flush_steps(self):
+        with mock.patch.object(config, 'FLUSH_INTERVAL', 60), mock.patch.object(config, 'FLUSH_STEPS', 2):
+            dh = DataHandler(self.filename, create_template(), deferred=True, journal=True)
+            dh.set_cell(config.HERO_KEY, 0, 0, config.IS_MISS)
+            dh.set_cell(config.HERO_KEY, 1, 0, config.IS_MISS)
+            for i in range(200):
+                if not dh.dirty:
+                    break
+                time.sleep(0.01)
+            self.assertFalse(dh.dirty)
+            self.assertEqual(len(self.read_journal()), 2)
+            dh.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
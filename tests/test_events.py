@@ -0,0 +1,88 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of events published by the game and bus delivering them
+"""
+
+import random
+import unittest
+
+import config
+from Events import AttackEvent, EventBus, GameOverEvent, ShipSunkEvent, TurnEvent
+from Game import Game, opponent
+
+
+class EventBusTest(unittest.TestCase):
+
+    def test_subscribers_get_events_of_their_kinds_in_order(self):
+        bus = EventBus()
+        received = []
+        bus.subscribe(lambda event: received.append(('all', event)))
+        bus.subscribe(lambda event: received.append(('turn', event)), [config.EVENT_TURN])
+
+        attack = AttackEvent(config.HERO_KEY, 1, 2, config.IS_MISS, 3)
+        turn = TurnEvent(config.ENEMY_KEY)
+        bus.publish(attack)
+        bus.publish(turn)
+        self.assertEqual(received, [('all', attack), ('all', turn), ('turn', turn)])
+
+    def test_unsubscribed_callback_is_not_called(self):
+        bus = EventBus()
+        received = []
+        callback = received.append
+        bus.subscribe(callback)
+        bus.unsubscribe(callback)
+        bus.publish(TurnEvent(config.HERO_KEY))
+        self.assertEqual(received, [])
+
+    def test_event_data(self):
+        event = AttackEvent(config.HERO_KEY, 1, 2, action=config.IS_HIT, step=5)
+        self.assertEqual(event.to_dict(), {'event': config.EVENT_ATTACK, 'name': config.HERO_KEY, 'x': 1, 'y': 2,
+                                           'action': config.IS_HIT, 'step': 5})
+        self.assertEqual(event, AttackEvent(config.HERO_KEY, 1, 2, config.IS_HIT, 5))
+        self.assertNotEqual(event, AttackEvent(config.HERO_KEY, 1, 2, config.IS_HIT, 6))
+
+
+class GameEventsTest(unittest.TestCase):
+
+    def test_attack_is_published_with_saved_step(self):
+        game = Game.new_game(config.GAME_MODE_MULTI, rng=random.Random(4))
+        events = []
+
+        def record(event):
+            # State of the game is saved before the event is published
+            events.append((event, game.dh.get_data(config.STATE_KEY)[config.STEP_KEY]))
+
+        game.subscribe(record)
+        while game.winner() is None:
+            player = game.whose_turn()
+            x, y = game.choose_target(opponent(player))
+            game.attack(opponent(player), x, y)
+
+        attacks = [(event, step) for event, step in events if event.kind == config.EVENT_ATTACK]
+        self.assertTrue(all(event.step == step for event, step in attacks))
+        self.assertEqual([event.step for event, step in attacks], sorted(set(event.step for event, step in attacks)))
+
+        kinds = [event.kind for event, step in events]
+        sunk = 2 * config.GAME_SHIP - game.hero_field.live_ship - game.enemy_field.live_ship
+        self.assertEqual(kinds.count(config.EVENT_SUNK), sunk)
+        self.assertEqual(events[-2][0], GameOverEvent(game.winner()))
+        self.assertIsInstance(events[-1][0], TurnEvent)
+
+    def test_sunk_ship_follows_its_last_attack(self):
+        game = Game.new_game(config.GAME_MODE_MULTI, rng=random.Random(5))
+        events = []
+        game.subscribe(events.append, [config.EVENT_ATTACK, config.EVENT_SUNK])
+        game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+        cells = game.hero_field.ship_cells[0]
+        for x, y in cells:
+            game.attack(config.HERO_KEY, x, y)
+
+        self.assertEqual(len(events), len(cells) + 1)
+        self.assertEqual(events[-1], ShipSunkEvent(config.HERO_KEY, cells[-1][0], cells[-1][1], cells))
+        self.assertTrue(all(event.action == config.IS_HIT for event in events[:-1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of placement of the fleet to the game plan
+"""
+
+import random
+import unittest
+
+import config
+from FleetPlacer import FleetPlacer
+from GameField import InvalidGameData, label_ships
+
+# Sizes of game plan and fleet, (plan_x, plan_y, ship, block)
+CASES = [(8, 8, 6, 15), (10, 4, 3, 12), (1, 9, 2, 5), (32, 32, 20, 60), (5, 5, 0, 0)]
+
+
+class FleetPlacerTest(unittest.TestCase):
+
+    def assert_valid_plan(self, plan, plan_x, plan_y, ship, block):
+        self.assertEqual(len(plan), plan_y)
+        self.assertTrue(all(len(row) == plan_x for row in plan))
+        self.assertTrue(all(value in (config.IS_WATTER, config.IS_SHIP) for row in plan for value in row))
+        self.assertEqual(sum(value == config.IS_SHIP for row in plan for value in row), block)
+
+        ship_map, ship_cells, ship_hits = label_ships(plan)
+        self.assertEqual(len(ship_cells), ship)
+        self.assertTrue(all(cells for cells in ship_cells))
+        self.assertEqual(ship_hits, [0] * ship)
+
+    def test_placed_fleet_is_valid(self):
+        for plan_x, plan_y, ship, block in CASES:
+            for seed in range(20):
+                with self.subTest(case=(plan_x, plan_y, ship, block), seed=seed):
+                    plan = FleetPlacer(plan_x, plan_y, ship, block, random.Random(seed)).place()
+                    self.assert_valid_plan(plan, plan_x, plan_y, ship, block)
+
+    def test_crowded_fleet_is_valid(self):
+        # Fleet filling the longest lane is laid along it when random growth gets stuck
+        placer = FleetPlacer(6, 6, 1, 1, random.Random(0))
+        longest = max(placer.lane_length(False), placer.lane_length(True))
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                plan = FleetPlacer(6, 6, 4, longest - 3, random.Random(seed)).place()
+                self.assert_valid_plan(plan, 6, 6, 4, longest - 3)
+
+    def test_fleet_which_can_not_be_generated_is_refused(self):
+        # Fleets which break the rules and fleets over the limit of the generator (longest lane),
+        # two ships of 40 blocks or one ship of 16 blocks could be placed by hand, but not generated
+        for plan_x, plan_y, ship, block in [(3, 3, 6, 6), (4, 4, 3, 2), (0, 4, 1, 1), (8, 8, 2, 40), (4, 4, 1, 16)]:
+            with self.subTest(case=(plan_x, plan_y, ship, block)):
+                placer = FleetPlacer(plan_x, plan_y, ship, block, random.Random(0))
+                self.assertFalse(placer.fits())
+                self.assertRaises(InvalidGameData, placer.place)
+
+
+if __name__ == '__main__':
+    unittest.main()
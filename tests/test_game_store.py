@@ -0,0 +1,78 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of storing of games in SQLite database
+"""
+
+import os
+import unittest
+from unittest import mock
+
+import config
+from GameStore import GameStore
+from tests.common import StorageTestCase, create_template, fields
+
+
+class GameStoreTest(StorageTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.store = GameStore(os.path.join(self.directory, config.GAME_STORE_FILE))
+
+    def tearDown(self):
+        self.store.close()
+        super().tearDown()
+
+    def test_game_round_trip(self):
+        data = create_template(4)
+        game_id = self.store.create_game(data)
+        dh = self.store.open_game(game_id)
+        self.assertEqual(dh.get_data(config.SETTINGS_KEY), data[config.SETTINGS_KEY])
+        self.assertEqual(dh.get_data(config.STATE_KEY), data[config.STATE_KEY])
+        self.assertEqual(fields(dh.source), fields(data))
+        self.assertIn(game_id, self.store.list_games())
+
+    def test_moves_are_replayed(self):
+        game_id = self.store.create_game(create_template(5))
+        dh = self.store.open_game(game_id)
+        dh.set_cell(config.HERO_KEY, 1, 1, config.IS_MISS)
+        dh.set_cell(config.ENEMY_KEY, 2, 2, config.IS_MISS)
+
+        moves = self.store.connection.execute('SELECT COUNT(*) FROM moves WHERE game_id = ?', (game_id,)).fetchone()
+        self.assertEqual(moves[0], 2)
+        loaded = self.store.open_game(game_id)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 2)
+        self.assertEqual(fields(loaded.source), fields(dh.source))
+
+    def test_moves_are_compacted(self):
+        game_id = self.store.create_game(create_template(6))
+        with mock.patch.object(config, 'JOURNAL_COMPACT_RECORDS', 3):
+            dh = self.store.open_game(game_id)
+            for x in range(4):
+                dh.set_cell(config.HERO_KEY, x, 0, config.IS_MISS)
+
+        moves = self.store.connection.execute('SELECT COUNT(*) FROM moves WHERE game_id = ?', (game_id,)).fetchone()
+        self.assertEqual(moves[0], 1)
+        loaded = self.store.open_game(game_id)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 4)
+        self.assertEqual(fields(loaded.source), fields(dh.source))
+
+        dh.save()
+        moves = self.store.connection.execute('SELECT COUNT(*) FROM moves WHERE game_id = ?', (game_id,)).fetchone()
+        self.assertEqual(moves[0], 0)
+        self.assertEqual(fields(self.store.open_game(game_id).source), fields(dh.source))
+
+    def test_deleted_game_is_removed_with_moves(self):
+        game_id = self.store.create_game(create_template(7))
+        self.store.open_game(game_id).set_cell(config.HERO_KEY, 0, 0, config.IS_MISS)
+        self.store.delete_game(game_id)
+
+        self.assertNotIn(game_id, self.store.list_games())
+        self.assertRaises(KeyError, self.store.open_game, game_id)
+        moves = self.store.connection.execute('SELECT COUNT(*) FROM moves WHERE game_id = ?', (game_id,)).fetchone()
+        self.assertEqual(moves[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of journal of changes of game files
+"""
+
+import unittest
+from unittest import mock
+
+import config
+from DataHandler import DataHandler
+from tests.common import StorageTestCase, create_template, fields
+
+
+class JournalTest(StorageTestCase):
+
+    def test_replay_applies_records_after_saved_step(self):
+        dh = DataHandler(self.filename, create_template(), journal=True)
+        dh.set_cell(config.HERO_KEY, 1, 2, config.IS_MISS)
+        dh.set_cell(config.ENEMY_KEY, 3, 0, config.IS_MISS)
+        dh.close()
+
+        self.assertEqual(self.read_file()[config.STATE_KEY][config.STEP_KEY], 0)
+        self.assertEqual(len(self.read_journal()), 2)
+
+        loaded = DataHandler(self.filename)
+        self.assertEqual(loaded.get_data(config.HERO_KEY)[2][1], config.IS_MISS)
+        self.assertEqual(loaded.get_data(config.ENEMY_KEY)[0][3], config.IS_MISS)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 2)
+        self.assertEqual(fields(loaded.source), fields(dh.source))
+
+    def test_replay_skips_records_already_in_file(self):
+        dh = DataHandler(self.filename, create_template(), journal=True)
+        dh.set_cell(config.HERO_KEY, 0, 0, config.IS_MISS)
+        dh.close()
+        journal = self.read_journal()
+
+        dh = DataHandler(self.filename, journal=True)
+        dh.close()
+        self.assertEqual(self.read_journal(), [])
+        # Record of step already saved in the file must not be applied again
+        with open(self.filename + config.JOURNAL_SUFFIX, 'w') as file:
+            file.write(journal[0].replace(str(config.IS_MISS) + ']', str(config.IS_HIT) + ']') + '\n')
+
+        loaded = DataHandler(self.filename)
+        self.assertEqual(loaded.get_data(config.HERO_KEY)[0][0], config.IS_MISS)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 1)
+
+    def test_truncated_last_record_is_ignored(self):
+        dh = DataHandler(self.filename, create_template(), journal=True)
+        dh.set_cell(config.HERO_KEY, 1, 1, config.IS_MISS)
+        dh.set_cell(config.HERO_KEY, 2, 1, config.IS_MISS)
+        dh.close()
+
+        with open(self.filename + config.JOURNAL_SUFFIX, 'a') as file:
+            file.write('[3,"{}",4,'.format(config.HERO_KEY))
+
+        loaded = DataHandler(self.filename)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 2)
+        self.assertEqual(loaded.get_data(config.HERO_KEY)[1][2], config.IS_MISS)
+        self.assertEqual(fields(loaded.source), fields(dh.source))
+
+    def test_load_in_journal_mode_compacts_journal(self):
+        dh = DataHandler(self.filename, create_template(), journal=True)
+        dh.set_cell(config.HERO_KEY, 1, 1, config.IS_MISS)
+        dh.set_data(config.STATE_KEY, dh.get_data(config.STATE_KEY))
+        dh.close()
+
+        loaded = DataHandler(self.filename, journal=True)
+        loaded.close()
+        self.assertEqual(self.read_journal(), [])
+        self.assertEqual(self.read_file()[config.STATE_KEY][config.STEP_KEY], 2)
+        self.assertEqual(self.read_file()[config.HERO_KEY][1][1], config.IS_MISS)
+
+    def test_journal_is_compacted_after_limit(self):
+        with mock.patch.object(config, 'JOURNAL_COMPACT_RECORDS', 3):
+            dh = DataHandler(self.filename, create_template(), journal=True)
+            for x in range(5):
+                dh.set_cell(config.HERO_KEY, x, 4, config.IS_MISS)
+                self.assertLessEqual(len(self.read_journal()), 3)
+            dh.close()
+
+        self.assertEqual(self.read_file()[config.STATE_KEY][config.STEP_KEY], 4)
+        self.assertEqual(len(self.read_journal()), 1)
+        loaded = DataHandler(self.filename)
+        self.assertEqual(loaded.get_data(config.STATE_KEY)[config.STEP_KEY], 5)
+        self.assertEqual(fields(loaded.source), fields(dh.source))
+
+
+if __name__ == '__main__':
+    unittest.main()
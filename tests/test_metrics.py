@@ -0,0 +1,114 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of counters, histograms and profiling of stages of the move
+"""
+
+import json
+import os
+import pstats
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import config
+from Game import Game
+from Metrics import METRICS, Histogram, Metrics
+
+
+def marker_function():
+    """
+    Function found in profiles of tests
+    """
+
+    return sum(range(1000))
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.metrics = Metrics()
+        self.metrics.enable()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in [0.05, 0.1, 0.5, 2.0]:
+            histogram.observe(value)
+        self.assertEqual(histogram.to_dict(), {'count': 4, 'sum': 2.65, 'buckets': {'0.1': 2, '1.0': 3, '+Inf': 4}})
+
+    def test_counters_are_collected_only_when_enabled(self):
+        self.metrics.count('hits')
+        self.metrics.count('hits', 2)
+        self.metrics.disable()
+        self.metrics.count('hits')
+        self.assertEqual(self.metrics.to_dict()['counters'], {'hits': 3})
+
+    def test_export_formats(self):
+        self.metrics.count('misses')
+        self.metrics.observe('attack', time.perf_counter())
+        data = self.metrics.to_dict()
+        self.assertEqual(data['histograms']['attack']['count'], 1)
+
+        lines = self.metrics.to_prometheus().splitlines()
+        prefix = config.METRICS_PREFIX
+        self.assertIn('{}_misses_total 1'.format(prefix), lines)
+        self.assertIn('{}_stage_seconds_count{{stage="attack"}} 1'.format(prefix), lines)
+        self.assertIn('{}_stage_seconds_bucket{{stage="attack",le="+Inf"}} 1'.format(prefix), lines)
+
+        filename = os.path.join(self.directory, 'metrics')
+        self.metrics.dump(filename, config.METRICS_FORMAT_JSON)
+        with open(filename) as file:
+            self.assertEqual(json.load(file)['counters'], {'misses': 1})
+        self.metrics.dump(filename, config.METRICS_FORMAT_PROMETHEUS)
+        with open(filename) as file:
+            self.assertIn('{}_misses_total 1'.format(prefix), file.read().splitlines())
+
+    def test_worker_thread_is_profiled(self):
+        filename = os.path.join(self.directory, 'profile')
+        self.metrics.start_profile()
+
+        def work():
+            with self.metrics.profile_thread():
+                marker_function()
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        self.metrics.stop_profile(filename)
+        self.assertIn('marker_function', [function for file, line, function in pstats.Stats(filename).stats])
+
+        # Without running capture nothing is collected
+        with self.metrics.profile_thread():
+            marker_function()
+        self.assertEqual(self.metrics.thread_profiles, [])
+
+    def test_stages_of_attack_are_measured(self):
+        METRICS.reset()
+        METRICS.enable()
+        self.addCleanup(METRICS.disable)
+        self.addCleanup(METRICS.reset)
+
+        game = Game.new_game(config.GAME_MODE_MULTI, rng=random.Random(0))
+        game.game_state[config.ACTUAL_PLAYER_KEY] = config.ENEMY_KEY
+        x, y = next(iter(game.hero_field.ship_map))
+        game.attack(config.HERO_KEY, x, y)
+        game.attack(config.HERO_KEY, x, y)
+
+        data = METRICS.to_dict()
+        self.assertEqual(data['counters'], {'hits': 1, 'errors': 1})
+        # Rejected attack is measured too
+        self.assertEqual(data['histograms']['take_the_attack.validate']['count'], 2)
+        self.assertEqual(data['histograms']['take_the_attack']['count'], 1)
+        self.assertEqual(data['histograms']['attack']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
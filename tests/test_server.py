@@ -0,0 +1,224 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of network server and client over loopback
+"""
+
+import asyncio
+import random
+import unittest
+from unittest import mock
+
+import config
+from AI import DIFFICULTIES
+from Client import Client
+from GameStore import decode_field
+from Server import Server
+
+# Small game, so whole matches are played quickly
+SETTINGS = {
+    config.GAME_PLAN_X_KEY: 6,
+    config.GAME_PLAN_Y_KEY: 5,
+    config.GAME_SHIP_KEY: 3,
+    config.GAME_SHIP_BLOCK_KEY: 7,
+}
+
+
+async def finish(client, difficulty=config.GAME_DIFFICULTY_NORMAL):
+    """
+    Let computer player play the started match to the end
+
+    Parameters
+    ----------
+    client : Client
+        Client with started match
+    difficulty : str
+        Optional, one of config.GAME_DIFFICULTY_*
+    """
+
+    ai = DIFFICULTIES[difficulty](client, config.ENEMY_KEY)
+    while await client.wait_turn():
+        await client.attack(*ai.choose())
+
+
+async def play(port, seed, difficulty=config.GAME_DIFFICULTY_NORMAL):
+    """
+    Connect computer player to the server and play one match
+
+    Parameters
+    ----------
+    port : int
+        Port of the server
+    seed : int
+        Seed of the computer player
+    difficulty : str
+        Optional, one of config.GAME_DIFFICULTY_*
+
+    Returns
+    -------
+    Client
+        Closed client after the match
+    """
+
+    client = await Client.connect(config.SERVER_HOST, port, random.Random(seed))
+    await client.join()
+    await finish(client, difficulty)
+    await client.close()
+    return client
+
+
+class ServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    Test case with running server on free port of loopback
+    """
+
+    async def asyncSetUp(self):
+        self.server = Server(config.SERVER_HOST, 0, SETTINGS, random.Random(1))
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def connect(self):
+        client = await Client.connect(config.SERVER_HOST, self.server.port)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def start_match(self):
+        first = await self.connect()
+        second = await self.connect()
+        join = asyncio.ensure_future(first.join())
+        while self.server.waiting is None:
+            await asyncio.sleep(0.001)
+        await second.join()
+        await join
+        return first, second
+
+
+class ServerTest(ServerTestCase):
+
+    async def test_match_is_played_to_the_end(self):
+        clients = await asyncio.gather(*(play(self.server.port, seed) for seed in range(4)))
+
+        self.assertEqual(sorted(client.won for client in clients), [False, False, True, True])
+        self.assertEqual(self.server.finished, 2)
+        self.assertEqual(self.server.matches, {})
+        for client in clients:
+            self.assertEqual(client.errors, [])
+            blocks = SETTINGS[config.GAME_SHIP_BLOCK_KEY]
+            hits = sum(value == config.IS_HIT for row in client.enemy_field.field for value in row)
+            self.assertEqual(hits == blocks, client.won)
+
+    async def test_ships_of_opponent_are_never_sent(self):
+        first, second = await self.start_match()
+        match = next(iter(self.server.matches.values()))
+        for client, name in [(first, config.HERO_KEY), (second, config.ENEMY_KEY)]:
+            own = [list(row) for row in match.game.dh.get_data(name)]
+            self.assertEqual(client.hero_field.field, own)
+            self.assertTrue(all(value == config.IS_WATTER for row in client.enemy_field.field for value in row))
+
+        # Results of attacks are sent, other fields of the opponent stay unknown
+        await asyncio.gather(finish(first), finish(second))
+        for client, name in [(first, config.ENEMY_KEY), (second, config.HERO_KEY)]:
+            seen = [[config.IS_WATTER if value == config.IS_SHIP else value for value in row]
+                    for row in match.game.dh.get_data(name)]
+            self.assertEqual(client.enemy_field.field, seen)
+
+    async def test_invalid_commands_are_refused(self):
+        client = await self.connect()
+        for command in [('FOO',), ('A', 0, 0), ('WATCH', 'x'), ('WATCH', 99)]:
+            with self.subTest(command=command):
+                await client.send(*command)
+                words = await client.receive()
+                self.assertEqual(words[0], 'E')
+
+        await client.send('LIST')
+        self.assertEqual(await client.receive(), ['L'])
+
+    async def test_attack_out_of_turn_is_refused(self):
+        first, second = await self.start_match()
+        await asyncio.gather(first.receive(), second.receive())
+        waiting = first if not first.my_turn else second
+
+        await waiting.send('A', 0, 0)
+        self.assertEqual(await waiting.receive(), ['E'] + config.UI_CANT_PLAY_ERR_TEXT.split())
+        self.assertEqual(waiting.errors, [config.UI_CANT_PLAY_ERR_TEXT])
+        self.assertEqual(await waiting.receive(), ['T', '0'])
+
+    async def test_opponent_wins_when_player_leaves(self):
+        first, second = await self.start_match()
+        await first.close()
+        while second.won is None:
+            self.assertTrue(await second.receive())
+        self.assertTrue(second.won)
+        while self.server.matches:
+            await asyncio.sleep(0.001)
+        self.assertEqual(self.server.finished, 1)
+
+
+class SpectatorTest(ServerTestCase):
+
+    async def watch(self):
+        reader, writer = await asyncio.open_connection(config.SERVER_HOST, self.server.port)
+        self.addCleanup(writer.close)
+        match_id = next(iter(self.server.matches))
+        writer.write('WATCH {}\n'.format(match_id).encode())
+        await writer.drain()
+        words = (await reader.readline()).decode().split()
+        self.assertEqual(words[:2], ['V', str(match_id)])
+        return reader, words
+
+    async def test_spectator_follows_the_match_from_snapshot(self):
+        first, second = await self.start_match()
+        match = next(iter(self.server.matches.values()))
+        await asyncio.gather(first.receive(), second.receive())
+        attacker = first if first.my_turn else second
+        await attacker.attack(*attacker.choose_target(config.ENEMY_KEY))
+        await asyncio.gather(first.receive(), second.receive())
+
+        reader, words = await self.watch()
+        self.assertEqual(len(match.spectators), 1)
+        plan_x = int(words[2])
+        fields = {'1': decode_field(words[6], plan_x), '2': decode_field(words[7], plan_x)}
+        self.assertNotIn(config.IS_SHIP, [value for field in fields.values() for row in field for value in row])
+        attacked = [value for field in fields.values() for row in field for value in row if value != config.IS_WATTER]
+        self.assertEqual(len(attacked), 1)
+
+        await asyncio.gather(finish(first), finish(second))
+        while True:
+            words = (await reader.readline()).decode().split()
+            if words[0] == 'D':
+                fields[words[1]][int(words[3])][int(words[2])] = int(words[4])
+            elif words[0] == 'W':
+                break
+
+        winner = first if first.won else second
+        self.assertEqual(words[1], '1' if winner is first else '2')
+        for number, name in [('1', config.HERO_KEY), ('2', config.ENEMY_KEY)]:
+            seen = [[config.IS_WATTER if value == config.IS_SHIP else value for value in row]
+                    for row in match.game.dh.get_data(name)]
+            self.assertEqual(fields[number], seen)
+        self.assertEqual(match.spectators, set())
+
+    async def test_slow_spectator_is_disconnected(self):
+        first, second = await self.start_match()
+        match = next(iter(self.server.matches.values()))
+        await asyncio.gather(first.receive(), second.receive())
+        reader, words = await self.watch()
+
+        # Every spectator with any byte waiting for sending is too slow
+        with mock.patch.object(config, 'SERVER_SPECTATOR_BUFFER', -1):
+            attacker = first if first.my_turn else second
+            await attacker.attack(*attacker.choose_target(config.ENEMY_KEY))
+            await asyncio.gather(first.receive(), second.receive())
+
+        self.assertEqual(match.spectators, set())
+        self.assertEqual(await reader.readline(), b'')
+        # Players are not affected
+        await asyncio.gather(finish(first), finish(second))
+        self.assertEqual(sorted([first.won, second.won]), [False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of index of ships kept by game field during the game
+"""
+
+import random
+import unittest
+
+import config
+import NumpyBoard
+from DataHandler import DataHandler
+from GameBuilder import GameBuilder
+from GameField import GameField, InvalidGameData
+
+# Backends of game plans available in this environment
+BACKENDS = [config.GAME_BACKEND_LIST, config.GAME_BACKEND_BITS]
+if NumpyBoard.numpy is not None:
+    BACKENDS.append(config.GAME_BACKEND_NUMPY)
+
+
+class ShipIndexTest(unittest.TestCase):
+
+    def create_field(self, backend, seed, plan_x=10, plan_y=8, ship=5, block=14):
+        builder = GameBuilder(random.Random(seed))
+        builder.create_settings()
+        builder.create_initial_state()
+        builder.template[config.SETTINGS_KEY].update({
+            config.GAME_PLAN_X_KEY: plan_x,
+            config.GAME_PLAN_Y_KEY: plan_y,
+            config.GAME_SHIP_KEY: ship,
+            config.GAME_SHIP_BLOCK_KEY: block,
+            config.GAME_BACKEND_KEY: backend,
+        })
+        builder.create_game_plan(config.HERO_KEY)
+        builder.create_game_plan(config.ENEMY_KEY)
+        return GameField(config.HERO_KEY, DataHandler(None, builder.template))
+
+    def test_index_follows_attacks(self):
+        for backend in BACKENDS:
+            for seed in range(5):
+                with self.subTest(backend=backend, seed=seed):
+                    field = self.create_field(backend, seed)
+                    rng = random.Random(seed)
+                    self.assertEqual(field.count_ship(), (5, 5))
+                    while field.untried:
+                        x, y = field.random_untried(rng)
+                        was_ship = field.field[y][x] == config.IS_SHIP
+                        live = field.live_ship
+
+                        action = field.take_the_attack(x, y)
+                        self.assertEqual(action, config.IS_HIT if was_ship else config.IS_MISS)
+                        self.assertEqual(field.count_ship(), (5, field.live_ship))
+                        if field.last_sunk is not None:
+                            self.assertEqual(field.live_ship, live - 1)
+                            self.assertIn((x, y), field.ship_cells[field.last_sunk])
+                            self.assertTrue(field.is_sunk(field.last_sunk))
+                        else:
+                            self.assertEqual(field.live_ship, live)
+                    self.assertEqual(field.live_ship, 0)
+
+    def test_index_matches_rebuilt_index(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                field = self.create_field(backend, 7)
+                rng = random.Random(7)
+                for i in range(40):
+                    field.take_the_attack(*field.random_untried(rng))
+
+                hits = {field.get_ship(x, y): field.ship_hits[field.get_ship(x, y)]
+                        for x, y in field.ship_map}
+                untried = sorted(field.untried)
+                field.validate_field_state()
+                self.assertEqual({field.get_ship(x, y): field.ship_hits[field.get_ship(x, y)]
+                                  for x, y in field.ship_map}, hits)
+                self.assertEqual(sorted(field.untried), untried)
+                self.assertEqual(field.count_ship()[1], field.live_ship)
+
+    def test_attacked_field_is_refused(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend):
+                field = self.create_field(backend, 3)
+                field.take_the_attack(0, 0)
+                self.assertRaises(AssertionError, field.take_the_attack, 0, 0)
+                self.assertRaises(InvalidGameData, field.take_the_attack, 10, 0)
+                self.assertEqual(field.count_ship()[1], field.live_ship)
+
+
+if __name__ == '__main__':
+    unittest.main()
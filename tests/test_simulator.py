@@ -0,0 +1,75 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of batch simulator of games played by AI against AI
+"""
+
+import contextlib
+import io
+import unittest
+
+import config
+from Simulator import main, simulate
+
+# Keys of results which depend on speed of the computer
+TIMES = ['setup_time', 'move_time', 'time']
+
+# Small game, so many games are played quickly
+SETTINGS = {
+    config.GAME_PLAN_X_KEY: 6,
+    config.GAME_PLAN_Y_KEY: 6,
+    config.GAME_SHIP_KEY: 3,
+    config.GAME_SHIP_BLOCK_KEY: 7,
+}
+
+
+def without_times(results):
+    """
+    Return results ordered by index of the game without times
+
+    Parameters
+    ----------
+    results : iterable
+        Results of games as returned by play_game()
+
+    Returns
+    -------
+    list
+    """
+
+    return sorted(({key: value for key, value in result.items() if key not in TIMES} for result in results),
+                  key=lambda result: result['game'])
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def play(self, seed, processes, players):
+        return without_times(simulate(6, seed, SETTINGS, players, processes, chunksize=2))
+
+    def test_same_seed_plays_same_games(self):
+        for hero, enemy in [(config.GAME_DIFFICULTY_EASY, config.GAME_DIFFICULTY_NORMAL),
+                            (config.GAME_DIFFICULTY_NORMAL, config.GAME_DIFFICULTY_NORMAL),
+                            (config.GAME_DIFFICULTY_HARD, config.GAME_DIFFICULTY_NORMAL)]:
+            with self.subTest(hero=hero, enemy=enemy):
+                players = {config.HERO_KEY: hero, config.ENEMY_KEY: enemy}
+                results = self.play(3, 1, players)
+                self.assertEqual(self.play(3, 1, players), results)
+                self.assertEqual(self.play(3, 2, players), results)
+                self.assertNotEqual(self.play(4, 1, players), results)
+
+    def test_results_are_consistent(self):
+        players = {config.HERO_KEY: config.GAME_DIFFICULTY_EASY, config.ENEMY_KEY: config.GAME_DIFFICULTY_EASY}
+        for result in self.play(5, 1, players):
+            with self.subTest(game=result['game']):
+                self.assertEqual(result['moves'], sum(result['shots'].values()))
+                self.assertEqual(result['hits'][result['winner']], SETTINGS[config.GAME_SHIP_BLOCK_KEY])
+                self.assertEqual(result['moves_to_win'], result['shots'][result['winner']])
+
+    def test_empty_fleet_is_refused(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            main(['--ship', '0', '--block', '0', '--games', '1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+MFF UK - 2019/20 Winter - Programing 1 - Credit Program
+@author Václav Hrouda - wujido (vahrouda@gmail.com)
+
+Tests of tournament of computer players
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import config
+from Tournament import Standings, run_tournament
+
+# Small game, so many games are played quickly
+SETTINGS = {
+    config.GAME_PLAN_X_KEY: 6,
+    config.GAME_PLAN_Y_KEY: 6,
+    config.GAME_SHIP_KEY: 3,
+    config.GAME_SHIP_BLOCK_KEY: 6,
+}
+
+PLAYERS = [config.GAME_DIFFICULTY_EASY, config.GAME_DIFFICULTY_NORMAL]
+
+
+class TournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'results.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_tournament(self, rounds=2, **kwargs):
+        arguments = {'players': PLAYERS, 'rounds': rounds, 'seed': 5, 'settings': SETTINGS, 'processes': 1,
+                     'results_file': self.filename, 'output': io.StringIO()}
+        arguments.update(kwargs)
+        return run_tournament(**arguments)
+
+    def read_lines(self):
+        with open(self.filename) as file:
+            return file.read().splitlines()
+
+    def read_results(self):
+        return [json.loads(line) for line in self.read_lines()]
+
+    def test_results_file_starts_with_header(self):
+        self.run_tournament()
+        lines = self.read_results()
+        self.assertEqual(lines[0]['tournament']['players'], PLAYERS)
+        # Each pair plays each board twice, once from each side
+        self.assertEqual(len(lines), 1 + 2 * 2)
+        self.assertEqual(len({line['game'] for line in lines[1:]}), 4)
+
+    def test_resumed_tournament_plays_only_missing_games(self):
+        standings = self.run_tournament(rounds=3)
+        expected = self.read_results()
+        os.remove(self.filename)
+
+        self.run_tournament(rounds=2)
+        # Last result was not written completely
+        with open(self.filename, 'a') as file:
+            file.write('{"game": ')
+        resumed = self.run_tournament(rounds=3)
+
+        lines = [line for line in self.read_lines() if line.endswith('}')]
+        results = [json.loads(line) for line in lines]
+        self.assertEqual(sorted(result['game'] for result in results[1:]),
+                         sorted(result['game'] for result in expected[1:]))
+        self.assertEqual(resumed.table(), standings.table())
+
+    def test_other_tournament_is_refused(self):
+        self.run_tournament()
+        for kwargs in [{'seed': 6}, {'settings': dict(SETTINGS, **{config.GAME_SHIP_KEY: 2})},
+                       {'tournament_format': config.TOURNAMENT_SWISS},
+                       {'players': [config.GAME_DIFFICULTY_EASY, config.GAME_DIFFICULTY_HARD]}]:
+            with self.subTest(kwargs=kwargs):
+                with self.assertRaises(ValueError):
+                    self.run_tournament(**kwargs)
+        self.assertEqual(len(self.read_results()), 1 + 2 * 2)
+
+    def test_results_without_header_are_refused(self):
+        self.run_tournament()
+        lines = self.read_lines()
+        with open(self.filename, 'w') as file:
+            file.write(lines[1] + '\n')
+        with self.assertRaises(ValueError):
+            self.run_tournament()
+
+    def test_standings(self):
+        standings = Standings(PLAYERS)
+        standings.add({'hero': PLAYERS[0], 'enemy': PLAYERS[1], 'winner': PLAYERS[1]})
+        table = standings.table()
+        self.assertEqual([row['player'] for row in table], [PLAYERS[1], PLAYERS[0]])
+        self.assertEqual(table[0]['elo'] + table[1]['elo'], 2 * config.TOURNAMENT_ELO)
+        self.assertEqual([row['wins'] for row in table], [1, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()